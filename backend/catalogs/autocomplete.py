@@ -0,0 +1,67 @@
+# backend/catalogs/autocomplete.py
+"""
+Autocompletado de ItemDescription (selector de artículos).
+
+La búsqueda va contra ItemDescription.normalized_text (minúsculas, sin acentos
+ni signos: "Cable UTP Cat-6" → "cable utp cat 6"), así "cafe" encuentra "Café".
+
+  1) prefijo: normalized_text LIKE 'q%' ORDER BY normalized_text
+     (índice btree COLLATE "C", con o sin producto: la consulta corta en el LIMIT)
+  2) si faltan resultados y q tiene 3+ caracteres: contiene, LIKE '%q%'
+     (índice GIN pg_trgm), primero las que tienen una palabra que empieza con q
+
+Índices en la migración requisitions 0022 (solo PostgreSQL; en otros motores
+las mismas consultas funcionan sin índice).
+"""
+from django.db import connection
+from django.db.models import Case, F, IntegerField, Value, When
+from django.db.models.functions import Collate
+
+from requisitions.models import ItemDescription, search_text
+
+AUTOCOMPLETE_DEFAULT_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+TRIGRAM_MIN_LENGTH = 3  # pg_trgm no usa el índice con patrones más cortos
+
+_FIELDS = ("id", "text", "estimated_unit_cost")
+
+
+def _sort_text():
+    # mismo orden que el texto ASCII normalizado, y coincide con el índice COLLATE "C"
+    if connection.vendor == "postgresql":
+        return Collate("normalized_text", "C")
+    return F("normalized_text")
+
+
+def _row(values):
+    pk, text, cost = values
+    return {"id": pk, "text": text, "estimated_unit_cost": None if cost is None else f"{cost:.2f}"}
+
+
+def autocomplete_descriptions(q, product=None, limit=AUTOCOMPLETE_DEFAULT_LIMIT):
+    """[{id, text, estimated_unit_cost}] — prefijos primero, a lo más `limit`."""
+    term = search_text(q)
+    base = ItemDescription.objects.order_by().alias(sort_text=_sort_text())
+    if product is not None:
+        base = base.filter(product_id=product)
+    if not term and product is None:
+        return []
+
+    prefix = base.filter(sort_text__startswith=term) if term else base
+    rows = list(prefix.order_by("sort_text", "id").values_list(*_FIELDS)[:limit])
+
+    if term and len(rows) < limit and len(term) >= TRIGRAM_MIN_LENGTH:
+        word_start = Case(
+            When(normalized_text__contains=f" {term}", then=Value(0)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+        rows += (
+            base.filter(normalized_text__contains=term)
+            .exclude(sort_text__startswith=term)
+            .alias(word_start=word_start)
+            .order_by("word_start", "sort_text", "id")
+            .values_list(*_FIELDS)[:limit - len(rows)]
+        )
+
+    return [_row(r) for r in rows]
@@ -0,0 +1,122 @@
+# backend/catalogs/bundle.py
+"""
+Catálogos del formulario de requisición en UNA respuesta (GET /api/catalogs/bundle/).
+
+Formato compacto (columnas una vez, filas como arreglos):
+    {
+      "version": <n>,
+      "departments": {"fields": ["id", "code", "name"], "rows": [[1, "D01", "..."], ...]},
+      "projects": {...}, ...
+    }
+
+La versión vive en el caché y se incrementa (al confirmar la transacción) cada
+vez que se guarda o elimina una fila de cualquier catálogo del bundle (ver
+signals.py); los demás workers la incrementan al recibir el aviso del bus de
+invalidación (core.invalidation). La ETag sale de la versión: con If-None-Match vigente se responde
+304 sin tocar la base de datos, y el cuerpo también se guarda por versión.
+
+Nota: los cambios con QuerySet.update()/bulk_create() no disparan señales; usar
+bump_catalog_version() después de cargas masivas.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+
+from core.invalidation import bump_version, ensure_listener, publish, version_ttl
+from requisitions.models import (
+    Department, Project, FundingSource, BudgetUnit,
+    Agreement, Tender, ExternalService,
+    UnitOfMeasurement, Product,
+)
+
+# (llave en la respuesta, modelo, columnas, orden)
+CATALOG_BUNDLE = (
+    ("departments", Department, ("id", "code", "name"), "id"),
+    ("projects", Project, ("id", "code", "description"), "id"),
+    ("funding_sources", FundingSource, ("id", "code", "description"), "id"),
+    ("budget_units", BudgetUnit, ("id", "code", "description"), "id"),
+    ("agreements", Agreement, ("id", "code", "description"), "id"),
+    ("tenders", Tender, ("id", "name"), "id"),
+    ("external_services", ExternalService, ("id", "name"), "id"),
+    ("units", UnitOfMeasurement, ("id", "name"), "id"),
+    ("products", Product, ("id", "description"), "description"),
+)
+
+BUNDLE_MODELS = tuple(model for _, model, _, _ in CATALOG_BUNDLE)
+
+_VERSION_KEY = "catalogs:bundle-version"
+_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+
+def catalog_version():
+    ensure_listener()
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # valor nuevo (no 1): nunca reusa una ETag de antes del reinicio del caché
+        cache.add(_VERSION_KEY, time.time_ns(), version_ttl())
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _bump_version():
+    bump_version(_VERSION_KEY)
+
+
+def bump_catalog_version(key=""):
+    """
+    Invalida al confirmar la transacción en curso (o de inmediato si no hay) y
+    avisa a los demás workers (key = etiqueta del modelo, ver core.invalidation).
+    """
+    transaction.on_commit(_bump_version)
+    publish("catalogs", key)
+
+
+def on_remote_invalidation(key):
+    """Handler del bus (core.invalidation): otro worker cambió un catálogo."""
+    _bump_version()
+
+
+def build_bundle(version):
+    data = {"version": version}
+    for key, model, fields, order in CATALOG_BUNDLE:
+        data[key] = {
+            "fields": list(fields),
+            "rows": [list(row) for row in model.objects.order_by(order).values_list(*fields)],
+        }
+    return data
+
+
+def _etag(version):
+    return '"%s"' % hashlib.sha1(f"catalogs:{version}".encode("utf-8")).hexdigest()[:24]
+
+
+def _if_none_match(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def bundle_response(request):
+    version = catalog_version()
+    etag = _etag(version)
+
+    if _if_none_match(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        key = f"catalogs:bundle:{version}"
+        body = cache.get(key)
+        if body is None:
+            body = json.dumps(build_bundle(version), ensure_ascii=False, cls=DjangoJSONEncoder).encode("utf-8")
+            cache.set(key, body, None)
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = _CACHE_CONTROL
+    return response
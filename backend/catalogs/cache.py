@@ -0,0 +1,123 @@
+# backend/catalogs/cache.py
+"""
+Caché en proceso de catálogos: mapas id → instancia por modelo.
+
+Los catálogos cambian muy poco pero se leen en cada validación de requisición,
+en los PDFs y en el admin. Cada proceso guarda la tabla completa de cada
+catálogo junto con la versión de catálogos con la que la leyó (la misma del
+bundle, ver bundle.py). Al pedir un mapa:
+  - versión igual  → se usa el mapa local (sin consultas)
+  - versión nueva  → se vuelve a leer esa tabla (una consulta)
+post_save/post_delete de un catálogo, al confirmar la transacción, descartan
+el mapa local de ese modelo y suben la versión para el resto de los procesos
+(ver signals.py); antes de confirmar se sigue sirviendo el mapa anterior.
+
+Las instancias se comparten entre requests: tratarlas como solo lectura.
+"""
+import threading
+from functools import lru_cache
+
+from django.db.models import ForeignKey
+from django.db.models.query import ModelIterable
+
+from requisitions.models import (
+    Department, Project, FundingSource, BudgetUnit,
+    Agreement, Tender, ExternalService, UnitOfMeasurement,
+)
+from .bundle import catalog_version
+
+CACHED_CATALOGS = (
+    Department, Project, FundingSource, BudgetUnit,
+    Agreement, Tender, ExternalService, UnitOfMeasurement,
+)
+
+_maps = {}   # modelo → (versión, {id: instancia})
+_lock = threading.Lock()
+
+
+def catalog_map(model, version=None):
+    """{id: instancia} vigente del catálogo `model`."""
+    version = catalog_version() if version is None else version
+    entry = _maps.get(model)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+    with _lock:
+        entry = _maps.get(model)
+        if entry is None or entry[0] != version:
+            entry = _maps[model] = (version, {obj.pk: obj for obj in model.objects.all()})
+        return entry[1]
+
+
+class _CatalogMaps(dict):
+    """modelo → mapa, cargado al primer uso con la versión leída al crearlo."""
+
+    def __init__(self, version):
+        super().__init__()
+        self.version = version
+
+    def __missing__(self, model):
+        value = self[model] = catalog_map(model, self.version)
+        return value
+
+
+def catalog_maps():
+    """Mapas de catálogos con UNA lectura de versión (para recorrer muchas filas)."""
+    return _CatalogMaps(catalog_version())
+
+
+def catalog_get(model, pk):
+    if pk is None:
+        return None
+    return catalog_map(model).get(pk)
+
+
+def invalidate_catalog(model=None):
+    """Descarta el mapa local de `model` (o todos)."""
+    with _lock:
+        if model is None:
+            _maps.clear()
+        else:
+            _maps.pop(model, None)
+
+
+@lru_cache(maxsize=None)
+def _catalog_fks(model):
+    return tuple(
+        f for f in model._meta.concrete_fields
+        if isinstance(f, ForeignKey) and f.related_model in CACHED_CATALOGS
+    )
+
+
+def attach_catalogs(obj, maps=None):
+    """
+    Pone en `obj` los FKs a catálogos que no vengan ya cargados, desde el caché:
+    obj.project, obj.tender, ... dejan de consultar la base de datos. Devuelve obj.
+    """
+    if obj is None:
+        return obj
+    if maps is None:
+        maps = catalog_maps()
+    for field in _catalog_fks(type(obj)):
+        if field.is_cached(obj):
+            continue
+        related = maps[field.related_model].get(getattr(obj, field.attname))
+        if related is not None:
+            field.set_cached_value(obj, related)
+    return obj
+
+
+class _CatalogModelIterable(ModelIterable):
+    def __iter__(self):
+        maps = catalog_maps()
+        for obj in super().__iter__():
+            yield attach_catalogs(obj, maps)
+
+
+def with_catalogs(queryset):
+    """
+    QuerySet cuyas instancias salen con los FKs a catálogos ya puestos desde el caché
+    (sobrevive a filter/order_by/slicing y sirve en Prefetch; values() lo reemplaza).
+    """
+    clone = queryset.all()
+    clone._iterable_class = _CatalogModelIterable
+    return clone
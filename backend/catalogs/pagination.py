@@ -0,0 +1,85 @@
+# backend/catalogs/pagination.py
+"""
+Listados grandes de catálogos (productos y descripciones de artículo).
+
+- CatalogCursorPagination: paginación por cursor (?cursor=...&page_size=N).
+  No usa COUNT ni OFFSET: cada página es "WHERE orden > último ORDER BY ... LIMIT",
+  igual de barata en la página 1 que en la 500. Siempre termina en id para que
+  el orden sea único aunque ?ordering= pida un campo con valores repetidos.
+
+      {"next": "<url>|null", "previous": "<url>|null", "results": [{...}, ...]}
+
+- ?compact=1 (CompactListMixin): mismas páginas, pero filas como arreglos y sin
+  campos de auditoría (created_by, created_by_email, created_at), con las
+  columnas una sola vez, igual que el bundle (bundle.py):
+
+      {"next": ..., "previous": ..., "fields": ["id", "text", ...], "rows": [[1, "..."], ...]}
+"""
+from django.db import models
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+CATALOG_PAGE_SIZE = 100
+CATALOG_MAX_PAGE_SIZE = 1000
+
+_TRUE_VALUES = ("1", "true", "yes", "si", "sí")
+
+
+def compact_requested(request):
+    return str(request.query_params.get("compact", "")).strip().lower() in _TRUE_VALUES
+
+
+class CatalogCursorPagination(CursorPagination):
+    page_size = CATALOG_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = CATALOG_MAX_PAGE_SIZE
+    ordering = ("id",)
+
+    def get_ordering(self, request, queryset, view):
+        # ?ordering= (OrderingFilter) puede pedir un campo repetido ("text"): sin un
+        # desempate único el ORDER BY no es estable y el cursor salta o repite filas.
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(f.lstrip("-") in ("id", "pk") for f in ordering):
+            ordering += ("-id" if ordering[0].startswith("-") else "id",)
+        return ordering
+
+    def get_paginated_response(self, data):
+        if isinstance(data, dict):
+            # compacto: {"fields", "rows"}
+            return Response({"next": self.get_next_link(), "previous": self.get_previous_link(), **data})
+        return super().get_paginated_response(data)
+
+
+def _column(model, name):
+    """(atributo en la instancia, conversión a JSON) de una columna compacta."""
+    field = model._meta.get_field(name)
+    if isinstance(field, models.DecimalField):
+        places = field.decimal_places
+        # mismo texto que el serializer ("12.50"), no float
+        return field.attname, lambda v: None if v is None else f"{v:.{places}f}"
+    return field.attname, lambda v: v
+
+
+class CompactListMixin:
+    """
+    list() con ?compact=1: solo `compact_fields` (FKs como id), sin pasar por
+    el serializer ni cargar relaciones. Requiere pagination_class por cursor.
+    """
+    compact_fields = ()
+
+    def list(self, request, *args, **kwargs):
+        if not compact_requested(request):
+            return super().list(request, *args, **kwargs)
+
+        model = self.get_queryset().model
+        columns = [_column(model, name) for name in self.compact_fields]
+
+        queryset = self.filter_queryset(self.get_queryset()).select_related(None)
+        page = self.paginate_queryset(queryset)
+        objs = queryset if page is None else page
+
+        rows = [[convert(getattr(obj, attname)) for attname, convert in columns] for obj in objs]
+        data = {"fields": list(self.compact_fields), "rows": rows}
+        if page is None:
+            return Response(data)
+        return self.get_paginated_response(data)
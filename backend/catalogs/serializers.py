@@ -1,9 +1,54 @@
+from functools import partial
+
+from django.db import transaction
 from rest_framework import serializers
 from requisitions.models import (
     Department, Project, FundingSource, BudgetUnit,
     Agreement, Tender, ExternalService,
     UnitOfMeasurement, Product, ItemDescription
 )
+from .cache import CACHED_CATALOGS, catalog_get, invalidate_catalog
+
+
+# =============================================================================
+# ✅ FKs a catálogos resueltos desde el caché en proceso (ver cache.py)
+# =============================================================================
+
+class CatalogPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField que valida contra el caché de catálogos (sin consulta por FK).
+    Solo si el id no está en el mapa se consulta la BD; si ahí existe, el mapa se recarga al confirmar.
+    """
+
+    def to_internal_value(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        queryset = self.get_queryset()
+        obj = catalog_get(queryset.model, pk)
+        if obj is None:
+            # fuera del mapa local: fila de otro worker que aún no avisa (bus apagado o
+            # desconectado) o creada en esta misma transacción → se confirma en la BD
+            obj = queryset.filter(pk=pk).first()
+            if obj is None:
+                self.fail('does_not_exist', pk_value=data)
+            transaction.on_commit(partial(invalidate_catalog, queryset.model))
+        return obj
+
+
+class CatalogRelatedFieldsMixin:
+    """ModelSerializer: los FKs a CACHED_CATALOGS usan CatalogPrimaryKeyRelatedField."""
+
+    def build_relational_field(self, field_name, relation_info):
+        field_class, field_kwargs = super().build_relational_field(field_name, relation_info)
+        if field_class is self.serializer_related_field and relation_info.related_model in CACHED_CATALOGS:
+            field_class = CatalogPrimaryKeyRelatedField
+        return field_class, field_kwargs
 
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -0,0 +1,35 @@
+# backend/catalogs/signals.py
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from core.invalidation import subscribe
+from .bundle import BUNDLE_MODELS, bump_catalog_version, on_remote_invalidation
+from .cache import invalidate_catalog
+
+
+# =============================================================================
+# ✅ Catálogos: cualquier alta / cambio / baja, al confirmar, cambia la versión (ETag
+#    del bundle y caché en proceso de los demás workers) y descarta el mapa local
+# =============================================================================
+
+def _on_catalog_change(sender, instance, **kwargs):
+    # todo al confirmar: si el mapa se descartara ya, la siguiente lectura de este
+    # proceso lo recargaría con filas sin confirmar (o revertidas) bajo la versión vieja
+    transaction.on_commit(partial(invalidate_catalog, sender))
+    bump_catalog_version(sender._meta.label)
+
+
+def _on_remote_catalog_change(key):
+    # aviso de otro worker (core.invalidation); key=None → todos los catálogos
+    invalidate_catalog(apps.get_model(key) if key else None)
+    on_remote_invalidation(key)
+
+
+for _model in BUNDLE_MODELS:
+    post_save.connect(_on_catalog_change, sender=_model, dispatch_uid=f"catalog-bundle-save-{_model.__name__}")
+    post_delete.connect(_on_catalog_change, sender=_model, dispatch_uid=f"catalog-bundle-delete-{_model.__name__}")
+
+subscribe("catalogs", _on_remote_catalog_change)
@@ -1,3 +1,163 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from catalogs.views import ItemDescriptionCursorPagination, ItemDescriptionViewSet
+from requisitions.models import Department, ItemDescription, Product, Tender
+
+
+class CatalogAPITestCase(TestCase):
+    """Base: caché limpio y un usuario autenticado."""
+
+    def setUp(self):
+        cache.clear()
+        user = get_user_model().objects.create_user(
+            employee_number="1000", first_name="Ana", last_name="López",
+            extension_number="1234", email="ana@uach.mx", password="x",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+
+class CatalogBundleTests(CatalogAPITestCase):
+    def test_bundle_etag_changes_only_on_catalog_write(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Department.objects.create(code="D1", name="Sistemas")
+
+        first = self.client.get("/api/catalogs/bundle/")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["departments"], {"fields": ["id", "code", "name"],
+                                                       "rows": [[Department.objects.get().id, "D1", "Sistemas"]]})
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            again = self.client.get("/api/catalogs/bundle/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Tender.objects.create(name="Licitación")
+
+        after = self.client.get("/api/catalogs/bundle/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], etag)
+        self.assertEqual(after.json()["tenders"]["rows"][0][1], "Licitación")
+
+
+class CatalogCacheTests(CatalogAPITestCase):
+    def test_catalog_cache_resolves_fks_without_queries(self):
+        from rest_framework.exceptions import ValidationError
+
+        from catalogs.cache import catalog_get
+        from requisitions.serializers import RequisitionSerializer
+
+        dept = Department.objects.create(code="D1", name="Sistemas")
+        field = RequisitionSerializer().fields["requesting_department"]
+        self.assertEqual(field.to_internal_value(dept.pk), dept)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(field.to_internal_value(str(dept.pk)).name, "Sistemas")
+        with self.assertNumQueries(1), self.assertRaises(ValidationError):
+            field.to_internal_value(dept.pk + 1)  # no está en el mapa ni en la BD
+
+        dept.name = "Sistemas Computacionales"
+        with self.captureOnCommitCallbacks(execute=True):
+            dept.save()
+        self.assertEqual(catalog_get(Department, dept.pk).name, "Sistemas Computacionales")
+
+        # cambio revertido: leer dentro de la transacción no deja la fila sin confirmar en el caché
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            dept.name = "Revertido"
+            dept.save()
+            self.assertEqual(catalog_get(Department, dept.pk).name, "Sistemas Computacionales")
+            raise RuntimeError
+        self.assertEqual(catalog_get(Department, dept.pk).name, "Sistemas Computacionales")
+
+
+    def test_rows_missing_from_the_local_map_fall_back_to_the_database(self):
+        from catalogs.cache import catalog_get
+        from requisitions.serializers import RequisitionSerializer
+
+        field = RequisitionSerializer().fields["requesting_department"]
+        Department.objects.create(code="D1", name="Sistemas")
+        catalog_get(Department, 0)  # mapa local cargado
+
+        # alta de otro worker sin aviso (bulk_create no dispara señales)
+        other = Department.objects.bulk_create([Department(code="D2", name="Obras")])[0]
+        self.assertIsNone(catalog_get(Department, other.pk))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(field.to_internal_value(other.pk).name, "Obras")
+        self.assertEqual(catalog_get(Department, other.pk).name, "Obras")
+
+        # alta en la misma transacción, antes de confirmar
+        with transaction.atomic():
+            new = Department.objects.create(code="D3", name="Compras")
+            self.assertEqual(field.to_internal_value(new.pk), new)
+
+
+class ItemDescriptionAutocompleteTests(CatalogAPITestCase):
+    def test_item_description_autocomplete_prefix_first_without_accents(self):
+        papeleria = Product.objects.create(description="Papelería")
+        cafeteria = Product.objects.create(description="Cafetería")
+        for product, text in [(papeleria, "Papel café reciclado"), (papeleria, "Café molido"),
+                              (papeleria, "Descafeinado"), (cafeteria, "Café en grano")]:
+            ItemDescription.objects.create(product=product, text=text, estimated_unit_cost="10.00")
+
+        res = self.client.get("/api/catalogs/item-descriptions/autocomplete/", {"q": "CAFE"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([r["text"] for r in res.json()],
+                         ["Café en grano", "Café molido", "Papel café reciclado", "Descafeinado"])
+        self.assertEqual(set(res.json()[0]), {"id", "text", "estimated_unit_cost"})
+
+        res = self.client.get("/api/catalogs/descriptions/autocomplete/",
+                              {"q": "cafe", "product": papeleria.id, "limit": 1})
+        self.assertEqual([r["text"] for r in res.json()], ["Café molido"])
+
+        self.assertEqual(self.client.get("/api/catalogs/item-descriptions/autocomplete/",
+                                         {"q": "cafe", "limit": 500}).status_code, 400)
+
+
+class CatalogPaginationTests(CatalogAPITestCase):
+    def test_item_descriptions_cursor_pages_and_compact_rows(self):
+        product = Product.objects.create(description="Limpieza")
+        for i in range(5):
+            ItemDescription.objects.create(product=product, text=f"Artículo {i}", estimated_unit_cost="2.5")
+
+        res = self.client.get("/api/catalogs/item-descriptions/", {"page_size": 2})
+        self.assertEqual([r["text"] for r in res.json()["results"]], ["Artículo 0", "Artículo 1"])
+        self.assertIn("created_by_email", res.json()["results"][0])
+
+        texts, url, params = [], "/api/item-descriptions/", {"compact": 1, "page_size": 2}
+        while url:
+            body = self.client.get(url, params).json()
+            self.assertEqual(body["fields"], ["id", "product", "text", "estimated_unit_cost"])
+            texts += [row[2] for row in body["rows"]]
+            url, params = body["next"], None
+        self.assertEqual(texts, [f"Artículo {i}" for i in range(5)])
+        self.assertEqual(body["rows"][0][1:], [product.id, "Artículo 4", "2.50"])
+
+        res = self.client.get("/api/catalogs/descriptions/", {"compact": 1, "product": product.id})
+        self.assertEqual(len(res.json()["rows"]), 5)
+
+    def test_ordering_on_duplicate_values_pages_every_row_once(self):
+        texts = ["Tornillo", "Clavo", "Tornillo", "Tornillo", "Clavo", "Tornillo", "Clavo"]
+        ids = [
+            ItemDescription.objects.create(product=Product.objects.create(description=f"Ferretería {i}"), text=t).id
+            for i, t in enumerate(texts)
+        ]
+
+        view = ItemDescriptionViewSet()
+        for ordering, expected in (("text", ("text", "id")), ("-text", ("-text", "-id")), ("-id,text", ("-id", "text"))):
+            request = Request(RequestFactory().get("/", {"ordering": ordering}))
+            self.assertEqual(ItemDescriptionCursorPagination().get_ordering(request, ItemDescription.objects.all(), view), expected)
+
+        for ordering in ("text", "-text", "-created_at"):
+            seen, url, params = [], "/api/catalogs/item-descriptions/", {"ordering": ordering, "page_size": 2}
+            while url:
+                body = self.client.get(url, params).json()
+                seen += [r["id"] for r in body["results"]]
+                url, params = body["next"], None
+            self.assertEqual(len(seen), len(ids), ordering)
+            self.assertEqual(sorted(seen), sorted(ids), ordering)
@@ -4,7 +4,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     DepartmentViewSet, ProjectViewSet, FundingSourceViewSet, BudgetUnitViewSet,
     AgreementViewSet, TenderViewSet, ExternalServiceViewSet,
-    UnitOfMeasurementViewSet, ProductViewSet, ItemDescriptionViewSet
+    UnitOfMeasurementViewSet, ProductViewSet, ItemDescriptionViewSet,
+    CatalogBundleView,
 )
 
 router = DefaultRouter()
@@ -25,5 +26,7 @@ router.register("item-descriptions", ItemDescriptionViewSet, basename="item-desc
 router.register("descriptions", ItemDescriptionViewSet, basename="descriptions")
 
 urlpatterns = [
+    # ✅ Todos los catálogos del formulario en una sola respuesta (ETag / 304)
+    path("bundle/", CatalogBundleView.as_view(), name="catalog-bundle"),
     path("", include(router.urls)),
 ]
\ No newline at end of file
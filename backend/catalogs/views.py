@@ -1,5 +1,8 @@
 # backend/catalogs/views.py
 from rest_framework import viewsets, permissions, filters
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
 from requisitions.models import (
@@ -7,6 +10,9 @@ from requisitions.models import (
     Agreement, Tender, ExternalService,
     UnitOfMeasurement, Product, ItemDescription
 )
+from .autocomplete import AUTOCOMPLETE_DEFAULT_LIMIT, AUTOCOMPLETE_MAX_LIMIT, autocomplete_descriptions
+from .bundle import bundle_response
+from .pagination import CatalogCursorPagination, CompactListMixin
 from .serializers import (
     DepartmentSerializer, ProjectSerializer, FundingSourceSerializer, BudgetUnitSerializer,
     AgreementSerializer, TenderSerializer, ExternalServiceSerializer,
@@ -57,12 +63,24 @@ class UnitOfMeasurementViewSet(viewsets.ModelViewSet):
     serializer_class = UnitOfMeasurementSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductCursorPagination(CatalogCursorPagination):
+    ordering = ("description", "id")
+
+
+class ItemDescriptionCursorPagination(CatalogCursorPagination):
+    ordering = ("text", "id")
+
+
+class ProductViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = Product.objects.all().order_by("description")
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class ItemDescriptionViewSet(viewsets.ModelViewSet):
+    # ✅ por cursor; ?compact=1 → {fields, rows} (ver pagination.py)
+    pagination_class = ProductCursorPagination
+    compact_fields = ("id", "description")
+
+class ItemDescriptionViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = (
         ItemDescription.objects
         .select_related("product", "created_by")
@@ -72,10 +90,53 @@ class ItemDescriptionViewSet(viewsets.ModelViewSet):
     serializer_class = ItemDescriptionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
+    # ✅ por cursor; ?compact=1 → {fields, rows} sin auditoría (ver pagination.py)
+    pagination_class = ItemDescriptionCursorPagination
+    compact_fields = ("id", "product", "text", "estimated_unit_cost")
+
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ["product"]
     search_fields = ["text"]
     ordering_fields = ["text", "id", "created_at"]
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
\ No newline at end of file
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=False, methods=["get"], url_path="autocomplete")
+    def autocomplete(self, request):
+        """
+        GET /api/catalogs/item-descriptions/autocomplete/?q=&product=&limit=10
+        Solo id, text y estimated_unit_cost; prefijos primero, sin acentos (ver autocomplete.py).
+        """
+        params = request.query_params
+        errors = {}
+
+        product = params.get("product") or None
+        if product is not None:
+            try:
+                product = int(product)
+            except (TypeError, ValueError):
+                errors["product"] = "Debe ser un id numérico."
+
+        try:
+            limit = int(params.get("limit") or AUTOCOMPLETE_DEFAULT_LIMIT)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= AUTOCOMPLETE_MAX_LIMIT:
+            errors["limit"] = f"Usa un entero entre 1 y {AUTOCOMPLETE_MAX_LIMIT}."
+
+        if errors:
+            return Response(errors, status=400)
+        return Response(autocomplete_descriptions(params.get("q", ""), product=product, limit=limit))
+
+
+class CatalogBundleView(APIView):
+    """
+    GET /api/catalogs/bundle/
+    Todos los catálogos chicos del formulario de requisición en una respuesta
+    compacta, con ETag por versión de catálogos (ver bundle.py).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return bundle_response(request)
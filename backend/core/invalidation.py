@@ -0,0 +1,207 @@
+# backend/core/invalidation.py
+"""
+Bus de invalidación entre workers sobre PostgreSQL LISTEN/NOTIFY.
+
+Los cachés por proceso (mapas de catálogos, versión de reportes / bundle en
+LocMemCache) quedan viejos en los demás workers de gunicorn cuando uno escribe.
+Sin Redis compartido, el aviso viaja por la misma base de datos:
+
+    publish("catalogs", "requisitions.Department")   # quien escribe
+    subscribe("catalogs", handler)                    # handler(key) en cada worker
+
+- publish() hace pg_notify dentro de la transacción en curso: PostgreSQL solo
+  lo entrega al confirmar (y lo descarta si se revierte). Corre en un savepoint:
+  si falla, la transacción de quien escribe sigue viva. El propio proceso no
+  se procesa a sí mismo: quien escribe ya invalida en local.
+- Cada worker abre UNA conexión aparte (hilo daemon, LISTEN) la primera vez que
+  lee un caché (ensure_listener(); se vuelve a abrir después de un fork). Si
+  la conexión se cae se reconecta con espera exponencial; al conectar y al
+  desconectar se llama a cada handler con key=None (se pudieron perder avisos).
+- TTL de respaldo: version_ttl() es None (sin caducidad) con el listener
+  conectado y CACHE_INVALIDATION_FALLBACK_TTL segundos si no lo está (otro
+  motor de BD, bus deshabilitado o desconectado), así lo viejo queda acotado.
+  bump_version() le vuelve a poner ese timeout a la llave en cada incremento
+  (incluido el de la desconexión): cache.incr conserva el de su creación.
+
+Settings: CACHE_INVALIDATION_BUS (on/off), CACHE_INVALIDATION_CHANNEL,
+CACHE_INVALIDATION_FALLBACK_TTL.
+"""
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections, transaction
+
+logger = logging.getLogger(__name__)
+
+POLL_SECONDS = 30          # sin avisos: SELECT 1 para detectar conexiones muertas
+MAX_BACKOFF_SECONDS = 60
+
+_handlers = defaultdict(list)
+_origin = None
+_state_lock = threading.Lock()
+_listener = None           # (pid, thread)
+_connected = threading.Event()
+_stop = threading.Event()
+
+
+def _enabled():
+    return bool(getattr(settings, "CACHE_INVALIDATION_BUS", True)) and connection.vendor == "postgresql"
+
+
+def _channel():
+    return getattr(settings, "CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+
+
+def fallback_ttl():
+    return int(getattr(settings, "CACHE_INVALIDATION_FALLBACK_TTL", 300))
+
+
+def _process_origin():
+    # distinto en cada worker (y tras fork): host + pid
+    global _origin
+    pid = os.getpid()
+    if _origin is None or _origin[0] != pid:
+        _origin = (pid, f"{socket.gethostname()}:{pid}")
+    return _origin[1]
+
+
+# ---------- suscripción / publicación ----------
+def subscribe(entity, handler):
+    """handler(key): key es lo publicado, o None = invalidar todo lo de `entity`."""
+    if handler not in _handlers[entity]:
+        _handlers[entity].append(handler)
+
+
+def publish(entity, key=""):
+    """Avisa a los demás workers (al confirmar la transacción en curso)."""
+    if not _enabled():
+        return
+    payload = json.dumps({"e": entity, "k": str(key or ""), "o": _process_origin()})
+    try:
+        # savepoint: un error aquí no deja abortada la transacción de quien escribe
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [_channel(), payload])
+    except Exception:
+        # el aviso nunca debe tumbar la escritura; el TTL de respaldo acota lo viejo
+        logger.warning("No se pudo publicar invalidación %s:%s", entity, key, exc_info=True)
+
+
+def _dispatch(entity, key):
+    for handler in list(_handlers.get(entity, ())):
+        try:
+            handler(key)
+        except Exception:
+            logger.exception("Handler de invalidación falló (%s:%s)", entity, key)
+
+
+def _dispatch_payload(payload):
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        logger.warning("Aviso de invalidación ilegible: %r", payload)
+        return
+    if data.get("o") == _process_origin():
+        return
+    _dispatch(data.get("e"), data.get("k") or None)
+
+
+def _flush_all():
+    for entity in list(_handlers):
+        _dispatch(entity, None)
+
+
+# ---------- TTL de respaldo ----------
+def version_ttl():
+    """Timeout para llaves de versión en caché: None si el bus está escuchando."""
+    ensure_listener()
+    return None if _connected.is_set() else fallback_ttl()
+
+
+def bump_version(cache_key):
+    """
+    Incrementa una llave de versión con el timeout de AHORA (version_ttl()).
+    Una llave creada con el listener conectado no caduca, y cache.incr conserva
+    ese timeout: sin volver a ponerlo, tras una desconexión nunca aplicaría el TTL de respaldo.
+    """
+    ttl = version_ttl()
+    try:
+        cache.incr(cache_key)
+        cache.touch(cache_key, ttl)
+    except ValueError:
+        cache.set(cache_key, time.time_ns(), ttl)
+
+
+# ---------- listener ----------
+def ensure_listener():
+    """Arranca el hilo LISTEN de este proceso si hace falta (barato: compara el pid)."""
+    global _listener
+    pid = os.getpid()
+    if _listener is not None and _listener[0] == pid:
+        return
+    if not _enabled():
+        return
+    with _state_lock:
+        if _listener is not None and _listener[0] == pid:
+            return
+        _connected.clear()   # tras fork el estado del padre no aplica
+        _stop.clear()
+        thread = threading.Thread(target=_listen_forever, name="cache-invalidation", daemon=True)
+        _listener = (pid, thread)
+        thread.start()
+
+
+def stop_listener():
+    _stop.set()
+
+
+def _connect():
+    import psycopg2
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+    params = connections["default"].get_connection_params()
+    conn = psycopg2.connect(**params)
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(f'LISTEN "{_channel()}"')
+    return conn
+
+
+def _listen_forever():
+    backoff = 1
+    while not _stop.is_set():
+        conn = None
+        try:
+            conn = _connect()
+            _connected.set()
+            _flush_all()
+            backoff = 1
+            logger.info("Bus de invalidación escuchando en %s", _channel())
+            while not _stop.is_set():
+                if select.select([conn], [], [], POLL_SECONDS) == ([], [], []):
+                    with conn.cursor() as cursor:
+                        cursor.execute("SELECT 1")
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _dispatch_payload(conn.notifies.pop(0).payload)
+        except Exception:
+            logger.warning("Bus de invalidación desconectado; reintento en %ss", backoff, exc_info=True)
+        finally:
+            if _connected.is_set():
+                _connected.clear()
+                _flush_all()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        _stop.wait(backoff)
+        backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
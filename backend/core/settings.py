@@ -66,6 +66,7 @@ INSTALLED_APPS = [
     'users',
     'requisitions',
     'catalogs',
+    'reports',
 ]
 
 MIDDLEWARE = [
@@ -112,6 +113,9 @@ USE_TZ = True
 # Static files
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / "staticfiles"
+# Fuentes de estáticos: el logo de los PDFs es el mismo archivo que usa el frontend
+FRONTEND_IMAGES_DIR = BASE_DIR.parent / "frontend" / "public" / "images"
+STATICFILES_DIRS = [FRONTEND_IMAGES_DIR] if FRONTEND_IMAGES_DIR.is_dir() else []
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -122,6 +126,31 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 60 * 1024 * 1024
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ✅ Caché (respuestas de reportes). Con varios workers usar un backend compartido,
+# p. ej. CACHE_BACKEND=django.core.cache.backends.redis.RedisCache y CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.getenv("CACHE_LOCATION", "sistema-adquisiciones"),
+    }
+}
+# Bus de invalidación entre workers (LISTEN/NOTIFY, ver core/invalidation.py).
+# Sin bus conectado, las versiones de caché caducan a los FALLBACK_TTL segundos.
+CACHE_INVALIDATION_BUS = os.getenv("CACHE_INVALIDATION_BUS", "True") == "True"
+CACHE_INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+CACHE_INVALIDATION_FALLBACK_TTL = int(os.getenv("CACHE_INVALIDATION_FALLBACK_TTL", "300"))
+REPORTS_CACHE_TIMEOUT = int(os.getenv("REPORTS_CACHE_TIMEOUT", "300"))
+# PNG de gráficas en disco (LRU por último uso)
+REPORTS_CHART_CACHE_DIR = os.getenv("REPORTS_CHART_CACHE_DIR")  # vacío → MEDIA_ROOT/cache/charts
+REPORTS_CHART_CACHE_MAX_BYTES = int(os.getenv("REPORTS_CHART_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Gráficas de reportes: "vector" (reportlab.graphics) o "png" (matplotlib); ?charts= lo cambia por reporte
+REPORTS_CHART_BACKEND = os.getenv("REPORTS_CHART_BACKEND", "vector")
+# Procesos para dibujar gráficas en paralelo (< 2 = en línea)
+REPORTS_CHART_WORKERS = int(os.getenv("REPORTS_CHART_WORKERS", str(min(3, os.cpu_count() or 1))))
+# Reporte detallado: procesos para dibujar secciones por departamento (< 2 = secuencial).
+# Apagado por omisión: activarlo solo tras medir con bench_report_pdf --parallel (ver reports/parallel.py)
+REPORTS_PDF_WORKERS = int(os.getenv("REPORTS_PDF_WORKERS", "0"))
+
 # DRF
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -266,5 +295,11 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': False,
         },
+        # tiempos por gráfica (hit/miss en caché)
+        'reports.charts': {
+            'handlers': ['file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
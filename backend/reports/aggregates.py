@@ -0,0 +1,105 @@
+# backend/reports/aggregates.py
+"""
+Series agregadas de los reportes (por departamento / por mes y departamento).
+
+Se leen de RequisitionMonthlyRollup: el costo ya no depende del número de
+requisiciones sino del número de buckets (meses × departamentos × estatus).
+Si el rango de fechas corta un mes a la mitad, SOLO ese mes parcial se cuenta
+contra la tabla base (acotado por el índice de created_at).
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+from requisitions.models import Requisition, RequisitionMonthlyRollup
+from requisitions.rollup import next_month
+from .filters import apply_report_filters
+
+
+def department_totals():
+    """[{'requesting_department': nombre, 'total': n}, ...] ordenado por nombre."""
+    data = (
+        RequisitionMonthlyRollup.objects
+        .values("department__name")
+        .annotate(total=Sum("count"))
+        .order_by("department__name")
+    )
+    return [{
+        "requesting_department": row["department__name"] or "—",
+        "total": row["total"],
+    } for row in data]
+
+
+def _last_day(month):
+    return next_month(month) - timedelta(days=1)
+
+
+def _split_range(start_date, end_date):
+    """
+    Parte [start_date, end_date] en:
+      - meses completos → (primer_mes, último_mes) para el rollup (None = sin límite),
+        o None si no cae ningún mes completo;
+      - sub-rangos parciales [(desde, hasta), ...] a contar en la tabla base.
+    """
+    first = last = None
+    if start_date:
+        first = start_date.replace(day=1)
+        if start_date.day != 1:
+            first = next_month(first)
+    if end_date:
+        last = end_date.replace(day=1)
+        if end_date != _last_day(last):
+            last = (last - timedelta(days=1)).replace(day=1)
+
+    if first and last and first > last:
+        # ningún mes completo dentro del rango
+        if start_date.replace(day=1) == end_date.replace(day=1):
+            return None, [(start_date, end_date)]
+        return None, [(start_date, _last_day(start_date.replace(day=1))), (end_date.replace(day=1), end_date)]
+
+    partial = []
+    if start_date and start_date.day != 1:
+        partial.append((start_date, first - timedelta(days=1)))
+    if end_date and end_date != _last_day(end_date.replace(day=1)):
+        partial.append((end_date.replace(day=1), end_date))
+    return (first, last), partial
+
+
+def month_department_totals(start_date=None, end_date=None):
+    """
+    [{'month': 'YYYY-MM', 'requesting_department': nombre, 'total': n}, ...]
+    ordenado por mes y nombre. start_date / end_date son date (inclusive).
+    """
+    months, partial = _split_range(start_date, end_date)
+    totals = {}
+
+    if months is not None:
+        first, last = months
+        rollup = RequisitionMonthlyRollup.objects.all()
+        if first:
+            rollup = rollup.filter(month__gte=first)
+        if last:
+            rollup = rollup.filter(month__lte=last)
+        for row in rollup.values("month", "department__name").annotate(total=Sum("count")).order_by():
+            key = (row["month"], row["department__name"])
+            totals[key] = totals.get(key, 0) + row["total"]
+
+    for since, until in partial:
+        base = apply_report_filters(Requisition.objects.all(), {"start_date": since, "end_date": until})
+        data = (
+            base.order_by()
+            .annotate(month=TruncMonth("created_at"))
+            .values("month", "requesting_department__name")
+            .annotate(total=Count("id"))
+        )
+        for row in data:
+            month = row["month"].date() if hasattr(row["month"], "date") else row["month"]
+            key = (month, row["requesting_department__name"])
+            totals[key] = totals.get(key, 0) + row["total"]
+
+    return [{
+        "month": month.strftime("%Y-%m"),
+        "requesting_department": name or "—",
+        "total": total,
+    } for (month, name), total in sorted(totals.items(), key=lambda kv: (kv[0][0], kv[0][1] or ""))]
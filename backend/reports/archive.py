@@ -0,0 +1,149 @@
+# backend/reports/archive.py
+"""
+Archivo de reportes PDF de meses cerrados (ReportArchive).
+
+`manage.py build_report_archive` (cron nocturno) genera el resumen y el detallado
+de cada mes cerrado. summary-pdf y requisitions-report sirven el archivo cuando
+la petición es exactamente un mes cerrado completo:
+    ?start_date=YYYY-MM-01&end_date=<último día del mes>   (sin otros filtros)
+con el backend de gráficas del archivo. El mes en curso y cualquier otro rango
+se generan en vivo.
+
+Vigencia: source_stamp es la huella del rollup del mes (buckets, conteo y último
+updated_at) más la de las etiquetas que imprimen los PDFs (departamentos,
+proyectos y nombres de usuario de las requisiciones del mes). Toda escritura de
+requisiciones/partidas recalcula su bucket y renombrar un catálogo o usuario
+cambia las etiquetas, así que un cambio tardío en un mes cerrado invalida el
+archivo y el reporte vuelve a generarse en vivo hasta la siguiente corrida del
+comando.
+"""
+import hashlib
+import time
+from calendar import monthrange
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db.models import Count, Max, Sum
+from django.http import FileResponse
+from django.utils import timezone
+
+from requisitions.models import ReportArchive, Requisition, RequisitionMonthlyRollup
+from requisitions.rollup import month_of
+from .filters import apply_report_filters, describe_report_filters
+
+ARCHIVE_KINDS = ("summary", "detailed")
+
+
+def current_month():
+    return month_of(timezone.now())
+
+
+def month_filters(month):
+    return {"start_date": month, "end_date": month.replace(day=monthrange(month.year, month.month)[1])}
+
+
+def archived_month(filters):
+    """Mes cerrado que cubren exactamente `filters` (y nada más), o None."""
+    start = filters.get("start_date")
+    if not start or set(filters) != {"start_date", "end_date"}:
+        return None
+    if start.day != 1 or filters != month_filters(start) or start >= current_month():
+        return None
+    return start
+
+
+# Catálogos / usuarios que se imprimen en los PDFs archivados (no tienen updated_at)
+_LABEL_VALUES = (
+    "requesting_department__code", "requesting_department__name",
+    "project__code", "project__description",
+    "user__first_name", "user__last_name",
+)
+
+
+def _labels_digest(month):
+    """Huella de las etiquetas distintas que usan las requisiciones del mes."""
+    rows = (
+        apply_report_filters(Requisition.objects.all(), month_filters(month))
+        .order_by()
+        .values_list(*_LABEL_VALUES)
+        .distinct()
+    )
+    lines = sorted("\x1f".join("" if v is None else str(v) for v in row) for row in rows)
+    return hashlib.sha1("\x1e".join(lines).encode("utf-8")).hexdigest()[:12]
+
+
+def month_stamp(month):
+    agg = RequisitionMonthlyRollup.objects.filter(month=month).aggregate(
+        buckets=Count("id"), requisitions=Sum("count"), last=Max("updated_at"),
+    )
+    if not agg["buckets"]:
+        return ""
+    return f"{agg['requisitions']}:{agg['buckets']}:{agg['last']:%Y%m%d%H%M%S%f}:{_labels_digest(month)}"
+
+
+def closed_months():
+    """Meses cerrados con requisiciones (según el rollup), del más reciente al más antiguo."""
+    return list(
+        RequisitionMonthlyRollup.objects
+        .filter(month__lt=current_month())
+        .order_by("-month")
+        .values_list("month", flat=True)
+        .distinct()
+    )
+
+
+def _render(kind, filters, charts):
+    from .pdf_generator import generate_requisition_report_pdf, generate_summary_pdf
+
+    if kind == "summary":
+        return generate_summary_pdf(filters, charts=charts)
+    requisitions = apply_report_filters(Requisition.objects.all(), filters)
+    return generate_requisition_report_pdf(
+        requisitions, filters_desc=describe_report_filters(filters), charts=charts,
+    )
+
+
+def build_archive(kind, month, charts=None, force=False):
+    """
+    Genera (o regenera si cambió la huella) el PDF `kind` del mes cerrado `month`.
+    Devuelve (archive, built): built=False si el archivo vigente se reutilizó.
+    """
+    charts = charts or settings.REPORTS_CHART_BACKEND
+    stamp = month_stamp(month)  # antes de leer los datos: un cambio durante el render lo deja vencido
+    archive = ReportArchive.objects.filter(kind=kind, month=month).first()
+    if archive and not force and archive.source_stamp == stamp and archive.charts == charts and archive.file:
+        return archive, False
+
+    filters = month_filters(month)
+    t0 = time.perf_counter()
+    pdf = _render(kind, filters, charts).getvalue()
+    elapsed = time.perf_counter() - t0
+
+    archive = archive or ReportArchive(kind=kind, month=month)
+    if archive.file:
+        archive.file.delete(save=False)
+    archive.file.save(f"{month:%Y-%m}_{kind}.pdf", ContentFile(pdf), save=False)
+    archive.charts = charts
+    archive.size = len(pdf)
+    archive.requisition_count = apply_report_filters(Requisition.objects.all(), filters).count()
+    archive.source_stamp = stamp
+    archive.render_seconds = round(elapsed, 3)
+    archive.save()
+    return archive, True
+
+
+def archived_response(kind, filters, charts):
+    """FileResponse con el PDF archivado vigente, o None si hay que generarlo en vivo."""
+    month = archived_month(filters)
+    if month is None:
+        return None
+    archive = ReportArchive.objects.filter(kind=kind, month=month, charts=charts).first()
+    if archive is None or archive.source_stamp != month_stamp(month):
+        return None
+    try:
+        fh = archive.file.open("rb")
+    except (FileNotFoundError, ValueError):
+        return None
+    response = FileResponse(fh, content_type="application/pdf", filename=f"{kind}_{month:%Y-%m}.pdf")
+    response["X-Report-Archive"] = archive.generated_at.isoformat()
+    return response
@@ -0,0 +1,108 @@
+# backend/reports/cache.py
+"""
+Caché de respuestas de reportes (JSON ya serializado).
+
+Llave: endpoint + parámetros normalizados + versión de datos.
+La versión se incrementa (al confirmar la transacción) cada vez que se guarda
+o elimina una requisición —incluye cambios de estatus y cancelación—, así las
+entradas anteriores quedan huérfanas y expiran solas.
+
+La ETag sale de la misma llave: si el cliente manda If-None-Match vigente
+se responde 304 sin tocar la base de datos ni serializar.
+
+Nota: con LocMemCache cada proceso tiene su propia versión; el bus de
+invalidación (core.invalidation, LISTEN/NOTIFY de PostgreSQL) la incrementa
+en los demás workers. Sin bus, la versión caduca a los
+CACHE_INVALIDATION_FALLBACK_TTL segundos y REPORTS_CACHE_TIMEOUT acota lo
+viejo que puede estar un worker.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+
+from core.invalidation import bump_version, ensure_listener, publish, version_ttl
+
+REPORTS_CACHE_TIMEOUT = getattr(settings, "REPORTS_CACHE_TIMEOUT", 300)
+
+_VERSION_KEY = "reports:data-version"
+_CACHE_CONTROL = "private, max-age=0, must-revalidate"
+
+
+def data_version():
+    ensure_listener()
+    version = cache.get(_VERSION_KEY)
+    if version is None:
+        # valor nuevo (no 1): nunca reusa llaves de una versión anterior al reinicio del caché
+        cache.add(_VERSION_KEY, time.time_ns(), version_ttl())
+        version = cache.get(_VERSION_KEY)
+    return version
+
+
+def _bump_version():
+    bump_version(_VERSION_KEY)
+
+
+def invalidate_reports_cache():
+    """Invalida al confirmar la transacción en curso (o de inmediato si no hay) y avisa a los demás workers."""
+    transaction.on_commit(_bump_version)
+    publish("reports")
+
+
+def on_remote_invalidation(key):
+    """Handler del bus (core.invalidation): otro worker escribió requisiciones."""
+    _bump_version()
+
+
+def normalize_params(filters, keys=("start_date", "end_date")):
+    """Parámetros ya validados → texto estable (fechas en ISO, el orden no importa)."""
+    parts = []
+    for key in keys:
+        value = filters.get(key)
+        if value is None or value == "" or value == []:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ",".join(str(v) for v in sorted(value))
+        elif hasattr(value, "isoformat"):
+            value = value.isoformat()
+        parts.append(f"{key}={value}")
+    return "&".join(parts)
+
+
+def _etag(key):
+    return '"%s"' % hashlib.sha1(key.encode("utf-8")).hexdigest()[:24]
+
+
+def _if_none_match(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH", "")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def cached_json_response(request, endpoint, params, build):
+    """
+    Devuelve la respuesta JSON del reporte `endpoint` con `params` normalizados.
+    `build()` solo se ejecuta si no hay entrada vigente en caché.
+    """
+    key = f"reports:{endpoint}:{data_version()}:{params}"
+    etag = _etag(key)
+
+    if _if_none_match(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        body = cache.get(key)
+        if body is None:
+            body = json.dumps(build(), ensure_ascii=False, cls=DjangoJSONEncoder).encode("utf-8")
+            cache.set(key, body, REPORTS_CACHE_TIMEOUT)
+        response = HttpResponse(body, content_type="application/json")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = _CACHE_CONTROL
+    return response
@@ -1,23 +1,185 @@
 # backend/reports/charts.py
+"""
+Gráficas de reportes (PNG vía matplotlib) con caché en disco.
+
+Cada gráfica se identifica por hash(nombre, parámetros, filas, versión): dos
+dashboards con los mismos datos reutilizan el mismo PNG. El caché vive en
+REPORTS_CHART_CACHE_DIR y se poda por LRU (mtime = último uso) al superar
+REPORTS_CHART_CACHE_MAX_BYTES. Si dos requests piden la misma gráfica a la vez
+en el proceso, solo una la dibuja.
+
+Cada llamada registra en el logger `reports.charts`: nombre, hit/miss y ms.
+
+`render_charts()` dibuja las gráficas de un reporte A LA VEZ en un pool de
+procesos "caliente" (Agg + fuentes precargadas): la latencia del reporte queda
+acotada por la gráfica más lenta y no por la suma, y el rasterizado no retiene
+el GIL del proceso que atiende requests.
+
+Backends por reporte (`?charts=`): "vector" (reportlab.graphics, ver
+vector_charts.py; no importa matplotlib) o "png" (matplotlib, lo de arriba).
+"""
+import hashlib
 import io
-import matplotlib
-matplotlib.use("Agg")  # backend sin ventana
-import matplotlib.pyplot as plt
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import uuid
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
 
-def _fig_to_png_bytesio(fig, dpi=150):
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Subir si cambia el dibujo de alguna gráfica (invalida todo el caché)
+CHART_CACHE_VERSION = 1
+CHART_DPI = 150
+
+
+def _cache_dir():
+    return getattr(settings, "REPORTS_CHART_CACHE_DIR", None) or os.path.join(
+        settings.MEDIA_ROOT, "cache", "charts"
+    )
+
+
+def _cache_max_bytes():
+    return getattr(settings, "REPORTS_CHART_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+
+# ---------- caché ----------
+def chart_key(name, rows, params=None):
+    payload = json.dumps(
+        [CHART_CACHE_VERSION, name, params or {}, list(rows)],
+        sort_keys=True, default=str, ensure_ascii=False,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+_inflight_guard = threading.Lock()
+_inflight = {}
+
+
+def _key_lock(key):
+    with _inflight_guard:
+        lock = _inflight.get(key)
+        if lock is None:
+            lock = _inflight[key] = threading.Lock()
+        return lock
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        os.utime(path)  # marca de uso para el LRU
+        return data
+    except OSError:
+        return None
+
+
+def _write(directory, path, data):
+    os.makedirs(directory, exist_ok=True)
+    tmp = os.path.join(directory, f".{uuid.uuid4().hex}.tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+    os.replace(tmp, path)
+
+
+def evict_chart_cache(directory=None, max_bytes=None):
+    """Borra los PNG menos usados hasta quedar bajo el límite. Devuelve cuántos borró."""
+    directory = directory or _cache_dir()
+    max_bytes = _cache_max_bytes() if max_bytes is None else max_bytes
+    try:
+        entries = []
+        with os.scandir(directory) as it:
+            for e in it:
+                if e.is_file() and e.name.endswith(".png"):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+    except FileNotFoundError:
+        return 0
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def _lookup(name, rows, params):
+    key = chart_key(name, rows, params)
+    directory = _cache_dir()
+    path = os.path.join(directory, f"{key}.png")
+    return key, directory, path, _read(path)
+
+
+def _store(name, directory, path, data):
+    try:
+        _write(directory, path, data)
+        evict_chart_cache(directory)
+    except OSError:
+        logger.warning("No se pudo guardar la gráfica %s en caché", name, exc_info=True)
+
+
+def _log_timing(name, hit, t0, data):
+    logger.info("chart %s: %s en %.1f ms (%d B)",
+                name, "hit" if hit else "miss", (time.perf_counter() - t0) * 1000, len(data))
+
+
+def cached_chart(name, rows, render, params=None):
+    """
+    Devuelve BytesIO con el PNG de `render(rows)`; lo toma del disco si ya existe.
+    """
+    rows = list(rows)
+    t0 = time.perf_counter()
+    key, directory, path, data = _lookup(name, rows, params)
+
+    hit = True
+    if data is None:
+        with _key_lock(key):
+            data = _read(path)  # otro hilo pudo terminarla mientras esperábamos
+            if data is None:
+                hit = False
+                data = render(rows).getvalue()
+                _store(name, directory, path, data)
+        with _inflight_guard:
+            _inflight.pop(key, None)
+
+    _log_timing(name, hit, t0, data)
+    return io.BytesIO(data)
+
+
+# ---------- dibujo ----------
+def _pyplot():
+    """matplotlib se importa solo al dibujar un PNG (backend "png")."""
+    import matplotlib
+    matplotlib.use("Agg")  # backend sin ventana
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def _fig_to_png_bytesio(fig, dpi=CHART_DPI):
     buf = io.BytesIO()
     fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
-    plt.close(fig)
+    _pyplot().close(fig)
     buf.seek(0)
     return buf
 
-def chart_bar_by_department(rows):
-    """
-    rows: iterable de dicts con:
-      {'requesting_department': 'Nombre', 'total': int}
-    """
+
+def _render_bar_by_department(rows):
+    plt = _pyplot()
     labels = [r.get('requesting_department') or '—' for r in rows]
     values = [int(r.get('total') or 0) for r in rows]
 
@@ -31,12 +193,9 @@ def chart_bar_by_department(rows):
 
     return _fig_to_png_bytesio(fig)
 
-def chart_line_month_by_department(rows):
-    """
-    rows: iterable de dicts con:
-      {'month': 'YYYY-MM', 'requesting_department': 'Nombre', 'total': int}
-    Dibuja una serie por departamento a través de los meses.
-    """
+
+def _render_line_month_by_department(rows):
+    plt = _pyplot()
     # Normalizar → dict[dept][month] = total
     depts = set()
     months = set()
@@ -72,4 +231,180 @@ def chart_line_month_by_department(rows):
     ax.set_xticks(months_sorted)
     ax.set_xticklabels(months_sorted, rotation=20, fontsize=8)
 
-    return _fig_to_png_bytesio(fig)
\ No newline at end of file
+    return _fig_to_png_bytesio(fig)
+
+
+def _render_pie_by_status(status_rows):
+    plt = _pyplot()
+    labels = [r['name'] for r in status_rows]
+    values = [int(r['value'] or 0) for r in status_rows]
+    if sum(values) == 0:
+        labels = ['Sin datos']
+        values = [1]
+    fig, ax = plt.subplots(figsize=(6, 6))
+    ax.pie(values, labels=labels, autopct='%1.1f%%')
+    ax.set_title("Distribución por Estatus")
+    return _fig_to_png_bytesio(fig)
+
+
+# ---------- API pública ----------
+def chart_bar_by_department(rows):
+    """
+    rows: iterable de dicts con:
+      {'requesting_department': 'Nombre', 'total': int}
+    """
+    return cached_chart("bar_by_department", rows, _render_bar_by_department, {"dpi": CHART_DPI})
+
+
+def chart_line_month_by_department(rows):
+    """
+    rows: iterable de dicts con:
+      {'month': 'YYYY-MM', 'requesting_department': 'Nombre', 'total': int}
+    Dibuja una serie por departamento a través de los meses.
+    """
+    return cached_chart("line_month_by_department", rows, _render_line_month_by_department, {"dpi": CHART_DPI})
+
+
+def chart_pie_by_status(status_rows):
+    """
+    status_rows: lista de dicts [{'name': 'pending', 'value': 10}, ...]
+    """
+    return cached_chart("pie_by_status", status_rows, _render_pie_by_status, {"dpi": CHART_DPI})
+
+
+# =============================================================================
+# ✅ Render en paralelo (pool de procesos caliente)
+# =============================================================================
+
+CHARTS = {
+    "bar_by_department": _render_bar_by_department,
+    "line_month_by_department": _render_line_month_by_department,
+    "pie_by_status": _render_pie_by_status,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _chart_workers():
+    default = min(3, os.cpu_count() or 1)
+    return int(getattr(settings, "REPORTS_CHART_WORKERS", default) or 0)
+
+
+def _init_chart_worker():
+    # Proceso "spawn": precarga Agg, la lista de fuentes y el rasterizador
+    # para que la primera gráfica real no pague ese costo.
+    plt = _pyplot()
+    from matplotlib import font_manager
+    font_manager.fontManager.findfont("DejaVu Sans")
+    fig, ax = plt.subplots(figsize=(1, 1))
+    ax.set_title("á")
+    _fig_to_png_bytesio(fig, dpi=10)
+
+
+def _render_in_worker(chart_name, rows):
+    return CHARTS[chart_name](rows).getvalue()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_chart_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_chart_worker,
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def warm_chart_pool():
+    """Arranca los workers ahora (opcional; si no, se crean en el primer reporte)."""
+    if _chart_workers() < 2:
+        return
+    pool = _get_pool()
+    for f in [pool.submit(_render_in_worker, "pie_by_status", []) for _ in range(_chart_workers())]:
+        f.result()
+
+
+def render_charts(specs):
+    """
+    specs: [(chart_name, rows), ...] con chart_name en CHARTS.
+    Devuelve [BytesIO, ...] en el mismo orden. Los hits salen del caché en disco;
+    los misses se dibujan simultáneamente en el pool (o en línea si hay uno solo
+    o el pool está deshabilitado con REPORTS_CHART_WORKERS < 2).
+    """
+    t0 = time.perf_counter()
+    params = {"dpi": CHART_DPI}
+    results = [None] * len(specs)
+    misses = []
+
+    for i, (name, rows) in enumerate(specs):
+        rows = list(rows)
+        key, directory, path, data = _lookup(name, rows, params)
+        if data is not None:
+            _log_timing(name, True, t0, data)
+            results[i] = io.BytesIO(data)
+        else:
+            misses.append((i, name, rows, directory, path))
+
+    futures = {}
+    if len(misses) >= 2 and _chart_workers() >= 2:
+        try:
+            pool = _get_pool()
+            futures = {i: pool.submit(_render_in_worker, name, rows) for i, name, rows, _, _ in misses}
+        except (BrokenProcessPool, OSError, RuntimeError):
+            logger.warning("Pool de gráficas no disponible; se dibuja en línea", exc_info=True)
+            _reset_pool()
+            futures = {}
+
+    for i, name, rows, directory, path in misses:
+        data = None
+        if i in futures:
+            try:
+                data = futures[i].result()
+            except BrokenProcessPool:
+                logger.warning("Pool de gráficas caído; se dibuja %s en línea", name, exc_info=True)
+                _reset_pool()
+        if data is None:
+            data = CHARTS[name](rows).getvalue()
+        _store(name, directory, path, data)
+        _log_timing(name, False, t0, data)
+        results[i] = io.BytesIO(data)
+
+    return results
+
+
+# =============================================================================
+# ✅ Selección de backend por reporte
+# =============================================================================
+
+CHART_BACKENDS = ("vector", "png")
+
+
+def chart_backend(value=None):
+    """Backend pedido (o el default de settings); None si no es válido."""
+    value = (value or getattr(settings, "REPORTS_CHART_BACKEND", "vector") or "").strip().lower()
+    return value if value in CHART_BACKENDS else None
+
+
+def chart_flowables(specs, backend="vector"):
+    """
+    specs: [(chart_name, rows, width, height), ...]
+    Devuelve flowables listos para el story: Drawing (vector) o Image (png).
+    """
+    if backend == "vector":
+        from .vector_charts import CHARTS as VECTOR_CHARTS
+        return [VECTOR_CHARTS[name](rows, width, height) for name, rows, width, height in specs]
+
+    from reportlab.platypus import Image
+    pngs = render_charts([(name, rows) for name, rows, _, _ in specs])
+    return [Image(png, width=width, height=height) for png, (_, _, width, height) in zip(pngs, specs)]
@@ -0,0 +1,94 @@
+# backend/reports/dashboard.py
+"""
+Datos del dashboard de reportes en UNA consulta.
+
+  status                : [{'name': <status>, 'value': n}]
+  by_department         : [{'requesting_department': <nombre>, 'total': n}]
+  by_month_department   : [{'month': 'YYYY-MM', 'requesting_department': <nombre>, 'total': n}]
+  total                 : n
+
+Los cuatro agrupamientos salen del mismo conjunto filtrado (mismos filtros de
+fecha / estatus / departamento / proyecto / fuente para todos):
+  - PostgreSQL: GROUP BY GROUPING SETS ((status), (department), (month, department), ())
+  - otros motores: UNION ALL de los mismos GROUP BY sobre un CTE (sigue siendo un solo viaje)
+
+El SELECT base lo arma el ORM (filtros e índice de created_at, mes en la zona horaria local),
+aquí solo se envuelve con el agrupamiento.
+"""
+from django.db import connection
+from django.db.models import DateField
+from django.db.models.functions import Trunc
+
+from requisitions.models import Requisition
+from .filters import apply_report_filters
+
+# GROUPING(status, department, month): bit encendido = columna fuera del agrupamiento
+_G_STATUS = 0b011
+_G_DEPARTMENT = 0b101
+_G_MONTH_DEPARTMENT = 0b100
+_G_TOTAL = 0b111
+
+_GROUPING_SETS_SQL = """
+WITH base (status, department, month) AS ({base})
+SELECT GROUPING(status, department, month), status, department, month, COUNT(*)
+FROM base
+GROUP BY GROUPING SETS ((status), (department), (month, department), ())
+"""
+
+_UNION_SQL = f"""
+WITH base (status, department, month) AS ({{base}})
+SELECT {_G_STATUS}, status, NULL, NULL, COUNT(*) FROM base GROUP BY status
+UNION ALL
+SELECT {_G_DEPARTMENT}, NULL, department, NULL, COUNT(*) FROM base GROUP BY department
+UNION ALL
+SELECT {_G_MONTH_DEPARTMENT}, NULL, department, month, COUNT(*) FROM base GROUP BY month, department
+UNION ALL
+SELECT {_G_TOTAL}, NULL, NULL, NULL, COUNT(*) FROM base
+"""
+
+
+def _base_sql(filters):
+    qs = (
+        apply_report_filters(Requisition.objects.all(), filters)
+        .order_by()
+        .annotate(month=Trunc("created_at", "month", output_field=DateField()))
+        .values_list("status", "requesting_department__name", "month")
+    )
+    return qs.query.sql_with_params()
+
+
+def _month_label(value):
+    # date en PostgreSQL, 'YYYY-MM-DD' en SQLite
+    return value.strftime("%Y-%m") if hasattr(value, "strftime") else str(value)[:7]
+
+
+def dashboard_totals(filters):
+    base, params = _base_sql(filters)
+    template = _GROUPING_SETS_SQL if connection.vendor == "postgresql" else _UNION_SQL
+
+    with connection.cursor() as cursor:
+        cursor.execute(template.format(base=base), params)
+        rows = cursor.fetchall()
+
+    status, by_department, by_month_department, total = [], [], [], 0
+    for grouping, st, department, month, count in rows:
+        if grouping == _G_STATUS:
+            status.append({"name": st, "value": count})
+        elif grouping == _G_DEPARTMENT:
+            by_department.append({"requesting_department": department, "total": count})
+        elif grouping == _G_MONTH_DEPARTMENT:
+            by_month_department.append({
+                "month": _month_label(month), "requesting_department": department, "total": count,
+            })
+        elif grouping == _G_TOTAL:
+            total = count
+
+    status.sort(key=lambda r: r["name"] or "")
+    by_department.sort(key=lambda r: r["requesting_department"] or "")
+    by_month_department.sort(key=lambda r: (r["month"], r["requesting_department"] or ""))
+    return {
+        "status": status,
+        "by_department": by_department,
+        "by_month_department": by_month_department,
+        "total": total,
+    }
@@ -0,0 +1,193 @@
+# backend/reports/exports.py
+"""
+Exportación CSV / XLSX de los datos detrás de los reportes.
+
+  by-unit        → mismo dataset que /api/reports/by-unit/
+  by-month-unit  → mismo dataset que /api/reports/by-month-unit/ (start_date / end_date)
+  detail         → una fila por partida, con los filtros del reporte detallado
+
+CSV: StreamingHttpResponse, fila por fila.
+XLSX: openpyxl en modo write-only (las filas se vuelcan a disco conforme se
+agregan) y el archivo se sirve en bloques con FileResponse.
+El detalle se lee con .iterator(): nunca se materializa el año completo.
+"""
+import csv
+import tempfile
+
+from django.db.models import F, Sum, Window
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+from requisitions.models import Requisition, RequisitionItem
+from .aggregates import department_totals, month_department_totals
+from .filters import apply_report_filters
+
+EXPORT_CHUNK_SIZE = 2000
+
+_STATUS_DISPLAY = dict(Requisition.STATUS_CHOICES)
+
+DETAIL_COLUMNS = [
+    "Requisición", "Fecha", "Usuario", "Departamento", "Proyecto", "Fuente de financiamiento",
+    "Estatus", "Motivo", "Partida", "Objeto del gasto", "Descripción", "Cantidad", "Unidad",
+    "Costo unitario estimado", "Total estimado partida", "Total estimado requisición", "Monto real requisición",
+]
+
+_DETAIL_VALUES = (
+    "requisition_id",
+    "requisition__created_at",
+    "requisition__user__first_name",
+    "requisition__user__last_name",
+    "requisition__requesting_department__name",
+    "requisition__project__code",
+    "requisition__funding_source__code",
+    "requisition__status",
+    "requisition__requisition_reason",
+    "id",
+    "product__description",
+    "description__text",
+    "manual_description",
+    "quantity",
+    "unit__name",
+    "estimated_unit_cost",
+    "estimated_total",
+    "requisition_estimated_total",
+    "requisition__real_amount",
+)
+
+
+# ---------- datasets: (encabezado, iterador de filas) ----------
+def _by_unit_rows(filters):
+    header = ["Departamento", "Total"]
+    rows = ((r["requesting_department"], r["total"]) for r in department_totals())
+    return header, rows
+
+
+def _by_month_unit_rows(filters):
+    header = ["Mes", "Departamento", "Total"]
+    data = month_department_totals(filters.get("start_date"), filters.get("end_date"))
+    rows = ((r["month"], r["requesting_department"], r["total"]) for r in data)
+    return header, rows
+
+
+def detail_items_queryset(filters):
+    """Partidas de las requisiciones que pasan los filtros, con el total estimado por requisición."""
+    requisitions = apply_report_filters(Requisition.objects.all(), filters)
+    return (
+        RequisitionItem.objects
+        .filter(requisition__in=requisitions.order_by().values("id"))
+        .annotate(requisition_estimated_total=Window(
+            expression=Sum("estimated_total"), partition_by=[F("requisition_id")],
+        ))
+        .order_by("-requisition__created_at", "requisition_id", "id")
+        .values_list(*_DETAIL_VALUES)
+    )
+
+
+def _detail_rows(filters):
+    def rows():
+        for (rid, created_at, first, last, dept, project, fund, status, reason,
+             item_id, product, desc_text, manual_desc, qty, unit, unit_cost, total,
+             req_total, real_amount) in detail_items_queryset(filters).iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield (
+                rid,
+                timezone.localtime(created_at).replace(tzinfo=None) if created_at else None,
+                f"{first or ''} {last or ''}".strip(),
+                dept or "",
+                project or "",
+                fund or "",
+                _STATUS_DISPLAY.get(status, status or ""),
+                reason or "",
+                item_id,
+                product or "",
+                desc_text or manual_desc or "",
+                qty,
+                unit or "",
+                unit_cost,
+                total,
+                req_total,
+                real_amount,
+            )
+    return DETAIL_COLUMNS, rows()
+
+
+_DATASETS = {
+    "by-unit": _by_unit_rows,
+    "by-month-unit": _by_month_unit_rows,
+    "detail": _detail_rows,
+}
+
+
+# ---------- escritores ----------
+class _Echo:
+    """Pseudo-buffer: csv.writer devuelve la línea en lugar de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+# Texto capturado por usuarios (motivo, descripciones) que Excel tomaría como fórmula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _safe_text(value):
+    """'=HYPERLINK(...)' → "'=HYPERLINK(...)": se abre como texto, no como fórmula."""
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d %H:%M")
+    return _safe_text(value)
+
+
+def _stream_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield "\ufeff"  # BOM: Excel abre el UTF-8 con acentos correctos
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_csv_value(v) for v in row])
+
+
+def _xlsx_file(sheet_title, header, rows):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title=sheet_title[:31])
+    bold = Font(bold=True)
+    head = []
+    for title in header:
+        cell = WriteOnlyCell(ws, value=title)
+        cell.font = bold
+        head.append(cell)
+    ws.append(head)
+    for row in rows:
+        ws.append([_safe_text(v) for v in row])
+
+    tmp = tempfile.TemporaryFile()
+    wb.save(tmp)
+    tmp.seek(0)
+    return tmp
+
+
+def export_response(dataset, fmt, filters):
+    """Respuesta HTTP (CSV en streaming o XLSX) para `dataset` con `filters` ya validados."""
+    header, rows = _DATASETS[dataset](filters)
+    filename = f"reporte_{dataset}_{timezone.localdate():%Y%m%d}.{fmt}"
+
+    if fmt == "csv":
+        response = StreamingHttpResponse(_stream_csv(header, rows), content_type="text/csv; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    return FileResponse(
+        _xlsx_file(dataset, header, rows),
+        as_attachment=True,
+        filename=filename,
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
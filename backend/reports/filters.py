@@ -0,0 +1,113 @@
+# backend/reports/filters.py
+"""
+Filtros comunes de los reportes (query params → QuerySet de Requisition).
+
+  start_date / end_date : YYYY-MM-DD (inclusive, sobre created_at)
+  status               : uno o varios separados por coma
+  department           : id(s) de Department
+  project              : id(s) de Project
+  funding_source       : id(s) de FundingSource
+
+Los rangos de fecha se traducen a límites de datetime (>= inicio, < día siguiente)
+para que el filtro use el índice de created_at en lugar de castear la columna.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from requisitions.models import Requisition
+
+REPORT_FILTER_PARAMS = ("start_date", "end_date", "status", "department", "project", "funding_source")
+
+_ID_FILTERS = {
+    "department": "requesting_department_id__in",
+    "project": "project_id__in",
+    "funding_source": "funding_source_id__in",
+}
+
+_VALID_STATUSES = {k for k, _ in Requisition.STATUS_CHOICES}
+
+
+def _csv(value):
+    return [p.strip() for p in str(value or "").split(",") if p.strip()]
+
+
+def _day_start(d):
+    return timezone.make_aware(datetime.combine(d, time.min))
+
+
+def parse_report_filters(params):
+    """
+    Devuelve (filters, errors). filters solo contiene lo que vino y es válido:
+      {'start_date': date, 'end_date': date, 'status': [...], 'department': [ids], ...}
+    """
+    filters = {}
+    errors = {}
+
+    for key in ("start_date", "end_date"):
+        raw = params.get(key)
+        if not raw:
+            continue
+        try:
+            d = parse_date(str(raw))
+        except ValueError:
+            d = None
+        if d is None:
+            errors[key] = "Fecha inválida. Usa YYYY-MM-DD."
+        else:
+            filters[key] = d
+
+    if filters.get("start_date") and filters.get("end_date") and filters["start_date"] > filters["end_date"]:
+        errors["end_date"] = "end_date debe ser mayor o igual a start_date."
+
+    statuses = [s.lower() for s in _csv(params.get("status"))]
+    if statuses:
+        bad = [s for s in statuses if s not in _VALID_STATUSES]
+        if bad:
+            errors["status"] = f"Estatus inválido(s): {', '.join(bad)}"
+        else:
+            filters["status"] = statuses
+
+    for key in _ID_FILTERS:
+        tokens = _csv(params.get(key))
+        if not tokens:
+            continue
+        if not all(t.isdigit() for t in tokens):
+            errors[key] = "IDs inválidos."
+        else:
+            filters[key] = [int(t) for t in tokens]
+
+    return filters, errors
+
+
+def apply_report_filters(queryset, filters, prefix=""):
+    """
+    prefix: ruta a Requisition cuando el queryset es de otro modelo
+    (p. ej. "requisition__" para RequisitionItem); el filtro queda sobre la columna del JOIN.
+    """
+    if filters.get("start_date"):
+        queryset = queryset.filter(**{f"{prefix}created_at__gte": _day_start(filters["start_date"])})
+    if filters.get("end_date"):
+        queryset = queryset.filter(**{f"{prefix}created_at__lt": _day_start(filters["end_date"] + timedelta(days=1))})
+    if filters.get("status"):
+        queryset = queryset.filter(**{f"{prefix}status__in": filters["status"]})
+    for key, lookup in _ID_FILTERS.items():
+        if filters.get(key):
+            queryset = queryset.filter(**{f"{prefix}{lookup}": filters[key]})
+    return queryset
+
+
+def describe_report_filters(filters):
+    """Texto corto de los filtros aplicados (para portada de reportes)."""
+    parts = []
+    if filters.get("start_date") or filters.get("end_date"):
+        start = filters.get("start_date")
+        end = filters.get("end_date")
+        parts.append(f"Rango: {start.isoformat() if start else '—'} a {end.isoformat() if end else '—'}")
+    if filters.get("status"):
+        parts.append("Estatus: " + ", ".join(filters["status"]))
+    for key, label in (("department", "Departamento"), ("project", "Proyecto"), ("funding_source", "Fuente")):
+        if filters.get(key):
+            parts.append(f"{label} ID: " + ", ".join(str(i) for i in filters[key]))
+    return " · ".join(parts)
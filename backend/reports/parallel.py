@@ -0,0 +1,253 @@
+# backend/reports/parallel.py
+"""
+Reporte detallado en paralelo: un proceso por sección de departamento.
+
+  1) El proceso que atiende el request consume las filas en streaming (ya
+     ordenadas por departamento) y arma secciones de un solo departamento; los
+     departamentos muy grandes se parten en tramos de SECTION_ROWS filas
+     ("Departamento: X (continuación)").
+  2) Cada sección se dibuja en el pool (spawn, ReportLab y estilos precargados)
+     como un PDF independiente con encabezado/pie pero SIN número de página.
+     Solo hay a lo más 2 × workers secciones en vuelo: las filas en memoria
+     quedan acotadas igual que en el modo secuencial. Mientras el pool trabaja
+     este proceso dibuja la portada (KPIs + gráficas).
+  3) Se unen portada + secciones en orden con pypdf y se estampa
+     "Página N" sobre cada página, en el mismo lugar que el modo secuencial.
+     El logo (idéntico en cada sección) se deduplica al final.
+
+Diferencia de maquetación con el modo secuencial: cada sección empieza en
+página nueva. Si el pool no está disponible o se cae, las secciones
+pendientes se dibujan en línea; sin pypdf se usa el modo secuencial.
+
+Desactivado por omisión (REPORTS_PDF_WORKERS=0): en 1 CPU no mejora el tiempo,
+el primer reporte paga el arranque del pool y el PDF unido pesa más. Activarlo
+(y ajustar PARALLEL_MIN_ROWS) solo con un benchmark en el servidor multinúcleo:
+    python manage.py bench_report_pdf --parallel
+Este módulo no importa modelos a nivel de módulo: los workers lo cargan al
+desempacar la tarea.
+"""
+import io
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import groupby
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Desde cuántas requisiciones el modo automático usa el pool (si REPORTS_PDF_WORKERS >= 2)
+PARALLEL_MIN_ROWS = 2000
+# Tramo máximo de un departamento por sección
+SECTION_ROWS = 2500
+
+_pool = None
+_pool_lock = threading.Lock()
+_stitch_available = None
+
+
+def _report_workers():
+    return int(getattr(settings, "REPORTS_PDF_WORKERS", 0) or 0)
+
+
+def stitch_available():
+    """La unión requiere pypdf (requirements.txt); sin él el reporte sale en modo secuencial."""
+    global _stitch_available
+    if _stitch_available is None:
+        try:
+            import pypdf  # noqa: F401
+            _stitch_available = True
+        except ImportError:
+            logger.warning("pypdf no está instalado: el reporte detallado se genera en modo secuencial")
+            _stitch_available = False
+    return _stitch_available
+
+
+def use_parallel(total, requested=None):
+    """
+    requested: True/False fuerza el modo (True sigue requiriendo pypdf); None = automático,
+    solo con suficientes filas y más de un worker.
+    """
+    if requested is False or not stitch_available():
+        return False
+    if requested:
+        return True
+    return total >= PARALLEL_MIN_ROWS and _report_workers() >= 2
+
+
+def _init_report_worker():
+    # Proceso "spawn": settings de Django + ReportLab, estilos y logo cargados
+    # antes de la primera sección real.
+    import django
+    django.setup()
+    from reportlab import rl_config
+    rl_config.useA85 = 0  # streams binarios: la unión no tiene que decodificar ASCII85 en cada página
+    from requisitions.pdf_template import report_styles
+    from .pdf_generator import render_detail_section
+    report_styles()
+    render_detail_section([], "")
+
+
+def _render_section(rows, print_date, chunk_rows, continued):
+    from .pdf_generator import render_detail_section
+    return render_detail_section(rows, print_date, chunk_rows=chunk_rows, continued=continued).getvalue()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=_report_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_report_worker,
+            )
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    """
+    Cierra el pool. Necesario si este proceso es a su vez un worker de
+    multiprocessing (p. ej. bench_report_pdf): al salir espera (join) a sus hijos
+    y los workers del pool, que no son daemon, nunca terminarían.
+    """
+    _reset_pool()
+
+
+# ---------- filas → secciones ----------
+def iter_sections(rows, max_rows=SECTION_ROWS):
+    """
+    rows: filas del detalle ordenadas por departamento (ver detail_rows), en streaming.
+    Genera (rows, continued) en orden de documento; cada sección es un solo
+    departamento con a lo más max_rows filas (solo esa sección queda en memoria).
+    """
+    for _, dept_rows in groupby(rows, key=lambda r: r[0]):
+        chunk, continued = [], False
+        for row in dept_rows:
+            chunk.append(row)
+            if len(chunk) >= max_rows:
+                yield chunk, continued
+                chunk, continued = [], True
+        if chunk:
+            yield chunk, continued
+
+
+# ---------- unión + numeración ----------
+def _page_number_overlay(count):
+    from reportlab.pdfgen import canvas
+    from .pdf_generator import DETAIL_PAGE, draw_detail_page_number
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=DETAIL_PAGE)
+    for number in range(1, count + 1):
+        draw_detail_page_number(c, number)
+        c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def stitch(parts, title="reporte_requisiciones_detallado.pdf"):
+    """Une los PDF `parts` (BytesIO/bytes) en orden y numera todas las páginas."""
+    from pypdf import PdfReader, PdfWriter
+
+    writer = PdfWriter()
+    for part in parts:
+        writer.append(PdfReader(io.BytesIO(part) if isinstance(part, bytes) else part))
+
+    numbers = PdfReader(_page_number_overlay(len(writer.pages)))
+    for page, overlay in zip(writer.pages, numbers.pages):
+        page.merge_page(overlay)
+        page.compress_content_streams()
+
+    writer.add_metadata({"/Title": title})
+    writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+# ---------- entrada ----------
+def generate_detail_parallel(kpis, rows, filters_desc="", charts="vector", chunk_rows=None):
+    """
+    Mismo documento que generate_requisition_report_pdf, con las secciones de
+    departamento dibujadas en el pool. kpis/rows: ver _compute_kpis / detail_rows.
+    """
+    from .pdf_generator import DETAIL_TABLE_CHUNK_ROWS, _print_date, render_detail_cover, render_detail_section
+
+    if chunk_rows is None:
+        chunk_rows = DETAIL_TABLE_CHUNK_ROWS
+    t0 = time.perf_counter()
+    print_date = _print_date()
+    workers = _report_workers()
+
+    pool = None
+    if workers >= 2:
+        try:
+            pool = _get_pool()
+        except (OSError, RuntimeError):
+            logger.warning("Pool de reportes no disponible; se dibuja en línea", exc_info=True)
+            _reset_pool()
+
+    cover = None
+    parts = []
+    pending = deque()   # (rows, continued, future | None), en orden de documento
+    window = max(2, workers * 2)
+    n_sections = n_rows = 0
+
+    def finish_oldest():
+        nonlocal pool
+        rows_i, continued, future = pending.popleft()
+        data = None
+        if future is not None:
+            try:
+                data = future.result()
+            except BrokenProcessPool:
+                logger.warning("Pool de reportes caído; se dibuja en línea", exc_info=True)
+                _reset_pool()
+                pool = None
+        if data is None:
+            data = render_detail_section(rows_i, print_date, chunk_rows=chunk_rows, continued=continued)
+        parts.append(data)
+
+    for rows_i, continued in iter_sections(rows):
+        n_sections += 1
+        n_rows += len(rows_i)
+        future = None
+        if pool is not None:
+            try:
+                future = pool.submit(_render_section, rows_i, print_date, chunk_rows, continued)
+            except (BrokenProcessPool, RuntimeError):
+                logger.warning("Pool de reportes caído; se dibuja en línea", exc_info=True)
+                _reset_pool()
+                pool = None
+        pending.append((rows_i, continued, future))
+
+        if len(pending) >= window:
+            if cover is None:
+                # la portada se dibuja aquí mientras el pool trabaja
+                cover = render_detail_cover(kpis, filters_desc, charts, print_date)
+            finish_oldest()
+
+    if cover is None:
+        cover = render_detail_cover(kpis, filters_desc, charts, print_date)
+    while pending:
+        finish_oldest()
+
+    buffer = stitch([cover] + parts)
+    logger.info("reporte detallado en paralelo: %s secciones, %s filas, %.0f ms",
+                n_sections, n_rows, (time.perf_counter() - t0) * 1000)
+    return buffer
@@ -1,50 +1,31 @@
 # backend/reports/pdf_generator.py
 
-import os
 import io
-from collections import Counter, defaultdict
+from collections import Counter
 from datetime import datetime
 
-from django.conf import settings
-
+from django.db.models import Count, QuerySet
 from reportlab.lib.pagesizes import letter, landscape
 from reportlab.lib import colors
 from reportlab.platypus import (
-    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether, Image, PageBreak
+    SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether, PageBreak
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-
-# ✅ Importa SOLO lo que existe y se usa
-from .charts import chart_bar_by_department
-
-# --- Mini helper local para pastel de ESTATUS (para no tocar charts.py si no quieres) ---
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
 
+from catalogs.cache import attach_catalogs, catalog_maps
+from requisitions.models import Requisition
+from requisitions.pdf_template import report_styles, draw_logo, fast_cell
 
-def _fig_to_png_bytesio(fig, dpi=150):
-    buf = io.BytesIO()
-    fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
-    plt.close(fig)
-    buf.seek(0)
-    return buf
+# ✅ Gráficas con caché en disco (ver charts.py)
+from .charts import chart_flowables
+from .dashboard import dashboard_totals
+from .filters import describe_report_filters
+from .variance import variance_report
 
 
-def chart_pie_by_status(status_rows):
-    """
-    status_rows: lista de dicts [{'name': 'pending', 'value': 10}, ...]
-    """
-    labels = [r['name'] for r in status_rows]
-    values = [int(r['value'] or 0) for r in status_rows]
-    if sum(values) == 0:
-        labels = ['Sin datos']
-        values = [1]
-    fig, ax = plt.subplots(figsize=(6, 6))
-    ax.pie(values, labels=labels, autopct='%1.1f%%')
-    ax.set_title("Distribución por Estatus")
-    return _fig_to_png_bytesio(fig)
+# Filas por viaje a la BD al recorrer el detalle
+DETAIL_CHUNK_SIZE = 2000
+# Filas por tabla del detalle (~1 página en carta horizontal); 0 = una tabla por departamento
+DETAIL_TABLE_CHUNK_ROWS = 40
 
 
 # ---------- helpers no visuales ----------
@@ -159,13 +140,20 @@ def _label_description(desc):
 # ---------- NUEVO: dashboard KPIs + gráficas en portada ----------
 def _compute_kpis(requisitions):
     """
-    Calcula KPIs y datasets para gráficas a partir del iterable de Requisition.
+    Calcula KPIs y datasets para gráficas.
+    Con un QuerySet se resuelve en SQL (una agregación por estatus y otra por departamento);
+    con cualquier otro iterable de Requisition se recorre en Python.
     """
+    if isinstance(requisitions, QuerySet):
+        return _compute_kpis_sql(requisitions)
+
     total = 0
     status_counter = Counter()
     dept_counter = Counter()
+    maps = catalog_maps()
 
     for r in requisitions:
+        attach_catalogs(r, maps)
         total += 1
         status_counter[str(getattr(r, 'status', '') or '').strip().lower() or '—'] += 1
         dep = _get(r, 'requesting_department')
@@ -182,20 +170,45 @@ def _compute_kpis(requisitions):
         'dept_rows_top5': dept_rows,
     }
 
-def _build_dashboard_story(kpis, logo_path):
+def _compute_kpis_sql(queryset):
+    base = queryset.order_by()  # sin ORDER BY: no debe entrar al GROUP BY
+
+    status_counter = Counter()
+    for row in base.values('status').annotate(value=Count('id')):
+        status_counter[str(row['status'] or '').strip().lower() or '—'] += row['value']
+
+    by_dept = (
+        base.values('requesting_department__name')
+        .annotate(total=Count('id'))
+        .order_by('-total', 'requesting_department__name')[:5]
+    )
+    dept_rows = [
+        {'requesting_department': row['requesting_department__name'] or '—', 'total': row['total']}
+        for row in by_dept
+    ]
+
+    return {
+        'total': sum(status_counter.values()),
+        'status_rows': [{'name': k, 'value': v} for k, v in status_counter.items()],
+        'dept_rows_top5': dept_rows,
+    }
+
+def _build_dashboard_story(kpis, filters_desc="", charts="vector"):
     """
     Construye la portada con KPIs y las dos gráficas (estatus y top departamentos).
     Devuelve una lista de flowables para Platypus.
     """
-    styles = getSampleStyleSheet()
-    h1 = ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=16, spaceAfter=6)
-    h2 = ParagraphStyle('H2', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=13, spaceAfter=4)
-    normal = ParagraphStyle('normal', parent=styles['Normal'], fontName='Helvetica', fontSize=10, leading=12)
+    st = report_styles()
+    h1 = st.dash_h1
+    h2 = st.dash_h2
+    normal = st.normal
 
     story = []
 
     story.append(Paragraph("Reporte Detallado de Requisiciones", h1))
     story.append(Paragraph("Facultad de Ingeniería — Universidad Autónoma de Chihuahua", normal))
+    if filters_desc:
+        story.append(Paragraph(_escape(filters_desc), normal))
     story.append(Spacer(1, 8))
 
     total = kpis['total']
@@ -223,82 +236,459 @@ def _build_dashboard_story(kpis, logo_path):
     story.append(kpi_table)
     story.append(Spacer(1, 10))
 
-    pie_png = chart_pie_by_status(kpis['status_rows'])
-    bar_dept_png = chart_bar_by_department(kpis['dept_rows_top5'])
+    pie_chart, bar_dept_chart = chart_flowables([
+        ("pie_by_status", kpis['status_rows'], 260, 260),
+        ("bar_by_department", kpis['dept_rows_top5'], 520, 240),
+    ], backend=charts)
 
     story.append(PageBreak())
 
     story.append(Paragraph("Distribución por Estatus", h2))
-    story.append(Image(pie_png, width=260, height=260))
+    story.append(pie_chart)
     story.append(Spacer(1, 8))
 
     story.append(PageBreak())
 
     story.append(Paragraph("Top 5 Departamentos por Volumen", h2))
-    story.append(Image(bar_dept_png, width=520, height=240))
+    story.append(bar_dept_chart)
     story.append(Spacer(1, 12))
 
     story.append(PageBreak())
     return story
 
 
+# ---------- detalle por departamento (streaming) ----------
+DETAIL_HEADER = ["ID", "Fecha", "Usuario", "Departamento", "Proyecto", "Motivo", "Estado"]
+
+DETAIL_VALUES = (
+    'requesting_department__name',
+    'id',
+    'created_at',
+    'user__first_name',
+    'user__last_name',
+    'requesting_department__code',
+    'project__code',
+    'project__description',
+    'requisition_reason',
+    'status',
+)
+
+_STATUS_DISPLAY = dict(Requisition.STATUS_CHOICES)
+
+
+class _LazyStory(list):
+    """
+    Lista de flowables que se llena desde un generador conforme ReportLab la consume
+    (build() solo lee/borra del frente), así el detalle nunca está completo en memoria.
+    """
+    LOOKAHEAD = 4  # margen para keepWithNext
+
+    def __init__(self, head, tail):
+        super().__init__(head)
+        self._tail = iter(tail)
+
+    def _fill(self, n):
+        while self._tail is not None and list.__len__(self) < n:
+            try:
+                self.append(next(self._tail))
+            except StopIteration:
+                self._tail = None
+
+    def __len__(self):
+        self._fill(self.LOOKAHEAD)
+        return list.__len__(self)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, i):
+        if isinstance(i, int) and i >= 0:
+            self._fill(i + 1)
+        else:
+            self._fill(float('inf'))
+        return list.__getitem__(self, i)
+
+
+def _detail_rows_from_queryset(queryset):
+    """
+    Tuplas (departamento, id, fecha, usuario, depto, proyecto, motivo, estatus) en orden
+    de departamento, leídas por bloques con .values_list() (sin instanciar modelos).
+    """
+    qs = (
+        queryset
+        .order_by('requesting_department__name', '-created_at')
+        .values_list(*DETAIL_VALUES)
+    )
+    for (dept_name, rid, created_at, first_name, last_name, dept_code,
+         project_code, project_desc, reason, status) in qs.iterator(chunk_size=DETAIL_CHUNK_SIZE):
+        yield (
+            _as_text(dept_name) or 'Sin Departamento',
+            rid,
+            _format_dmy(created_at),
+            _join_clean(first_name or '', last_name or '', sep=' '),
+            _as_text(dept_code) or _as_text(dept_name),
+            _as_text(project_code) or _as_text(project_desc),
+            _as_text(reason),
+            _STATUS_DISPLAY.get(status) or _as_text(status),
+        )
+
+
+def _detail_rows_from_objects(requisitions):
+    """Misma forma que _detail_rows_from_queryset, para iterables de Requisition."""
+    rows = []
+    maps = catalog_maps()
+    for req in requisitions:
+        attach_catalogs(req, maps)
+        user = _get(req, 'user')
+        user_name = (
+            _as_text(user, ['full_name', 'get_full_name']) or
+            _join_clean(_as_text(user, ['first_name']), _as_text(user, ['last_name'])) or
+            _as_text(user)
+        )
+        rows.append((
+            _as_text(_get(req, 'requesting_department'), ['name', 'descripcion', 'description', 'label']) or 'Sin Departamento',
+            req.id,
+            _format_dmy(_get(req, 'created_at')),
+            user_name,
+            _as_text(_get(req, 'requesting_department'),
+                     ['code', 'clave', 'codigo', 'name', 'nombre', 'description', 'descripcion', 'label']),
+            _as_text(_get(req, 'project'),
+                     ['code', 'clave', 'codigo', 'name', 'nombre', 'description', 'descripcion', 'label']),
+            _as_text(_get(req, 'requisition_reason'),
+                     ['text', 'descripcion', 'description', 'label']) or _as_text(_get(req, 'requisition_reason')),
+            _status_text(req),
+        ))
+    rows.sort(key=lambda r: r[0])  # estable: conserva el orden original dentro de cada depto
+    return rows
+
+
+def _dept_col_widths(available_width):
+    """
+    Ajusta las columnas proporcionalmente al ancho disponible.
+    Reparte más ancho a columnas largas (Departamento, Proyecto, Motivo).
+    """
+    # pesos relativos por columna: ID, Fecha, Usuario, Departamento, Proyecto, Motivo, Estado
+    weights = [6, 9, 14, 16, 16, 29, 10]
+    total = sum(weights)
+    return [available_width * w / total for w in weights]
+
+
+def _make_dept_table(data, available_width):
+    table = Table(data, colWidths=_dept_col_widths(available_width), repeatRows=1, hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+        ('TEXTCOLOR',  (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME',   (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE',   (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('LEADING',  (0, 1), (-1, -1), 11),  # celdas de texto plano = estilo 'small'
+        ('VALIGN',   (0, 1), (-1, -1), 'TOP'),
+        ('ALIGN',    (6, 1), (6, -1), 'CENTER'),
+
+        ('LEFTPADDING',  (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('TOPPADDING',   (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING',(0, 0), (-1, -1), 3),
+
+        ('GRID', (0, 0), (-1, -1), 0.4, colors.black),
+    ]))
+    table.splitByRow = True
+    return table
+
+
+def _detail_flowables(rows, available_width, st, chunk_rows=DETAIL_TABLE_CHUNK_ROWS, title_suffix=""):
+    """
+    Genera título + tablas por cada departamento (rows ya viene ordenado por departamento).
+    title_suffix se agrega al título (p. ej. " (continuación)" en modo paralelo).
+    Cada departamento sale en tablas de hasta `chunk_rows` filas con el encabezado repetido:
+    nunca se arma (ni se re-parte en cada página) una tabla de miles de filas, y la
+    memoria queda acotada al bloque en curso. chunk_rows=0 → una sola tabla por departamento.
+    """
+    widths = _dept_col_widths(available_width)
+    left = (st.cell_left, st.cell_left_words)
+    center = (st.cell_center, st.cell_center_words)
+    current = None
+    data = None
+
+    for dept_name, rid, created_str, user_name, dept_label, project, reason, status_disp in rows:
+        if dept_name != current:
+            if data is not None:
+                if len(data) > 1:
+                    yield _make_dept_table(data, available_width)
+                yield Spacer(1, 16)
+            current = dept_name
+            data = [list(DETAIL_HEADER)]
+            yield Paragraph(f"Departamento: {_escape(current)}{title_suffix}", st.title)
+
+        data.append([
+            str(rid),
+            created_str or '—',
+            # texto plano si cabe en una línea; Paragraph solo cuando hay que partirlo
+            fast_cell(user_name or '—', left, widths[2]),
+            fast_cell(dept_label or '—', left, widths[3]),
+            fast_cell(project or '—', left, widths[4]),
+            fast_cell(reason or '—', left, widths[5]),
+            fast_cell(status_disp or '—', center, widths[6]),
+        ])
+        if chunk_rows and len(data) > chunk_rows:
+            yield _make_dept_table(data, available_width)
+            data = [list(DETAIL_HEADER)]
+
+    if data is not None:
+        if len(data) > 1:
+            yield _make_dept_table(data, available_width)
+        yield Spacer(1, 16)
+
+
+# ---------- estimado vs. real (ver variance.py) ----------
+def _pct_text(value):
+    return '—' if value is None else f"{value:+.1f} %"
+
+
+def _money_text(value):
+    v = float(value)
+    return f"-${-v:,.2f}" if v < 0 else f"${v:,.2f}"
+
+
+def _variance_table(header, rows, available_width, weights):
+    total = sum(weights)
+    col_widths = [available_width * w / total for w in weights]
+    table = Table([header] + rows, colWidths=col_widths, repeatRows=1, hAlign='LEFT')
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
+        ('TEXTCOLOR',  (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME',   (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE',   (0, 0), (-1, -1), 9),
+        ('FONTNAME',   (0, 1), (-1, -1), 'Helvetica'),
+        ('ALIGN',      (1, 1), (-1, -1), 'RIGHT'),
+        ('VALIGN',     (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING',  (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('GRID', (0, 0), (-1, -1), 0.4, colors.black),
+    ]))
+    table.splitByRow = True
+    return table
+
+
+def variance_flowables(report, available_width, st, title_style, section_style):
+    """Sección “Estimado vs. real” a partir de variance_report() (ya agregado en la BD)."""
+    summary = report['summary']
+    amounts = ["Estimado", "Real", "Diferencia", "Desv. %"]
+
+    def amount_cells(r):
+        return [_money_text(r['estimated']), _money_text(r['real']),
+                _money_text(r['difference']), _pct_text(r['deviation_pct'])]
+
+    yield Paragraph("Estimado vs. Real", title_style)
+    yield Paragraph(
+        f"{summary['requisitions']} requisiciones con monto real · "
+        f"estimado {_money_text(summary['estimated'])} · real {_money_text(summary['real'])} · "
+        f"desviación {_pct_text(summary['deviation_pct'])}",
+        st.normal,
+    )
+    yield Paragraph(
+        "Percentiles de desviación por requisición: "
+        f"P50 {_pct_text(summary['p50'])} · P90 {_pct_text(summary['p90'])} · P95 {_pct_text(summary['p95'])}",
+        st.small,
+    )
+    yield Spacer(1, 8)
+
+    sections = [
+        ("Por Departamento", ["Departamento", "Req."] + amounts, [34, 8, 16, 16, 16, 10],
+         [[Paragraph(_escape(r['requesting_department'] or '—'), st.cell_left), str(r['requisitions'])]
+          + amount_cells(r) for r in report['by_department']]),
+        ("Por Mes", ["Mes", "Req."] + amounts, [20, 8, 18, 18, 18, 12],
+         [[r['month'], str(r['requisitions'])] + amount_cells(r) for r in report['by_month']]),
+        ("Por Objeto del Gasto (mayor diferencia)", ["Objeto del gasto", "Partidas"] + amounts, [34, 8, 16, 16, 16, 10],
+         [[Paragraph(_escape(r['product'] or '—'), st.cell_left), str(r['items'])]
+          + amount_cells(r) for r in report['by_product']]),
+        ("Requisiciones con mayor diferencia", ["ID", "Fecha", "Departamento"] + amounts, [7, 11, 26, 15, 15, 15, 11],
+         [[str(r['id']), r['created_at'] or '—', Paragraph(_escape(r['requesting_department'] or '—'), st.cell_left)]
+          + amount_cells(r) for r in report['worst']]),
+    ]
+    for title, header, weights, rows in sections:
+        if not rows:
+            continue
+        yield Paragraph(title, section_style)
+        yield _variance_table(header, rows, available_width, weights)
+        yield Spacer(1, 10)
+
+
+# ---------- página del reporte detallado (carta horizontal) ----------
+DETAIL_PAGE = landscape(letter)
+DETAIL_LEFT_MARGIN = 40
+DETAIL_RIGHT_MARGIN = 40
+DETAIL_TOP_MARGIN = 100     # deja espacio para el encabezado
+DETAIL_BOTTOM_MARGIN = 90   # deja espacio para el pie
+
+
+def _detail_doc(buffer):
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=DETAIL_PAGE,
+        leftMargin=DETAIL_LEFT_MARGIN, rightMargin=DETAIL_RIGHT_MARGIN,
+        topMargin=DETAIL_TOP_MARGIN, bottomMargin=DETAIL_BOTTOM_MARGIN,
+        title="reporte_requisiciones_detallado.pdf"
+    )
+
+
+def draw_detail_page_number(c, number):
+    page_w, _ = DETAIL_PAGE
+    c.setFont("Helvetica-Oblique", 8)
+    c.drawRightString(page_w - DETAIL_RIGHT_MARGIN, 40, f"Página {number}")
+
+
+def _detail_page_decorator(print_date, page_numbers=True):
+    """Header/Footer para TODAS las páginas. page_numbers=False: el número se estampa al unir secciones."""
+    page_w, page_h = DETAIL_PAGE
+    left_margin, right_margin = DETAIL_LEFT_MARGIN, DETAIL_RIGHT_MARGIN
+
+    def draw_page(c, doc):
+        # Encabezado
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(left_margin, page_h - 50, "Sistema Integral de Adquisiciones FING")
+        c.setFont("Helvetica", 12)
+        c.drawString(left_margin, page_h - 70, "Universidad Autónoma de Chihuahua — Reportes")
+        # Logo (form XObject compartido: se embebe una vez por documento)
+        draw_logo(c, x=page_w - right_margin - 120, y=page_h - 85, width=110, height=45)
+        # Línea separadora
+        c.line(left_margin, page_h - 90, page_w - right_margin, page_h - 90)
+
+        # Pie de página: dirección + fecha + número de página
+        address_lines = [
+            "FACULTAD DE INGENIERÍA",
+            "Circuito No. 1, Campus Universitario 2",
+            "Chihuahua, Chih. México. C.P. 31125",
+            "Tel. (614) 442-95-00",
+            "www.uach.mx/fing",
+        ]
+        c.setFont("Helvetica", 9)
+        for i, line in enumerate(address_lines):
+            c.drawString(left_margin, 105 - i * 12, line)
+
+        c.setFont("Helvetica-Oblique", 8)
+        c.drawString(left_margin, 40, f"Generado automáticamente — Fecha de impresión: {print_date}")
+        if page_numbers:
+            draw_detail_page_number(c, c.getPageNumber())
+
+    return draw_page
+
+
+def _print_date():
+    return datetime.now().strftime("%d/%m/%Y %H:%M")
+
+
+def _build_detail(story, print_date, page_numbers=True):
+    buffer = io.BytesIO()
+    draw_page = _detail_page_decorator(print_date, page_numbers=page_numbers)
+    _detail_doc(buffer).build(story, onFirstPage=draw_page, onLaterPages=draw_page)
+    buffer.seek(0)
+    return buffer
+
+
+def detail_rows(requisitions):
+    """Filas del detalle en orden de departamento (QuerySet en streaming o iterable de Requisition)."""
+    if isinstance(requisitions, QuerySet):
+        return _detail_rows_from_queryset(requisitions)
+    return _detail_rows_from_objects(requisitions)
+
+
+def render_detail_cover(kpis, filters_desc, charts, print_date):
+    """Solo la portada (KPIs + gráficas), sin número de página."""
+    story = _build_dashboard_story(kpis, filters_desc=filters_desc, charts=charts)
+    if story and isinstance(story[-1], PageBreak):
+        story.pop()
+    return _build_detail(story, print_date, page_numbers=False)
+
+
+def render_detail_section(rows, print_date, chunk_rows=DETAIL_TABLE_CHUNK_ROWS, continued=False):
+    """
+    Un departamento (o un tramo de uno si continued=True) como PDF independiente, sin número de página.
+    rows: filas de _detail_rows_* de UN solo departamento.
+    """
+    flowables = _detail_flowables(
+        rows, DETAIL_PAGE[0] - DETAIL_LEFT_MARGIN - DETAIL_RIGHT_MARGIN, report_styles(),
+        chunk_rows=chunk_rows, title_suffix=" (continuación)" if continued else "",
+    )
+    return _build_detail(_LazyStory([], flowables), print_date, page_numbers=False)
+
+
 # ---------- generator (tabla detallada, ahora con header/footer en todas las páginas) ----------
-def generate_requisition_report_pdf(requisitions):
+def generate_requisition_report_pdf(requisitions, filters_desc="", charts="vector",
+                                    chunk_rows=DETAIL_TABLE_CHUNK_ROWS, parallel=None):
     """
     Genera un PDF DETALLADO con:
       1) Portada tipo dashboard (KPIs + gráficas)
       2) Tabla detallada de requisiciones agrupada por Departamento
       3) Encabezado y pie de página repetidos en TODAS las páginas
+    requisitions: QuerySet (ya filtrado) o iterable de Requisition.
+    filters_desc: texto de filtros aplicados que se muestra en la portada.
+    charts: "vector" (reportlab.graphics) o "png" (matplotlib).
+    chunk_rows: filas por tabla del detalle (0 = una tabla por departamento).
+    parallel: True = un proceso por departamento (ver parallel.py; requiere pypdf);
+              None = automático según tamaño y REPORTS_PDF_WORKERS (apagado por
+              omisión); False = todo en este proceso.
+    """
+    # ---- 1) Portada tipo dashboard ----
+    kpis = _compute_kpis(requisitions)
+
+    from .parallel import generate_detail_parallel, use_parallel
+    if use_parallel(kpis['total'], requested=parallel):
+        return generate_detail_parallel(kpis, detail_rows(requisitions), filters_desc, charts, chunk_rows)
+
+    # Styles (una vez por proceso, ver requisitions.pdf_template)
+    st = report_styles()
+    story = _build_dashboard_story(kpis, filters_desc=filters_desc, charts=charts)
+
+    # ---- 2) Detalle agrupado por Departamento (se consume en streaming) ----
+    doc_width = DETAIL_PAGE[0] - DETAIL_LEFT_MARGIN - DETAIL_RIGHT_MARGIN
+    story = _LazyStory(story, _detail_flowables(detail_rows(requisitions), doc_width, st, chunk_rows=chunk_rows))
+
+    # Build con header/footer en todas las páginas
+    return _build_detail(story, _print_date())
+
+
+# ---------- resumen (gráficas + estimado vs. real) ----------
+def generate_summary_pdf(filters, charts="vector"):
+    """
+    PDF de resumen con gráficas (una por página) + sección Estimado vs. Real.
+    filters: filtros ya validados (parse_report_filters). Devuelve un BytesIO.
     """
+    # todos los filtros aplicados (no solo el rango): se imprimen en cada página de gráficas
+    filters_desc = describe_report_filters(filters)
+
+    # --- 1) Datos para las gráficas (un solo query con GROUPING SETS) ---
+    dashboard = dashboard_totals(filters)
+    bar_rows = dashboard['by_department']
+    line_rows = dashboard['by_month_department']
+
+    # --- 2) Gráficas: vectoriales (default) o PNG en paralelo ---
+    bar_chart, line_chart = chart_flowables([
+        ("bar_by_department", bar_rows, 540, 300),
+        ("line_month_by_department", line_rows, 540, 300),
+    ], backend=charts)
 
+    # --- 3) Construcción del PDF con header/footer ---
     buffer = io.BytesIO()
 
-    # Página y márgenes (landscape)
-    PAGE = landscape(letter)
-    page_w, page_h = PAGE
-    left_margin = 40
-    right_margin = 40
-    top_margin = 100   # deja espacio para el encabezado
-    bottom_margin = 90 # deja espacio para el pie
-
-    # Styles
-    styles = getSampleStyleSheet()
-    base = styles['Normal']
-    h1 = ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=14, spaceAfter=6)
-    small = ParagraphStyle('small', parent=base, fontName='Helvetica', fontSize=9, leading=11)
-    normal = ParagraphStyle('normal', parent=base, fontName='Helvetica', fontSize=10, leading=12)
-    bold = ParagraphStyle('bold', parent=normal, fontName='Helvetica-Bold')
-    cell_left = ParagraphStyle('CellLeft', parent=small, wordWrap='CJK', alignment=TA_LEFT)
-    cell_center = ParagraphStyle('CellCenter', parent=small, wordWrap='CJK', alignment=TA_CENTER)
-    style_title = ParagraphStyle('title', parent=styles['Heading2'], alignment=TA_LEFT, fontSize=13, spaceAfter=10)
-
-    logo_path = os.path.join(settings.BASE_DIR, 'staticfiles', 'uach_logo.png')
-
-    # --- Header/Footer para TODAS las páginas ---
+    left_margin, right_margin = 40, 40
+    top_margin, bottom_margin = 100, 90
+    page_w, page_h = letter
+
+    # Header/Footer
     def draw_page(c, doc):
         # Encabezado
         c.setFont("Helvetica-Bold", 14)
         c.drawString(left_margin, page_h - 50, "Sistema Integral de Adquisiciones FING")
         c.setFont("Helvetica", 12)
         c.drawString(left_margin, page_h - 70, "Universidad Autónoma de Chihuahua — Reportes")
-        # Logo
-        try:
-            if os.path.exists(logo_path):
-                c.drawImage(
-                    logo_path,
-                    x=page_w - right_margin - 120,
-                    y=page_h - 85,
-                    width=110,
-                    height=45,
-                    preserveAspectRatio=True,
-                    mask='auto'
-                )
-        except Exception:
-            pass
-        # Línea separadora
+        draw_logo(c, x=page_w - right_margin - 120, y=page_h - 85, width=110, height=45)
         c.line(left_margin, page_h - 90, page_w - right_margin, page_h - 90)
 
-        # Pie de página: dirección + fecha + número de página
+        # Pie
         address_lines = [
             "FACULTAD DE INGENIERÍA",
             "Circuito No. 1, Campus Universitario 2",
@@ -318,91 +708,44 @@ def generate_requisition_report_pdf(requisitions):
     # Documento
     doc = SimpleDocTemplate(
         buffer,
-        pagesize=PAGE,
+        pagesize=letter,
         leftMargin=left_margin, rightMargin=right_margin,
         topMargin=top_margin, bottomMargin=bottom_margin,
-        title="reporte_requisiciones_detallado.pdf"
+        title="Resumen de Requisiciones"
     )
 
-    # ---- 1) Portada tipo dashboard ----
-    kpis = _compute_kpis(requisitions)
-    story = _build_dashboard_story(kpis, logo_path)
+    st = report_styles()
+    h1 = st.summary_h1
+    h2 = st.summary_h2
+    small = st.summary_small
 
-    # ---- 2) Detalle agrupado por Departamento ----
-    reqs_by_dept = defaultdict(list)
-    for req in requisitions:
-        dname = _as_text(_get(req, 'requesting_department'), ['name', 'descripcion', 'description', 'label']) or 'Sin Departamento'
-        reqs_by_dept[dname].append(req)
-
-    def _make_dept_table(data, available_width):
-        """
-        Ajusta las columnas proporcionalmente al ancho disponible.
-        Reparte más ancho a columnas largas (Departamento, Proyecto, Motivo).
-        """
-        # pesos relativos por columna: ID, Fecha, Usuario, Departamento, Proyecto, Motivo, Estado
-        weights = [6, 9, 14, 16, 16, 29, 10]
-        total = sum(weights)
-        col_widths = [available_width * w / total for w in weights]
-
-        table = Table(data, colWidths=col_widths, repeatRows=1, hAlign='LEFT')
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.gray),
-            ('TEXTCOLOR',  (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME',   (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE',   (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('VALIGN',   (0, 1), (-1, -1), 'TOP'),
-
-            ('LEFTPADDING',  (0, 0), (-1, -1), 3),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-            ('TOPPADDING',   (0, 0), (-1, -1), 3),
-            ('BOTTOMPADDING',(0, 0), (-1, -1), 3),
-
-            ('GRID', (0, 0), (-1, -1), 0.4, colors.black),
-        ]))
-        table.splitByRow = True
-        return table
-
-    for dept_name in sorted(reqs_by_dept.keys()):
-        story.append(Paragraph(f"Departamento: {dept_name}", style_title))
-        data = [["ID", "Fecha", "Usuario", "Departamento", "Proyecto", "Motivo", "Estado"]]
-
-        for req in reqs_by_dept[dept_name]:
-            created_str = _format_dmy(_get(req, 'created_at'))
-            user = _get(req, 'user')
-            user_name = (
-                _as_text(user, ['full_name', 'get_full_name']) or
-                _join_clean(_as_text(user, ['first_name']), _as_text(user, ['last_name'])) or
-                _as_text(user)
-            )
-            dept_label = _as_text(_get(req, 'requesting_department'),
-                                  ['code', 'clave', 'codigo', 'name', 'nombre', 'description', 'descripcion', 'label'])
-            project = _as_text(_get(req, 'project'),
-                               ['code', 'clave', 'codigo', 'name', 'nombre', 'description', 'descripcion', 'label'])
-            reason = _as_text(_get(req, 'requisition_reason'),
-                              ['text', 'descripcion', 'description', 'label']) or _as_text(_get(req, 'requisition_reason'))
-            status_disp = _status_text(req)
-
-            data.append([
-                str(req.id),
-                created_str or '—',
-                Paragraph(_escape(user_name or '—'), cell_left),
-                Paragraph(_escape(dept_label or '—'), cell_left),
-                Paragraph(_escape(project or '—'), cell_left),
-                Paragraph(_escape(reason or '—'), cell_left),
-                Paragraph(_escape(status_disp or '—'), cell_center),
-            ])
-
-        available_width = doc.width
-        table = _make_dept_table(data, available_width)
-        story.append(table)
-        story.append(Spacer(1, 16))
+    story = []
 
-    # Build con header/footer en todas las páginas
+    # Página 1
+    story.append(Paragraph("Resumen de Requisiciones", h1))
+    if filters_desc:
+        story.append(Paragraph(_escape(filters_desc), small))
+    story.append(Spacer(1, 6))
+    story.append(Paragraph("Requisiciones por Departamento", h2))
+    story.append(Spacer(1, 6))
+    story.append(bar_chart)
+    story.append(PageBreak())
+
+    # Página 2
+    story.append(Paragraph("Resumen de Requisiciones", h1))
+    if filters_desc:
+        story.append(Paragraph(_escape(filters_desc), small))
+    story.append(Spacer(1, 6))
+    story.append(Paragraph("Serie Mensual por Departamento", h2))
+    story.append(Spacer(1, 6))
+    story.append(line_chart)
+    story.append(PageBreak())
+
+    # Página 3: Estimado vs. Real (sumas y percentiles desde la BD)
+    story.extend(variance_flowables(variance_report(filters), doc.width, st, h1, h2))
+
+    # Con header/footer en todas las páginas
     doc.build(story, onFirstPage=draw_page, onLaterPages=draw_page)
 
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
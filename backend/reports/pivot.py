@@ -0,0 +1,254 @@
+# backend/reports/pivot.py
+"""
+Pivot genérico sobre requisiciones.
+
+GET /api/reports/pivot/?rows=department&cols=period&measure=estimated_sum&grain=quarter
+
+  dimensiones : department, project, funding_source, budget_unit, agreement,
+                tender, status, product, period (alias: date/week/month/quarter/year)
+  grain       : week | month | quarter | year (para period; default month)
+  measure     : count | estimated_sum | real_sum
+  + los filtros comunes de reportes (start_date, end_date, status, department, ...)
+
+Todo se resuelve en UN GROUP BY. El nivel de la consulta depende de lo pedido:
+  - requisición (count / real_sum): sin JOIN a partidas, nada se duplica;
+  - partida (estimated_sum o dimensión product): count pasa a COUNT(DISTINCT requisición)
+    y real_sum no se permite (el monto real no se puede repartir por producto).
+Los filtros van sobre created_at / FKs de Requisition (índices), nunca sobre expresiones.
+"""
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+
+from requisitions.models import Requisition, RequisitionItem
+from .filters import apply_report_filters
+
+PIVOT_MAX_CELLS = 20000
+PIVOT_MAX_ROW_HEADERS = 1000
+PIVOT_MAX_COL_HEADERS = 200
+PIVOT_MAX_DIMS_PER_AXIS = 2
+
+GRAINS = ("week", "month", "quarter", "year")
+MEASURES = ("count", "estimated_sum", "real_sum")
+_TIME_ALIASES = {"period": None, "date": None, "week": "week", "month": "month", "quarter": "quarter", "year": "year"}
+
+# dimensión → (campo llave, campos de etiqueta) relativos a Requisition
+_REQUISITION_DIMS = {
+    "department": ("requesting_department_id", ("requesting_department__name",)),
+    "project": ("project_id", ("project__code", "project__description")),
+    "funding_source": ("funding_source_id", ("funding_source__code", "funding_source__description")),
+    "budget_unit": ("budget_unit_id", ("budget_unit__code", "budget_unit__description")),
+    "agreement": ("agreement_id", ("agreement__code", "agreement__description")),
+    "tender": ("tender_id", ("tender__name",)),
+    "status": ("status", ()),
+}
+# relativas a RequisitionItem
+_ITEM_DIMS = {
+    "product": ("product_id", ("product__description",)),
+}
+DIMENSIONS = tuple(_REQUISITION_DIMS) + tuple(_ITEM_DIMS) + ("period",)
+
+_STATUS_DISPLAY = dict(Requisition.STATUS_CHOICES)
+
+
+class PivotTooLarge(Exception):
+    pass
+
+
+def _csv(value):
+    return [p.strip().lower() for p in str(value or "").split(",") if p.strip()]
+
+
+def parse_pivot_params(params):
+    """Devuelve (spec, errors). spec = {'rows': [...], 'cols': [...], 'measure': str, 'grain': str}"""
+    errors = {}
+    grain = (params.get("grain") or "").strip().lower() or None
+    implied_grain = None
+
+    axes = {}
+    for axis in ("rows", "cols"):
+        dims = []
+        for name in _csv(params.get(axis)):
+            if name in _TIME_ALIASES:
+                implied_grain = implied_grain or _TIME_ALIASES[name]
+                name = "period"
+            if name not in DIMENSIONS:
+                errors[axis] = f"Dimensión inválida: {name}. Opciones: {', '.join(DIMENSIONS)}"
+                break
+            dims.append(name)
+        if len(dims) > PIVOT_MAX_DIMS_PER_AXIS:
+            errors[axis] = f"Máximo {PIVOT_MAX_DIMS_PER_AXIS} dimensiones por eje."
+        axes[axis] = dims
+
+    if not axes["rows"] and "rows" not in errors:
+        errors["rows"] = "Indica al menos una dimensión en rows."
+    all_dims = axes["rows"] + axes["cols"]
+    if len(set(all_dims)) != len(all_dims):
+        errors["cols"] = "Una dimensión no puede repetirse."
+
+    grain = grain or implied_grain or "month"
+    if grain not in GRAINS:
+        errors["grain"] = f"Grano inválido. Opciones: {', '.join(GRAINS)}"
+
+    measure = (params.get("measure") or "count").strip().lower()
+    if measure not in MEASURES:
+        errors["measure"] = f"Medida inválida. Opciones: {', '.join(MEASURES)}"
+    elif measure == "real_sum" and "product" in all_dims:
+        errors["measure"] = "real_sum es por requisición; no se puede desglosar por producto."
+
+    return {"rows": axes["rows"], "cols": axes["cols"], "measure": measure, "grain": grain}, errors
+
+
+# ---------- consulta ----------
+def _item_level(spec):
+    return spec["measure"] == "estimated_sum" or "product" in spec["rows"] + spec["cols"]
+
+
+def _measure_expr(measure, item_level):
+    if measure == "count":
+        return Count("requisition_id", distinct=True) if item_level else Count("id")
+    if measure == "estimated_sum":
+        return Sum("estimated_total")
+    return Sum("real_amount")
+
+
+def _dim_fields(dim, prefix):
+    """(campo llave, [campos etiqueta]) ya con el prefijo del nivel."""
+    if dim == "period":
+        return "period", []
+    if dim in _ITEM_DIMS:
+        key, labels = _ITEM_DIMS[dim]
+        return key, list(labels)
+    key, labels = _REQUISITION_DIMS[dim]
+    return prefix + key, [prefix + f for f in labels]
+
+
+def _grouped(spec, filters, dims, limit=None):
+    item_level = _item_level(spec)
+    prefix = "requisition__" if item_level else ""
+    base = RequisitionItem.objects.all() if item_level else Requisition.objects.all()
+    qs = apply_report_filters(base, filters, prefix=prefix).order_by()
+
+    if "period" in dims:
+        qs = qs.annotate(period=Trunc(prefix + "created_at", spec["grain"]))
+
+    fields = []
+    for dim in dims:
+        key, labels = _dim_fields(dim, prefix)
+        fields.append(key)
+        fields.extend(labels)
+
+    expr = _measure_expr(spec["measure"], item_level)
+    if not fields:
+        return [qs.aggregate(value=expr)]
+
+    qs = qs.values(*fields).annotate(value=expr)
+    if limit is not None:
+        qs = qs[:limit + 1]
+    return list(qs)
+
+
+def _period_label(value, grain):
+    if value is None:
+        return "—"
+    d = value.date() if hasattr(value, "date") else value
+    if grain == "week":
+        iso = d.isocalendar()
+        return f"{iso[0]}-W{iso[1]:02d}"
+    if grain == "quarter":
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    if grain == "year":
+        return str(d.year)
+    return f"{d:%Y-%m}"
+
+
+def _header(row, dims, spec, prefix):
+    """(llave, etiquetas, orden) de una fila agrupada para las dimensiones `dims`."""
+    keys, labels, order = [], [], []
+    for dim in dims:
+        key_field, label_fields = _dim_fields(dim, prefix)
+        key = row.get(key_field)
+        if dim == "period":
+            label = _period_label(key, spec["grain"])
+            sort = label
+        elif dim == "status":
+            label = _STATUS_DISPLAY.get(key, key or "—")
+            sort = label.lower()
+        else:
+            parts = [str(row.get(f)) for f in label_fields if row.get(f)]
+            label = " – ".join(parts) if parts else "—"
+            sort = label.lower()
+        keys.append(key)
+        labels.append(label)
+        order.append(sort)
+    return tuple(keys), labels, tuple(order)
+
+
+def _zero(measure):
+    return 0 if measure == "count" else Decimal("0.00")
+
+
+def _fmt(value, measure):
+    if measure == "count":
+        return int(value or 0)
+    return f"{Decimal(value or 0):.2f}"
+
+
+def run_pivot(spec, filters):
+    measure = spec["measure"]
+    rows_dims, cols_dims = spec["rows"], spec["cols"]
+    prefix = "requisition__" if _item_level(spec) else ""
+
+    data = _grouped(spec, filters, rows_dims + cols_dims, limit=PIVOT_MAX_CELLS)
+    if len(data) > PIVOT_MAX_CELLS:
+        raise PivotTooLarge(
+            f"El pivot excede {PIVOT_MAX_CELLS} celdas; agrega filtros o usa un grano mayor."
+        )
+
+    row_headers, col_headers, cells = {}, {}, {}
+    for r in data:
+        rk, rl, ro = _header(r, rows_dims, spec, prefix)
+        ck, cl, co = _header(r, cols_dims, spec, prefix)
+        row_headers.setdefault(rk, (ro, rl))
+        col_headers.setdefault(ck, (co, cl))
+        cells[(rk, ck)] = r["value"] or _zero(measure)
+
+    if len(row_headers) > PIVOT_MAX_ROW_HEADERS or len(col_headers) > PIVOT_MAX_COL_HEADERS:
+        raise PivotTooLarge(
+            f"Máximo {PIVOT_MAX_ROW_HEADERS} filas y {PIVOT_MAX_COL_HEADERS} columnas; "
+            "agrega filtros o usa un grano mayor."
+        )
+
+    row_keys = sorted(row_headers, key=lambda k: row_headers[k][0])
+    col_keys = sorted(col_headers, key=lambda k: col_headers[k][0])
+
+    matrix = [[cells.get((rk, ck), _zero(measure)) for ck in col_keys] for rk in row_keys]
+
+    if measure == "count" and _item_level(spec):
+        # COUNT(DISTINCT) no es aditivo entre celdas: los totales salen de su propio GROUP BY
+        grand = _grouped(spec, filters, [])[0]["value"] or 0
+        by_row = {_header(r, rows_dims, spec, prefix)[0]: r["value"] for r in _grouped(spec, filters, rows_dims)}
+        row_totals = [by_row.get(rk, 0) for rk in row_keys]
+        if cols_dims:
+            by_col = {_header(r, cols_dims, spec, prefix)[0]: r["value"] for r in _grouped(spec, filters, cols_dims)}
+            col_totals = [by_col.get(ck, 0) for ck in col_keys]
+        else:
+            col_totals = [grand] if col_keys else []
+    else:
+        row_totals = [sum(row, _zero(measure)) for row in matrix]
+        col_totals = [sum(col, _zero(measure)) for col in zip(*matrix)] if matrix else []
+        grand = sum(row_totals, _zero(measure))
+
+    return {
+        "rows": rows_dims,
+        "cols": cols_dims,
+        "measure": measure,
+        "grain": spec["grain"] if "period" in rows_dims + cols_dims else None,
+        "row_headers": [row_headers[k][1] for k in row_keys],
+        "col_headers": [col_headers[k][1] for k in col_keys],
+        "cells": [[_fmt(v, measure) for v in row] for row in matrix],
+        "row_totals": [_fmt(v, measure) for v in row_totals],
+        "col_totals": [_fmt(v, measure) for v in col_totals],
+        "total": _fmt(grand, measure),
+    }
@@ -0,0 +1,22 @@
+# backend/reports/signals.py
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from core.invalidation import subscribe
+from requisitions.models import Requisition, RequisitionItem
+from .cache import invalidate_reports_cache, on_remote_invalidation
+
+
+# =============================================================================
+# ✅ Caché de reportes: alta/edición/cambio de estatus/cancelación/baja de requisiciones
+#    y cambios de partidas (montos estimados del pivot)
+# =============================================================================
+
+@receiver([post_save, post_delete], sender=Requisition)
+@receiver([post_save, post_delete], sender=RequisitionItem)
+def _invalidate_reports_on_requisition_change(sender, instance, raw=False, **kwargs):
+    invalidate_reports_cache()
+
+
+# Otros workers (bus LISTEN/NOTIFY): su escritura invalida también nuestra versión local
+subscribe("reports", on_remote_invalidation)
@@ -1 +1,492 @@
-from django.test import TestCase
\ No newline at end of file
+import io
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from requisitions.models import Department, ReportArchive, Requisition
+from requisitions.rollup import rebuild_rollup
+from requisitions.tests import make_requisition
+
+
+class ReportsAPITestCase(TestCase):
+    """Base: caché limpio y un administrador autenticado."""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_superuser(
+            "9000", "Admin", "Reportes", "0000", "admin@uach.mx", password="x",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+
+class ReportsCacheTests(ReportsAPITestCase):
+    def test_etag_revalidation_and_invalidation(self):
+        req = make_requisition(n_items=1, user=self.admin)
+
+        first = self.client.get("/api/reports/by-unit/")
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+
+        with self.assertNumQueries(0):
+            again = self.client.get("/api/reports/by-unit/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(again.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            req.status = "cancelled"
+            req.save()
+
+        after = self.client.get("/api/reports/by-unit/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(after.status_code, 200)
+        self.assertNotEqual(after["ETag"], etag)
+
+
+class ReportKpisTests(ReportsAPITestCase):
+    def test_sql_kpis_match_python_path(self):
+        from reports.pdf_generator import _compute_kpis
+
+        for i, n in enumerate(range(1, 8)):
+            dept = Department.objects.create(code=f"K{i}", name=f"Depto {i}")
+            for j in range(n):
+                make_requisition(n_items=1, user=self.admin, department=dept, status=("registered", "sent")[j % 2])
+
+        qs = Requisition.objects.order_by("-created_at")
+        with self.assertNumQueries(2):  # una agregación por estatus y otra por departamento
+            in_sql = _compute_kpis(qs)
+        in_python = _compute_kpis(list(qs))
+
+        self.assertEqual(in_sql["total"], 28)
+        self.assertEqual(sorted((r["name"], r["value"]) for r in in_sql["status_rows"]),
+                         [("registered", 16), ("sent", 12)])
+        self.assertEqual(in_sql["dept_rows_top5"], [
+            {"requesting_department": f"Depto {i}", "total": i + 1} for i in (6, 5, 4, 3, 2)
+        ])
+        self.assertEqual(sorted(in_sql["status_rows"], key=str), sorted(in_python["status_rows"], key=str))
+        self.assertEqual(in_sql["dept_rows_top5"], in_python["dept_rows_top5"])
+
+
+class ReportFilterTests(ReportsAPITestCase):
+    def test_parse_and_describe_filters(self):
+        from reports.filters import describe_report_filters, parse_report_filters
+
+        filters, errors = parse_report_filters({
+            "start_date": "2025-01-01", "end_date": "2025-01-31", "status": "Sent, received", "department": "3,4",
+        })
+        self.assertEqual(errors, {})
+        self.assertEqual(filters["status"], ["sent", "received"])
+        self.assertEqual(filters["department"], [3, 4])
+        self.assertEqual(
+            describe_report_filters(filters),
+            "Rango: 2025-01-01 a 2025-01-31 · Estatus: sent, received · Departamento ID: 3, 4",
+        )
+
+        filters, errors = parse_report_filters({
+            "start_date": "2025-02-30", "end_date": "ayer", "status": "sent,perdida", "project": "1,x",
+        })
+        self.assertEqual(filters, {})
+        self.assertEqual(set(errors), {"start_date", "end_date", "status", "project"})
+        self.assertIn("perdida", errors["status"])
+
+        _, errors = parse_report_filters({"start_date": "2025-03-02", "end_date": "2025-03-01"})
+        self.assertEqual(list(errors), ["end_date"])
+
+    def test_invalid_filters_return_400(self):
+        for url in ("/api/reports/requisitions-report/", "/api/reports/summary-pdf/", "/api/reports/export/detail.csv"):
+            res = self.client.get(url, {"start_date": "2025-13-01", "department": "abc"})
+            self.assertEqual(res.status_code, 400, url)
+            self.assertEqual(set(res.json()), {"start_date", "department"}, url)
+
+    def test_summary_pdf_cover_lists_every_filter(self):
+        from pypdf import PdfReader
+
+        dept = Department.objects.create(code="F2", name="Resumen")
+        make_requisition(n_items=1, user=self.admin, department=dept, status="sent")
+
+        res = self.client.get("/api/reports/summary-pdf/", {
+            "start_date": "2025-01-01", "status": "sent", "department": str(dept.pk),
+        })
+        self.assertEqual(res.status_code, 200)
+        first_page = PdfReader(io.BytesIO(res.content)).pages[0].extract_text()
+        self.assertIn(f"Rango: 2025-01-01 a — · Estatus: sent · Departamento ID: {dept.pk}", first_page)
+
+    def test_filters_restrict_rows(self):
+        import csv
+
+        dept = Department.objects.create(code="F1", name="Filtrado")
+        kept = make_requisition(n_items=1, user=self.admin, department=dept, status="sent")
+        make_requisition(n_items=1, user=self.admin, department=dept, status="registered")
+        make_requisition(n_items=1, user=self.admin, status="sent")
+        old = make_requisition(n_items=1, user=self.admin, department=dept, status="sent")
+        Requisition.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+
+        today = timezone.localdate().isoformat()
+        res = self.client.get("/api/reports/export/detail.csv", {
+            "start_date": today, "end_date": today, "status": "sent", "department": str(dept.pk),
+        })
+        self.assertEqual(res.status_code, 200)
+        text = b"".join(res.streaming_content).decode("utf-8").lstrip("\ufeff")
+        _, *rows = list(csv.reader(io.StringIO(text)))
+        self.assertEqual([row[0] for row in rows], [str(kept.pk)])
+
+
+class ChartDiskCacheTests(TestCase):
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        chart_settings = override_settings(REPORTS_CHART_CACHE_DIR=cache_dir.name)
+        chart_settings.enable()
+        self.addCleanup(chart_settings.disable)
+        self.cache_dir = Path(cache_dir.name)
+        self.calls = []
+
+    def render(self, rows):
+        self.calls.append(rows)
+        return io.BytesIO(b"png:" + str(rows).encode())
+
+    def test_second_call_is_a_disk_hit(self):
+        from reports.charts import cached_chart
+
+        rows = [{"requesting_department": "Finanzas", "total": 3}]
+        first = cached_chart("bar_by_department", rows, self.render).getvalue()
+        second = cached_chart("bar_by_department", iter(rows), self.render).getvalue()
+        other = cached_chart("bar_by_department", [{"requesting_department": "Finanzas", "total": 4}], self.render)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other.getvalue())
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(len(list(self.cache_dir.glob("*.png"))), 2)
+
+    def test_eviction_drops_least_recently_used(self):
+        from reports.charts import cached_chart, chart_key, evict_chart_cache
+
+        now = time.time()
+        for age, rows in enumerate(([1], [2], [3])):
+            cached_chart("pie_by_status", rows, self.render)
+            path = self.cache_dir / f"{chart_key('pie_by_status', rows)}.png"
+            os.utime(path, (now - 100 * (3 - age), now - 100 * (3 - age)))
+
+        cached_chart("pie_by_status", [1], self.render)  # hit: pasa a ser la más reciente
+        size = (self.cache_dir / f"{chart_key('pie_by_status', [1])}.png").stat().st_size
+
+        self.assertEqual(evict_chart_cache(max_bytes=2 * size), 1)
+        remaining = {p.name for p in self.cache_dir.glob("*.png")}
+        self.assertEqual(remaining, {f"{chart_key('pie_by_status', rows)}.png" for rows in ([1], [3])})
+        self.assertEqual(len(self.calls), 3)
+
+
+class ChartPoolTests(TestCase):
+    SPECS = [
+        ("pie_by_status", [{"name": "sent", "value": 3}, {"name": "registered", "value": 1}]),
+        ("bar_by_department", [{"requesting_department": "Finanzas", "total": 3}]),
+        ("line_month_by_department", [{"month": "2025-01", "requesting_department": "Finanzas", "total": 3}]),
+    ]
+
+    def setUp(self):
+        from reports import charts
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        chart_settings = override_settings(REPORTS_CHART_CACHE_DIR=cache_dir.name, REPORTS_CHART_WORKERS=2)
+        chart_settings.enable()
+        self.addCleanup(chart_settings.disable)
+        self.addCleanup(charts._reset_pool)
+        self.expected = [charts.CHARTS[name](rows).getvalue() for name, rows in self.SPECS]
+
+    def test_pool_results_keep_spec_order(self):
+        from reports.charts import render_charts
+
+        pngs = [png.getvalue() for png in render_charts(self.SPECS)]
+        self.assertEqual(pngs, self.expected)
+        # segunda vez: todo sale del caché en disco, sin tocar el pool
+        with mock.patch("reports.charts._get_pool") as get_pool:
+            self.assertEqual([png.getvalue() for png in render_charts(self.SPECS)], self.expected)
+        get_pool.assert_not_called()
+
+    def test_broken_pool_falls_back_inline(self):
+        from concurrent.futures.process import BrokenProcessPool
+
+        from reports.charts import render_charts
+
+        with mock.patch("reports.charts._get_pool", side_effect=BrokenProcessPool):
+            pngs = [png.getvalue() for png in render_charts(self.SPECS)]
+        self.assertEqual(pngs, self.expected)
+
+
+class VectorChartTests(ReportsAPITestCase):
+    def test_vector_flowables_draw_labels_into_pdf(self):
+        from pypdf import PdfReader
+        from reportlab.graphics.shapes import Drawing
+        from reportlab.lib.pagesizes import letter
+        from reportlab.platypus import SimpleDocTemplate
+
+        from reports.charts import chart_flowables
+
+        flowables = chart_flowables([
+            ("bar_by_department", [{"requesting_department": "Finanzas", "total": 3}], 400, 220),
+            ("line_month_by_department", [{"month": "2025-02", "requesting_department": "Obras", "total": 2}], 400, 220),
+            ("pie_by_status", [{"name": "sent", "value": 3}, {"name": "registered", "value": 1}], 220, 220),
+            ("pie_by_status", [], 220, 220),
+        ], backend="vector")
+        self.assertTrue(all(isinstance(f, Drawing) for f in flowables))
+        self.assertEqual((flowables[0].width, flowables[0].height), (400, 220))
+
+        buf = io.BytesIO()
+        SimpleDocTemplate(buf, pagesize=letter).build(flowables)
+        text = "\n".join(page.extract_text() for page in PdfReader(buf).pages)
+        for label in ("Requisiciones por Departamento", "Finanzas", "2025-02", "Obras",
+                      "sent (75.0%)", "registered (25.0%)", "Sin datos"):
+            self.assertIn(label, text)
+
+    def test_chart_backend_param(self):
+        from reports.charts import chart_backend
+
+        self.assertEqual(chart_backend(" PNG "), "png")
+        with override_settings(REPORTS_CHART_BACKEND="vector"):
+            self.assertEqual(chart_backend(), "vector")
+        self.assertIsNone(chart_backend("svg"))
+
+        res = self.client.get("/api/reports/requisitions-report/", {"charts": "svg"})
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(list(res.json()), ["charts"])
+
+
+class ReportPivotTests(ReportsAPITestCase):
+    def test_pivot_department_by_status(self):
+        make_requisition(n_items=2, user=self.admin)
+
+        response = self.client.get("/api/reports/pivot/", {"rows": "department", "cols": "status", "measure": "estimated_sum"})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["row_headers"], [["Sistemas"]])
+        self.assertEqual(data["cells"], [["40.00"]])
+        self.assertEqual(data["total"], "40.00")
+
+        bad = self.client.get("/api/reports/pivot/", {"rows": "product", "measure": "real_sum"})
+        self.assertEqual(bad.status_code, 400)
+
+
+class ReportVarianceTests(ReportsAPITestCase):
+    def test_variance_estimated_vs_real(self):
+        req = make_requisition(n_items=2, user=self.admin)  # estimado 40.00
+        Requisition.objects.filter(pk=req.pk).update(real_amount=Decimal("50.00"))
+
+        data = self.client.get("/api/reports/variance/").json()
+        self.assertEqual(data["summary"]["estimated"], "40.00")
+        self.assertEqual(data["summary"]["real"], "50.00")
+        self.assertEqual(data["summary"]["deviation_pct"], 25.0)
+        self.assertEqual(data["by_department"][0]["difference"], "10.00")
+        self.assertEqual(data["worst"][0]["id"], req.id)
+
+
+class ReportDashboardTests(ReportsAPITestCase):
+    def test_dashboard_single_query(self):
+        make_requisition(n_items=1, user=self.admin)
+
+        with self.assertNumQueries(1):
+            data = self.client.get("/api/reports/dashboard/").json()
+        self.assertEqual(data["total"], 1)
+        self.assertEqual(data["status"], [{"name": "registered", "value": 1}])
+        self.assertEqual(data["by_department"], [{"requesting_department": "Sistemas", "total": 1}])
+        self.assertEqual(len(data["by_month_department"]), 1)
+
+
+class ReportArchiveTests(ReportsAPITestCase):
+    def test_closed_month_served_from_archive(self):
+        req = make_requisition(n_items=1, user=self.admin)
+        Requisition.objects.filter(pk=req.pk).update(created_at=timezone.now() - timedelta(days=40))
+        rebuild_rollup()
+
+        with tempfile.TemporaryDirectory() as media, override_settings(MEDIA_ROOT=media):
+            call_command("build_report_archive", kind=["summary"], stdout=io.StringIO())
+            archive = ReportArchive.objects.get()
+            month = {"start_date": archive.month.isoformat(),
+                     "end_date": (archive.month + timedelta(days=31)).replace(day=1) - timedelta(days=1)}
+
+            served = self.client.get("/api/reports/summary-pdf/", month)
+            self.assertEqual(served.status_code, 200)
+            self.assertIn("X-Report-Archive", served)
+
+            # el PDF imprime el nombre del departamento: renombrarlo vence el archivo
+            department = req.requesting_department
+            department.name = "Sistemas Computacionales"
+            department.save()
+            self.assertNotIn("X-Report-Archive", self.client.get("/api/reports/summary-pdf/", month))
+            call_command("build_report_archive", kind=["summary"], stdout=io.StringIO())
+            self.assertIn("X-Report-Archive", self.client.get("/api/reports/summary-pdf/", month))
+
+            req.refresh_from_db()
+            req.status = "cancelled"
+            req.save()
+            live = self.client.get("/api/reports/summary-pdf/", month)
+            self.assertEqual(live.status_code, 200)
+            self.assertNotIn("X-Report-Archive", live)
+
+
+class DetailChunkedTablesTests(ReportsAPITestCase):
+    def test_department_tables_are_chunked(self):
+        from reportlab.platypus import Table
+
+        from reports.pdf_generator import DETAIL_HEADER, _detail_flowables
+        from requisitions.pdf_template import report_styles
+
+        rows = [("Finanzas", i, "2025-01-02", "Ana", "Finanzas", "P1", f"Motivo {i}", "Enviada") for i in range(95)]
+        rows += [("Obras", 100 + i, "2025-01-02", "Ana", "Obras", "P1", "Motivo", "Enviada") for i in range(3)]
+
+        tables = [f for f in _detail_flowables(rows, 700, report_styles(), chunk_rows=40) if isinstance(f, Table)]
+        self.assertEqual([len(t._cellvalues) for t in tables], [41, 41, 16, 4])
+        self.assertTrue(all(t._cellvalues[0] == DETAIL_HEADER for t in tables))
+        self.assertEqual([t._cellvalues[1][0] for t in tables], ["0", "40", "80", "100"])
+
+        single = [f for f in _detail_flowables(rows, 700, report_styles(), chunk_rows=0) if isinstance(f, Table)]
+        self.assertEqual([len(t._cellvalues) for t in single], [96, 4])
+
+    def test_detail_pdf_keeps_every_row_in_order(self):
+        from pypdf import PdfReader
+
+        from reports.pdf_generator import generate_requisition_report_pdf
+
+        dept = Department.objects.create(code="C1", name="Compras")
+        pks = [make_requisition(n_items=1, user=self.admin, department=dept).pk for _ in range(45)]
+        start = timezone.now() - timedelta(days=1)
+        for i, pk in enumerate(pks):
+            Requisition.objects.filter(pk=pk).update(
+                requisition_reason=f"Motivo-{pk:04d}", created_at=start + timedelta(minutes=i),
+            )
+
+        pdf = generate_requisition_report_pdf(Requisition.objects.all(), chunk_rows=20, parallel=False)
+        text = "\n".join(page.extract_text() for page in PdfReader(pdf).pages)
+
+        self.assertEqual(text.count("Departamento: Compras"), 1)
+        positions = [text.find(f"Motivo-{pk:04d}") for pk in reversed(pks)]  # más recientes primero
+        self.assertNotIn(-1, positions)
+        self.assertEqual(positions, sorted(positions))
+        self.assertGreaterEqual(text.count("Motivo"), 45 + 3)  # encabezado repetido en cada tabla
+
+
+class ParallelDetailReportTests(ReportsAPITestCase):
+    @override_settings(REPORTS_PDF_WORKERS=0)  # secciones en línea: misma unión y numeración que con el pool
+    def test_parallel_detail_report_numbers_stitched_pages(self):
+        from pypdf import PdfReader
+        from reports.pdf_generator import generate_requisition_report_pdf
+
+        make_requisition(n_items=1, user=self.admin)
+        pdf = PdfReader(generate_requisition_report_pdf(Requisition.objects.all(), parallel=True))
+
+        for number, page in enumerate(pdf.pages, start=1):
+            self.assertIn(f"Página {number}", page.extract_text())
+
+    def test_parallel_sections_are_streamed_per_department(self):
+        from reports.parallel import iter_sections
+
+        pulled = []
+
+        def rows():
+            for dept, n in (("A", 5), ("B", 2)):
+                for i in range(n):
+                    pulled.append(i)
+                    yield (dept, i)
+
+        sections = iter_sections(rows(), max_rows=2)
+        first, continued = next(sections)
+        self.assertEqual((first, continued), ([("A", 0), ("A", 1)], False))
+        self.assertEqual(len(pulled), 2)  # no lee más filas que las de la sección en curso
+        self.assertEqual([(len(r), c) for r, c in sections], [(2, True), (1, True), (2, False)])
+
+
+class ReportsInvalidationBusTests(ReportsAPITestCase):
+    def test_remote_invalidation_bumps_local_version(self):
+        import json
+
+        from core.invalidation import _dispatch_payload, _process_origin
+        from reports.cache import data_version
+
+        version = data_version()
+        _dispatch_payload(json.dumps({"e": "reports", "k": "", "o": _process_origin()}))
+        self.assertEqual(data_version(), version)  # aviso propio: ya se invalidó en local
+
+        _dispatch_payload(json.dumps({"e": "reports", "k": "", "o": "otro-host:1"}))
+        self.assertNotEqual(data_version(), version)
+
+    def test_failed_publish_keeps_the_write_transaction(self):
+        from django.db import connection, transaction
+        from django.test.utils import CaptureQueriesContext
+
+        from core.invalidation import publish
+
+        # SQLite no tiene pg_notify: la sentencia falla como fallaría un NOTIFY rechazado
+        with transaction.atomic():
+            with mock.patch("core.invalidation._enabled", return_value=True), \
+                    CaptureQueriesContext(connection) as queries, self.assertLogs("core.invalidation", "WARNING"):
+                publish("reports")
+            req = make_requisition(n_items=1, user=self.admin)
+
+        sql = [q["sql"].split(" ")[0] for q in queries.captured_queries]
+        self.assertEqual(sql, ["SAVEPOINT", "SELECT", "ROLLBACK", "RELEASE"])
+        self.assertTrue(Requisition.objects.filter(pk=req.pk).exists())
+
+
+    @override_settings(CACHE_INVALIDATION_FALLBACK_TTL=1)
+    def test_versions_expire_after_listener_disconnects(self):
+        from catalogs import bundle
+        from core import invalidation
+        from reports import cache as reports_cache
+
+        invalidation._connected.set()  # listener conectado: las versiones se crean sin caducidad
+        self.addCleanup(invalidation._connected.clear)
+        reports_cache.data_version()
+        bundle.catalog_version()
+
+        # lo que hace el listener al caerse la conexión
+        invalidation._connected.clear()
+        invalidation._flush_all()
+        time.sleep(1.2)
+
+        self.assertIsNone(cache.get(reports_cache._VERSION_KEY))
+        self.assertIsNone(cache.get(bundle._VERSION_KEY))
+
+
+class ReportExportTests(ReportsAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.req = make_requisition(n_items=2, user=self.admin)
+        Requisition.objects.filter(pk=self.req.pk).update(requisition_reason='=HYPERLINK("http://x","clic")')
+
+    def test_detail_csv_rows_and_formula_escaping(self):
+        import csv
+
+        res = self.client.get("/api/reports/export/detail.csv")
+        self.assertEqual(res.status_code, 200)
+        text = b"".join(res.streaming_content).decode("utf-8").lstrip("\ufeff")
+        header, *rows = list(csv.reader(io.StringIO(text)))
+
+        self.assertEqual(header[0], "Requisición")
+        self.assertEqual(len(rows), 2)
+        row = dict(zip(header, rows[0]))
+        self.assertEqual(row["Motivo"], '\'=HYPERLINK("http://x","clic")')
+        self.assertEqual(row["Descripción"], "Artículo 0")
+        self.assertEqual(Decimal(row["Total estimado partida"]), Decimal("20.00"))
+        self.assertEqual(Decimal(row["Total estimado requisición"]), Decimal("40.00"))
+
+    def test_detail_xlsx_keeps_text_out_of_formulas(self):
+        from openpyxl import load_workbook
+
+        res = self.client.get("/api/reports/export/detail.xlsx")
+        self.assertEqual(res.status_code, 200)
+        sheet = load_workbook(io.BytesIO(b"".join(res.streaming_content))).active
+        header = [c.value for c in sheet[1]]
+        reason = sheet.cell(row=2, column=header.index("Motivo") + 1)
+
+        self.assertEqual(sheet.max_row, 3)
+        self.assertEqual(reason.data_type, "s")
+        self.assertEqual(reason.value, '\'=HYPERLINK("http://x","clic")')
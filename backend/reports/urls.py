@@ -1,9 +1,13 @@
-from django.urls import path
+from django.urls import path, re_path
 from .views import (
     RequisitionsByUnitView,
     RequisitionsByMonthAndUnitView,
+    DashboardView,
     RequisitionSummaryPDFView,
     ReportsViewSet,
+    ReportExportView,
+    PivotView,
+    VarianceView,
 )
 
 reports_list = ReportsViewSet.as_view({'get': 'requisitions_report'})
@@ -11,6 +15,11 @@ reports_list = ReportsViewSet.as_view({'get': 'requisitions_report'})
 urlpatterns = [
     path('by-unit/', RequisitionsByUnitView.as_view(), name='requisitions-by-unit'),
     path('by-month-unit/', RequisitionsByMonthAndUnitView.as_view(), name='requisitions-by-month-unit'),
+    path('dashboard/', DashboardView.as_view(), name='reports-dashboard'),
     path('summary-pdf/', RequisitionSummaryPDFView.as_view(), name='requisitions-summary-pdf'),
     path('requisitions-report/', reports_list, name='requisitions-report'),
+    path('pivot/', PivotView.as_view(), name='reports-pivot'),
+    path('variance/', VarianceView.as_view(), name='reports-variance'),
+    re_path(r'^export/(?P<dataset>by-unit|by-month-unit|detail)\.(?P<ext>csv|xlsx)$',
+            ReportExportView.as_view(), name='reports-export'),
 ]
\ No newline at end of file
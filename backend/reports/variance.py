@@ -0,0 +1,189 @@
+# backend/reports/variance.py
+"""
+Estimado vs. real.
+
+  requisición : estimado = suma de partidas (estimated_total), real = Requisition.real_amount
+  producto    : estimated_total vs real_total de cada partida
+
+Solo entran requisiciones / partidas con monto real capturado.
+desviación % = (real - estimado) * 100 / estimado   (None si el estimado es 0)
+
+Sumas, desviaciones, orden y percentiles se resuelven en la base de datos:
+el estimado por requisición es un subquery correlacionado (sin JOIN que duplique
+real_amount) y los percentiles usan PERCENTILE_CONT en PostgreSQL
+(en otros motores, rango más cercano con ORDER BY ... OFFSET).
+"""
+import math
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import (
+    Aggregate, Count, DecimalField, ExpressionWrapper, F, FloatField, OuterRef, Subquery, Sum, Value,
+)
+from django.db.models.functions import Abs, Coalesce, NullIf, TruncMonth
+from django.utils import timezone
+
+from requisitions.models import Requisition, RequisitionItem
+from .filters import apply_report_filters
+
+VARIANCE_DEFAULT_LIMIT = 10
+VARIANCE_MAX_LIMIT = 100
+VARIANCE_PERCENTILES = (50, 90, 95)
+
+_MONEY = DecimalField(max_digits=16, decimal_places=2)
+_ZERO = Value(Decimal("0.00"), output_field=_MONEY)
+
+
+class _PercentileCont(Aggregate):
+    """PERCENTILE_CONT(p) WITHIN GROUP (ORDER BY expr) — solo PostgreSQL."""
+    function = "PERCENTILE_CONT"
+    name = "PercentileCont"
+    template = "%(function)s(%(percentile)s) WITHIN GROUP (ORDER BY %(expressions)s)"
+    output_field = FloatField()
+
+    def __init__(self, expression, percentile, **extra):
+        super().__init__(expression, percentile=float(percentile), **extra)
+
+
+def _deviation(estimated, real):
+    return ExpressionWrapper(
+        (F(real) - F(estimated)) * Value(100.0) / NullIf(F(estimated), _ZERO),
+        output_field=FloatField(),
+    )
+
+
+def _difference(estimated, real):
+    return ExpressionWrapper(F(real) - F(estimated), output_field=_MONEY)
+
+
+def variance_requisitions(filters):
+    """Requisiciones con monto real, anotadas con `estimated` (suma de partidas)."""
+    items = (
+        RequisitionItem.objects
+        .filter(requisition=OuterRef("pk"))
+        .order_by()
+        .values("requisition")
+        .annotate(total=Sum("estimated_total"))
+        .values("total")
+    )
+    qs = Requisition.objects.filter(real_amount__isnull=False)
+    return (
+        apply_report_filters(qs, filters)
+        .order_by()
+        .annotate(estimated=Coalesce(Subquery(items, output_field=_MONEY), _ZERO))
+    )
+
+
+def _grouped(qs, fields, real="real_amount", estimated="estimated", count_as="requisitions"):
+    return (
+        qs.values(*fields)
+        .annotate(**{count_as: Count("id")}, estimated_sum=Sum(estimated), real_sum=Sum(real))
+        .annotate(
+            difference=_difference("estimated_sum", "real_sum"),
+            deviation_pct=_deviation("estimated_sum", "real_sum"),
+        )
+    )
+
+
+def _percentiles(requisitions):
+    qs = requisitions.filter(estimated__gt=0).annotate(deviation=_deviation("estimated", "real_amount"))
+    if connection.vendor == "postgresql":
+        agg = qs.aggregate(**{f"p{p}": _PercentileCont("deviation", p / 100) for p in VARIANCE_PERCENTILES})
+        return {k: _pct(v) for k, v in agg.items()}
+
+    # rango más cercano: una fila por percentil, ordenada por la BD
+    n = qs.count()
+    ordered = qs.order_by("deviation").values_list("deviation", flat=True)
+    result = {}
+    for p in VARIANCE_PERCENTILES:
+        result[f"p{p}"] = _pct(ordered[max(0, math.ceil(p / 100 * n) - 1)]) if n else None
+    return result
+
+
+# ---------- formato ----------
+def _money(value):
+    return f"{Decimal(value or 0):.2f}"
+
+
+def _pct(value):
+    return None if value is None else round(float(value), 1)
+
+
+def _row(r, **extra):
+    return {
+        **extra,
+        "estimated": _money(r["estimated_sum"]),
+        "real": _money(r["real_sum"]),
+        "difference": _money(r["difference"]),
+        "deviation_pct": _pct(r["deviation_pct"]),
+    }
+
+
+def variance_report(filters, limit=VARIANCE_DEFAULT_LIMIT):
+    """
+    {
+      summary:       {requisitions, estimated, real, difference, deviation_pct, p50, p90, p95},
+      by_department: [{requesting_department, requisitions, estimated, real, difference, deviation_pct}],
+      by_month:      [{month: 'YYYY-MM', requisitions, ...}],
+      by_product:    [{product, items, ...}]   (top `limit` por |diferencia|),
+      worst:         [{id, requesting_department, created_at, estimated, real, difference, deviation_pct}]
+                     (top `limit` por |diferencia|)
+    }
+    """
+    reqs = variance_requisitions(filters)
+
+    totals = reqs.aggregate(requisitions=Count("id"), estimated_sum=Sum("estimated"), real_sum=Sum("real_amount"))
+    est, real = totals["estimated_sum"] or Decimal("0"), totals["real_sum"] or Decimal("0")
+    summary = {
+        "requisitions": totals["requisitions"],
+        "estimated": _money(est),
+        "real": _money(real),
+        "difference": _money(real - est),
+        "deviation_pct": _pct((real - est) * 100 / est) if est else None,
+        **_percentiles(reqs),
+    }
+
+    by_department = [
+        _row(r, requesting_department=r["requesting_department__name"], requisitions=r["requisitions"])
+        for r in _grouped(reqs, ["requesting_department__name"]).order_by("requesting_department__name")
+    ]
+
+    by_month = [
+        _row(r, month=f"{r['month']:%Y-%m}", requisitions=r["requisitions"])
+        for r in _grouped(reqs.annotate(month=TruncMonth("created_at")), ["month"]).order_by("month")
+    ]
+
+    items = apply_report_filters(
+        RequisitionItem.objects.filter(real_total__isnull=False), filters, prefix="requisition__",
+    ).order_by()
+    by_product = [
+        _row(r, product=r["product__description"], items=r["items"])
+        for r in _grouped(items, ["product_id", "product__description"], real="real_total", estimated="estimated_total",
+                          count_as="items").order_by(Abs("difference").desc(), "product__description")[:limit]
+    ]
+
+    worst = [
+        {
+            "id": r["id"],
+            "requesting_department": r["requesting_department__name"],
+            "created_at": timezone.localtime(r["created_at"]).date().isoformat() if r["created_at"] else None,
+            "estimated": _money(r["estimated"]),
+            "real": _money(r["real_amount"]),
+            "difference": _money(r["difference"]),
+            "deviation_pct": _pct(r["deviation_pct"]),
+        }
+        for r in reqs
+        .annotate(difference=_difference("estimated", "real_amount"),
+                  deviation_pct=_deviation("estimated", "real_amount"))
+        .order_by(Abs("difference").desc(), "id")
+        .values("id", "requesting_department__name", "created_at", "estimated", "real_amount",
+                "difference", "deviation_pct")[:limit]
+    ]
+
+    return {
+        "summary": summary,
+        "by_department": by_department,
+        "by_month": by_month,
+        "by_product": by_product,
+        "worst": worst,
+    }
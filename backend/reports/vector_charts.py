@@ -0,0 +1,167 @@
+# backend/reports/vector_charts.py
+"""
+Gráficas vectoriales con reportlab.graphics (alternativa a los PNG de matplotlib).
+
+Mismas entradas que chart_bar_by_department / chart_line_month_by_department /
+chart_pie_by_status, pero devuelven un Drawing que se inserta directo en el
+story: sin rasterizar ni codificar PNG, PDFs más chicos y nítidos al hacer zoom.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.linecharts import HorizontalLineChart
+from reportlab.graphics.charts.piecharts import Pie
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+
+# misma paleta que matplotlib (tab10) para que ambos backends se vean igual
+PALETTE = [colors.HexColor(c) for c in (
+    "#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd",
+    "#8c564b", "#e377c2", "#7f7f7f", "#bcbd22", "#17becf",
+)]
+GRID = colors.HexColor("#d0d0d0")
+
+
+def _title(d, text, width, height):
+    d.add(String(width / 2, height - 14, text, fontName="Helvetica-Bold", fontSize=11, textAnchor="middle"))
+
+
+def _empty(d, width, height):
+    d.add(String(width / 2, height / 2, "Sin datos", fontName="Helvetica", fontSize=10,
+                 textAnchor="middle", fillColor=colors.grey))
+    return d
+
+
+def _value_axis(axis, values):
+    top = max(values) if values else 0
+    axis.valueMin = 0
+    axis.valueMax = max(1, top) * 1.1
+    axis.labels.fontName = "Helvetica"
+    axis.labels.fontSize = 7
+    axis.visibleGrid = 1
+    axis.gridStrokeColor = GRID
+    axis.gridStrokeDashArray = (2, 2)
+    if top <= 10:
+        axis.valueStep = 1
+
+
+def _category_axis(axis, labels, angle=20):
+    axis.categoryNames = labels
+    axis.labels.fontName = "Helvetica"
+    axis.labels.fontSize = 7
+    axis.labels.angle = angle
+    axis.labels.boxAnchor = "ne" if angle else "n"
+    axis.labels.dy = -2
+
+
+def bar_by_department(rows, width=540, height=300):
+    """rows: [{'requesting_department': 'Nombre', 'total': int}, ...]"""
+    rows = list(rows)
+    d = Drawing(width, height)
+    _title(d, "Requisiciones por Departamento", width, height)
+    if not rows:
+        return _empty(d, width, height)
+
+    labels = [r.get('requesting_department') or '—' for r in rows]
+    values = [int(r.get('total') or 0) for r in rows]
+
+    chart = VerticalBarChart()
+    chart.x, chart.y = 40, 60
+    chart.width, chart.height = width - 60, height - 90
+    chart.data = [values]
+    chart.bars[0].fillColor = PALETTE[0]
+    chart.bars.strokeColor = None
+    _value_axis(chart.valueAxis, values)
+    _category_axis(chart.categoryAxis, labels)
+    d.add(chart)
+    return d
+
+
+def line_month_by_department(rows, width=540, height=300):
+    """rows: [{'month': 'YYYY-MM', 'requesting_department': 'Nombre', 'total': int}, ...]"""
+    depts = set()
+    months = set()
+    data = defaultdict(lambda: defaultdict(int))
+    for r in rows:
+        m = (r.get('month') or '').strip()
+        if not m:
+            continue
+        dept = r.get('requesting_department') or '—'
+        data[dept][m] += int(r.get('total') or 0)
+        depts.add(dept)
+        months.add(m)
+
+    d = Drawing(width, height)
+    _title(d, "Serie mensual por Departamento", width, height)
+    if not months:
+        return _empty(d, width, height)
+
+    def to_dt(s):
+        try:
+            return datetime.strptime(s, "%Y-%m")
+        except Exception:
+            return datetime(1970, 1, 1)
+    months_sorted = sorted(months, key=to_dt)
+    depts_sorted = sorted(depts)
+    series = [[data[dept].get(m, 0) for m in months_sorted] for dept in depts_sorted]
+
+    legend_w = 130
+    chart = HorizontalLineChart()
+    chart.x, chart.y = 40, 60
+    chart.width, chart.height = width - 60 - legend_w, height - 90
+    chart.data = series
+    chart.joinedLines = 1
+    for i in range(len(series)):
+        chart.lines[i].strokeColor = PALETTE[i % len(PALETTE)]
+        chart.lines[i].strokeWidth = 1.6
+    _value_axis(chart.valueAxis, [v for s in series for v in s])
+    _category_axis(chart.categoryAxis, months_sorted)
+    d.add(chart)
+
+    legend = Legend()
+    legend.x, legend.y = width - legend_w + 5, height - 30
+    legend.fontName = "Helvetica"
+    legend.fontSize = 7
+    legend.alignment = "right"
+    legend.deltay = 9
+    legend.columnMaximum = 20
+    legend.colorNamePairs = [(PALETTE[i % len(PALETTE)], dept[:24]) for i, dept in enumerate(depts_sorted)]
+    d.add(legend)
+    return d
+
+
+def pie_by_status(status_rows, width=260, height=260):
+    """status_rows: [{'name': 'pending', 'value': 10}, ...]"""
+    status_rows = list(status_rows)
+    labels = [r['name'] for r in status_rows]
+    values = [int(r['value'] or 0) for r in status_rows]
+
+    d = Drawing(width, height)
+    _title(d, "Distribución por Estatus", width, height)
+    total = sum(values)
+    if total == 0:
+        labels, values, total = ["Sin datos"], [1], 1
+
+    pie = Pie()
+    size = min(width, height) - 90
+    pie.x, pie.y = (width - size) / 2, (height - size) / 2 - 10
+    pie.width = pie.height = size
+    pie.data = values
+    pie.labels = [f"{lbl} ({v * 100 / total:.1f}%)" for lbl, v in zip(labels, values)]
+    pie.slices.strokeColor = colors.white
+    pie.slices.fontName = "Helvetica"
+    pie.slices.fontSize = 7
+    pie.sideLabels = 1
+    for i in range(len(values)):
+        pie.slices[i].fillColor = PALETTE[i % len(PALETTE)]
+    d.add(pie)
+    return d
+
+
+CHARTS = {
+    "bar_by_department": bar_by_department,
+    "line_month_by_department": line_month_by_department,
+    "pie_by_status": pie_by_status,
+}
@@ -3,218 +3,102 @@
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAdminUser
 from rest_framework.response import Response
-from django.db.models import Count
-from django.utils.dateparse import parse_date
-from django.db.models.functions import TruncMonth
 from django.http import HttpResponse
 from rest_framework.decorators import action
 from rest_framework import viewsets, permissions
 
 from requisitions.models import Requisition
-from .pdf_generator import generate_requisition_report_pdf
-from .charts import chart_bar_by_department, chart_line_month_by_department
-
-import io
+from .filters import REPORT_FILTER_PARAMS, parse_report_filters, apply_report_filters, describe_report_filters
+from .aggregates import department_totals, month_department_totals
+from .archive import archived_response
+from .cache import cached_json_response, normalize_params
+from .dashboard import dashboard_totals
+from .charts import chart_backend
 
 
 class RequisitionsByUnitView(APIView):
     """
     Totales por Departamento
     GET /api/reports/by-unit/
+    Se lee del rollup mensual (RequisitionMonthlyRollup).
     Respuesta: [{ "requesting_department": "<nombre>", "total": <int> }, ...]
     """
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        data = (
-            Requisition.objects
-            .values('requesting_department__name')
-            .annotate(total=Count('id'))
-            .order_by('requesting_department__name')
-        )
-        result = [{
-            'requesting_department': item['requesting_department__name'] or '—',
-            'total': item['total'],
-        } for item in data]
-        return Response(result)
+        return cached_json_response(request, "by-unit", "", department_totals)
 
 
 class RequisitionsByMonthAndUnitView(APIView):
     """
     Serie por mes y Departamento
     GET /api/reports/by-month-unit/?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+    Meses completos desde el rollup; meses cortados por el rango, desde la tabla base.
     Respuesta: [{ "month": "YYYY-MM", "requesting_department": "<nombre>", "total": <int> }, ...]
     """
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-
-        queryset = Requisition.objects.all()
-        if start_date:
-            queryset = queryset.filter(created_at__gte=parse_date(start_date))
-        if end_date:
-            queryset = queryset.filter(created_at__lte=parse_date(end_date))
-
-        data = (
-            queryset
-            .annotate(month=TruncMonth('created_at'))
-            .values('month', 'requesting_department__name')
-            .annotate(total=Count('id'))
-            .order_by('month', 'requesting_department__name')
+        filters, errors = parse_report_filters(request.query_params)
+        if errors:
+            return Response(errors, status=400)
+
+        return cached_json_response(
+            request, "by-month-unit", normalize_params(filters),
+            lambda: month_department_totals(filters.get('start_date'), filters.get('end_date')),
         )
 
-        result = [{
-            'month': item['month'].strftime('%Y-%m'),
-            'requesting_department': item['requesting_department__name'] or '—',
-            'total': item['total'],
-        } for item in data]
 
-        return Response(result)
+class DashboardView(APIView):
+    """
+    Todo lo que pinta el dashboard de reportes en una sola consulta (GROUPING SETS).
+    GET /api/reports/dashboard/?start_date=&end_date=&status=&department=&project=&funding_source=
+    Respuesta: { status: [{name, value}], by_department: [{requesting_department, total}],
+                 by_month_department: [{month, requesting_department, total}], total }
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        filters, errors = parse_report_filters(request.query_params)
+        if errors:
+            return Response(errors, status=400)
+
+        return cached_json_response(
+            request, "dashboard", normalize_params(filters, REPORT_FILTER_PARAMS),
+            lambda: dashboard_totals(filters),
+        )
 
 
 class RequisitionSummaryPDFView(APIView):
     """
     PDF de resumen con GRÁFICAS (una por página):
       Pág. 1: Barras - Requisiciones por Departamento
-      Pág. 2: Líneas - Serie mensual por Departamento (respeta start_date / end_date)
-    GET /api/reports/summary-pdf/?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD
+      Pág. 2: Líneas - Serie mensual por Departamento
+      (ambas del mismo query que /api/reports/dashboard/: mismos filtros de fecha)
+      Pág. 3: Estimado vs. Real (respeta todos los filtros de reportes)
+    GET /api/reports/summary-pdf/?start_date=YYYY-MM-DD&end_date=YYYY-MM-DD&charts=vector|png
+    Un mes cerrado completo se sirve del archivo (ReportArchive) si está vigente.
     """
     permission_classes = [IsAdminUser]
 
     def get(self, request):
-        import io, os
-        from django.conf import settings
-        from reportlab.lib.pagesizes import letter
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from datetime import datetime
-
-        # --- 1) Datos para las gráficas ---
-        by_dept = (
-            Requisition.objects
-            .values('requesting_department__name')
-            .annotate(total=Count('id'))
-            .order_by('requesting_department__name')
-        )
-        bar_rows = [{
-            'requesting_department': row['requesting_department__name'] or '—',
-            'total': row['total'],
-        } for row in by_dept]
-
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        queryset = Requisition.objects.all()
-        if start_date:
-            queryset = queryset.filter(created_at__gte=parse_date(start_date))
-        if end_date:
-            queryset = queryset.filter(created_at__lte=parse_date(end_date))
-
-        by_month_dept = (
-            queryset
-            .annotate(month=TruncMonth('created_at'))
-            .values('month', 'requesting_department__name')
-            .annotate(total=Count('id'))
-            .order_by('month', 'requesting_department__name')
-        )
-        line_rows = [{
-            'month': row['month'].strftime('%Y-%m'),
-            'requesting_department': row['requesting_department__name'] or '—',
-            'total': row['total'],
-        } for row in by_month_dept]
-
-        # --- 2) Render de imágenes ---
-        bar_png  = chart_bar_by_department(bar_rows)
-        line_png = chart_line_month_by_department(line_rows)
-
-        # --- 3) Construcción del PDF con header/footer ---
-        buffer = io.BytesIO()
-
-        left_margin, right_margin = 40, 40
-        top_margin, bottom_margin = 100, 90
-        page_w, page_h = letter
-        logo_path = os.path.join(settings.BASE_DIR, 'staticfiles', 'uach_logo.png')
-
-        # Header/Footer
-        def draw_page(c, doc):
-            # Encabezado
-            c.setFont("Helvetica-Bold", 14)
-            c.drawString(left_margin, page_h - 50, "Sistema Integral de Adquisiciones FING")
-            c.setFont("Helvetica", 12)
-            c.drawString(left_margin, page_h - 70, "Universidad Autónoma de Chihuahua — Reportes")
-            try:
-                if os.path.exists(logo_path):
-                    c.drawImage(
-                        logo_path,
-                        x=page_w - right_margin - 120,
-                        y=page_h - 85,
-                        width=110,
-                        height=45,
-                        preserveAspectRatio=True,
-                        mask='auto'
-                    )
-            except Exception:
-                pass
-            c.line(left_margin, page_h - 90, page_w - right_margin, page_h - 90)
-
-            # Pie
-            address_lines = [
-                "FACULTAD DE INGENIERÍA",
-                "Circuito No. 1, Campus Universitario 2",
-                "Chihuahua, Chih. México. C.P. 31125",
-                "Tel. (614) 442-95-00",
-                "www.uach.mx/fing",
-            ]
-            c.setFont("Helvetica", 9)
-            for i, line in enumerate(address_lines):
-                c.drawString(left_margin, 105 - i * 12, line)
-
-            c.setFont("Helvetica-Oblique", 8)
-            print_date = datetime.now().strftime("%d/%m/%Y %H:%M")
-            c.drawString(left_margin, 40, f"Generado automáticamente — Fecha de impresión: {print_date}")
-            c.drawRightString(page_w - right_margin, 40, f"Página {c.getPageNumber()}")
-
-        # Documento
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            leftMargin=left_margin, rightMargin=right_margin,
-            topMargin=top_margin, bottomMargin=bottom_margin,
-            title="Resumen de Requisiciones"
-        )
-
-        styles = getSampleStyleSheet()
-        h1 = styles['Heading1']
-        h2 = styles['Heading2']
-        small = ParagraphStyle('small', parent=styles['Normal'], fontSize=9)
+        filters, errors = parse_report_filters(request.query_params)
+        charts = chart_backend(request.query_params.get('charts'))
+        if charts is None:
+            errors['charts'] = "Usa charts=vector o charts=png."
+        if errors:
+            return Response(errors, status=400)
 
-        story = []
+        # mes cerrado completo → PDF pre-generado (manage.py build_report_archive)
+        archived = archived_response("summary", filters, charts)
+        if archived is not None:
+            return archived
 
-        # Página 1
-        story.append(Paragraph("Resumen de Requisiciones", h1))
-        if start_date or end_date:
-            story.append(Paragraph(f"Rango: {start_date or '—'} a {end_date or '—'}", small))
-        story.append(Spacer(1, 6))
-        story.append(Paragraph("Requisiciones por Departamento", h2))
-        story.append(Spacer(1, 6))
-        story.append(Image(bar_png, width=540, height=300))
-        story.append(PageBreak())
+        # reportlab se importa aquí (primer reporte), no al cargar el URLconf
+        from .pdf_generator import generate_summary_pdf
 
-        # Página 2
-        story.append(Paragraph("Resumen de Requisiciones", h1))
-        if start_date or end_date:
-            story.append(Paragraph(f"Rango: {start_date or '—'} a {end_date or '—'}", small))
-        story.append(Spacer(1, 6))
-        story.append(Paragraph("Serie Mensual por Departamento", h2))
-        story.append(Spacer(1, 6))
-        story.append(Image(line_png, width=540, height=300))
-
-        # Con header/footer en todas las páginas
-        doc.build(story, onFirstPage=draw_page, onLaterPages=draw_page)
-
-        buffer.seek(0)
-        return HttpResponse(buffer, content_type='application/pdf')
+        pdf_buffer = generate_summary_pdf(filters, charts=charts)
+        return HttpResponse(pdf_buffer, content_type='application/pdf')
 
 
 class ReportsViewSet(viewsets.ViewSet):
@@ -222,6 +106,105 @@ class ReportsViewSet(viewsets.ViewSet):
 
     @action(detail=False, methods=['get'])
     def requisitions_report(self, request):
-        requisitions = Requisition.objects.all().order_by('-created_at')
-        pdf_buffer = generate_requisition_report_pdf(requisitions)
-        return HttpResponse(pdf_buffer, content_type='application/pdf')
\ No newline at end of file
+        """
+        GET /api/reports/requisitions-report/
+            ?start_date=&end_date=&status=&department=&project=&funding_source=&charts=vector|png
+        Los filtros se resuelven en SQL; el detalle se lee en streaming por departamento.
+        Un mes cerrado completo se sirve del archivo (ReportArchive) si está vigente.
+        """
+        filters, errors = parse_report_filters(request.query_params)
+        charts = chart_backend(request.query_params.get('charts'))
+        if charts is None:
+            errors['charts'] = "Usa charts=vector o charts=png."
+        if errors:
+            return Response(errors, status=400)
+
+        archived = archived_response("detailed", filters, charts)
+        if archived is not None:
+            return archived
+
+        # reportlab se importa aquí (primer reporte), no al cargar el URLconf
+        from .pdf_generator import generate_requisition_report_pdf
+
+        requisitions = apply_report_filters(Requisition.objects.all(), filters)
+        pdf_buffer = generate_requisition_report_pdf(
+            requisitions, filters_desc=describe_report_filters(filters), charts=charts,
+        )
+        return HttpResponse(pdf_buffer, content_type='application/pdf')
+
+
+class ReportExportView(APIView):
+    """
+    Datos crudos de los reportes en CSV (streaming) o XLSX (write-only).
+    GET /api/reports/export/by-unit.csv
+    GET /api/reports/export/by-month-unit.xlsx?start_date=&end_date=
+    GET /api/reports/export/detail.csv?start_date=&end_date=&status=&department=&project=&funding_source=
+        (detail: una fila por partida con total estimado de la partida, de la requisición y monto real)
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset, ext):
+        filters, errors = parse_report_filters(request.query_params)
+        if errors:
+            return Response(errors, status=400)
+
+        from .exports import export_response
+        return export_response(dataset, ext, filters)
+
+
+class PivotView(APIView):
+    """
+    Pivot genérico (un solo GROUP BY) para la vista de reportes.
+    GET /api/reports/pivot/?rows=department&cols=month&measure=estimated_sum&grain=quarter
+        + filtros comunes (start_date, end_date, status, department, project, funding_source)
+    Respuesta: { row_headers, col_headers, cells, row_totals, col_totals, total, ... }
+    400 si los parámetros no son válidos o el resultado excede los límites de celdas.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from .pivot import PivotTooLarge, parse_pivot_params, run_pivot
+
+        filters, errors = parse_report_filters(request.query_params)
+        spec, pivot_errors = parse_pivot_params(request.query_params)
+        errors.update(pivot_errors)
+        if errors:
+            return Response(errors, status=400)
+
+        params = "&".join([
+            f"rows={','.join(spec['rows'])}",
+            f"cols={','.join(spec['cols'])}",
+            f"measure={spec['measure']}",
+            f"grain={spec['grain']}",
+            normalize_params(filters, REPORT_FILTER_PARAMS),
+        ])
+        try:
+            return cached_json_response(request, "pivot", params, lambda: run_pivot(spec, filters))
+        except PivotTooLarge as exc:
+            return Response({"detail": str(exc)}, status=400)
+
+
+class VarianceView(APIView):
+    """
+    Estimado vs. real por departamento, mes y producto + percentiles de desviación
+    y las requisiciones con mayor diferencia (todo calculado en la BD).
+    GET /api/reports/variance/?start_date=&end_date=&status=&department=&project=&funding_source=&limit=10
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        from .variance import VARIANCE_DEFAULT_LIMIT, VARIANCE_MAX_LIMIT, variance_report
+
+        filters, errors = parse_report_filters(request.query_params)
+        raw_limit = request.query_params.get('limit') or VARIANCE_DEFAULT_LIMIT
+        try:
+            limit = int(raw_limit)
+        except (TypeError, ValueError):
+            limit = 0
+        if not 1 <= limit <= VARIANCE_MAX_LIMIT:
+            errors['limit'] = f"Usa un entero entre 1 y {VARIANCE_MAX_LIMIT}."
+        if errors:
+            return Response(errors, status=400)
+
+        params = "&".join([f"limit={limit}", normalize_params(filters, REPORT_FILTER_PARAMS)])
+        return cached_json_response(request, "variance", params, lambda: variance_report(filters, limit))
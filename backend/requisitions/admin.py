@@ -1,10 +1,12 @@
 # backend/requisitions/admin.py
 from django.contrib import admin
+from catalogs.cache import with_catalogs
 from .models import (
     Department, Project, FundingSource, BudgetUnit, Agreement,
     Tender, ExternalService, UnitOfMeasurement, Product, ItemDescription,
     Requisition, RequisitionItem,
     RequisitionRealAmountLog,  # ✅ NUEVO
+    ReportArchive,
 )
 
 # ---------- Catalog admins (searchable) ----------
@@ -87,6 +89,7 @@ class RequisitionItemInline(admin.TabularInline):
 @admin.register(Requisition)
 class RequisitionAdmin(admin.ModelAdmin):
     list_display = ("id", "user", "requesting_department", "status", "created_at")
+    list_select_related = ("user",)
     list_filter = ("status", "requesting_department", "created_at")
     date_hierarchy = "created_at"
     search_fields = ("id__exact", "requisition_reason")
@@ -96,16 +99,25 @@ class RequisitionAdmin(admin.ModelAdmin):
     )
     inlines = [RequisitionItemInline]
 
+    # Departamento, proyecto, ... desde el caché de catálogos (sin JOIN ni consulta por fila)
+    def get_queryset(self, request):
+        return with_catalogs(super().get_queryset(request))
+
 
 @admin.register(RequisitionItem)
 class RequisitionItemAdmin(admin.ModelAdmin):
     list_display = ("requisition", "product", "quantity", "unit", "description")
+    list_select_related = ("requisition__user", "product", "description__product")
     search_fields = ("product__description", "description__text", "requisition__id")
     # Enable autocomplete for heavy FKs; keep 'description' as regular select for (+)
     autocomplete_fields = ("requisition", "product", "unit",)
     # If Requisition list is huge, raw id is fine:
     # raw_id_fields = ("requisition",)
 
+    # Unidad desde el caché de catálogos
+    def get_queryset(self, request):
+        return with_catalogs(super().get_queryset(request))
+
 
 # ---------- ✅ Auditoría: Real Amount Logs ----------
 
@@ -122,4 +134,20 @@ class RequisitionRealAmountLogAdmin(admin.ModelAdmin):
         return False
 
     def has_change_permission(self, request, obj=None):
-        return False
\ No newline at end of file
+        return False
+
+
+@admin.register(ReportArchive)
+class ReportArchiveAdmin(admin.ModelAdmin):
+    list_display = ("month", "kind", "charts", "requisition_count", "size", "render_seconds", "generated_at")
+    list_filter = ("kind", "charts")
+    readonly_fields = ("kind", "month", "charts", "file", "size", "requisition_count",
+                       "source_stamp", "render_seconds", "generated_at")
+    ordering = ("-month", "kind")
+
+    # los genera `manage.py build_report_archive`
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,376 @@
+# backend/requisitions/exporting.py
+"""
+Exportación de requisiciones a PDF: validación previa, render del cuerpo,
+unión con cotizaciones y exportación por lote (PDF único o ZIP).
+"""
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections, transaction
+
+# Sin imports de modelos / pdf_generator a nivel de módulo: los workers "spawn"
+# importan este módulo (para deserializar _init_export_worker) ANTES de django.setup().
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================================================
+# ✅ Lote: configuración
+# =============================================================================
+BATCH_EXPORT_MAX_REQUISITIONS = 200
+BATCH_EXPORT_MAX_WORKERS = max(1, min(4, os.cpu_count() or 1))
+
+
+def _pdf_generator():
+    """reportlab se carga con el primer PDF, no al importar las vistas."""
+    from . import pdf_generator
+    return pdf_generator
+
+
+def _pdf_classes():
+    """Requiere pypdf (recomendado) o PyPDF2."""
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except Exception:  # pragma: no cover
+        try:
+            from PyPDF2 import PdfReader, PdfWriter
+        except Exception as e:
+            raise RuntimeError(
+                "Falta dependencia para unir PDFs. Instala: pip install pypdf"
+            ) from e
+    return PdfReader, PdfWriter
+
+
+def merge_pdf_bytes(main_pdf_bytes: bytes, extra_pdf_paths: list[str]) -> bytes:
+    """
+    Une el PDF principal + PDFs extra (cotizaciones) en un solo PDF final.
+    """
+    PdfReader, PdfWriter = _pdf_classes()
+
+    writer = PdfWriter()
+
+    main_reader = PdfReader(io.BytesIO(main_pdf_bytes))
+    for page in main_reader.pages:
+        writer.add_page(page)
+
+    failures = []
+    for path in extra_pdf_paths:
+        try:
+            with open(path, "rb") as f:
+                r = PdfReader(f)
+                for page in r.pages:
+                    writer.add_page(page)
+        except Exception as e:
+            failures.append(f"{path}: {e}")
+
+    if failures:
+        raise ValueError("No se pudieron leer algunas cotizaciones:\n" + "\n".join(failures))
+
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def concat_pdf_bytes(pdfs: list[bytes]) -> bytes:
+    """Concatena varios PDFs (en el orden recibido) en uno solo."""
+    PdfReader, PdfWriter = _pdf_classes()
+
+    writer = PdfWriter()
+    for pdf_bytes in pdfs:
+        for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+            writer.add_page(page)
+
+    out = io.BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def export_blocker(requisition) -> str | None:
+    """
+    Motivo por el que una requisición NO se puede imprimir/exportar, o None si está lista.
+    """
+    if requisition.status == "cancelled":
+        return "No se puede imprimir una requisición cancelada."
+
+    if not requisition.ack_cost_realistic:
+        return "Debes confirmar 'costo aproximado pero realista' antes de imprimir/exportar."
+
+    items = requisition.items.all()
+    if not items.exists():
+        return "No se puede imprimir/exportar una requisición sin renglones (items)."
+
+    bad = [it.id for it in items if it.estimated_total is None or it.estimated_total <= 0]
+    if bad:
+        return f"No se puede imprimir/exportar: hay renglones sin monto válido (estimated_total). Item IDs: {bad}"
+
+    return None
+
+
+def quote_file_paths(requisition, quotes=None) -> list[str]:
+    if quotes is None:
+        quotes = requisition.quotes.order_by("uploaded_at")
+    paths = []
+    for q in quotes:
+        try:
+            if q.file and hasattr(q.file, "path"):
+                paths.append(q.file.path)
+        except Exception:
+            pass
+    return paths
+
+
+def render_export_pdf(requisition, use_cache=True, store=None) -> bytes:
+    """
+    PDF final de la requisición: cuerpo + cotizaciones anexas.
+    Si existe un artefacto pre-renderizado vigente (misma huella de contenido) se sirve tal cual.
+    store: guardar el artefacto; None = solo en estatus EXPORT_CACHE_STATUSES (el pre-render pasa True).
+    """
+    pdf = _pdf_generator()
+    requisition = pdf.load_requisition_for_pdf(requisition)
+    quotes = list(requisition.quotes.order_by("uploaded_at"))
+
+    fingerprint = export_fingerprint(requisition, quotes)
+    if use_cache:
+        cached = read_cached_export(requisition.pk, fingerprint)
+        if cached is not None:
+            return cached
+
+    pdf_bytes = pdf.generate_requisition_pdf(requisition).getvalue()
+
+    quote_paths = quote_file_paths(requisition, quotes)
+    if quote_paths:
+        pdf_bytes = merge_pdf_bytes(pdf_bytes, quote_paths)
+
+    if use_cache:
+        if store is None:
+            store = requisition.status in EXPORT_CACHE_STATUSES
+        if store:
+            store_cached_export(requisition.pk, fingerprint, pdf_bytes)
+        else:
+            # huella nueva sin guardar: el artefacto anterior (si lo hay) ya no sirve
+            invalidate_export_cache(requisition.pk)
+    return pdf_bytes
+
+
+# =============================================================================
+# ✅ Artefacto pre-renderizado (al pasar a "sent")
+# =============================================================================
+# Versión del layout: súbela si cambia el PDF para descartar artefactos viejos.
+EXPORT_CACHE_VERSION = 1
+# Estatus en los que una exportación normal guarda el artefacto (borradores: nunca)
+EXPORT_CACHE_STATUSES = ("sent", "received")
+
+_prerender_executor = None
+_prerender_lock = threading.Lock()
+
+
+def _export_cache_dir(requisition_id) -> Path:
+    return Path(settings.MEDIA_ROOT) / "requisitions" / str(requisition_id) / "export"
+
+
+def export_fingerprint(requisition, quotes) -> str:
+    """
+    Huella de TODO lo que aparece en el PDF final (encabezado, renglones con sus
+    etiquetas de catálogo y cotizaciones anexas). requisition debe venir de load_requisition_for_pdf.
+    """
+    user = requisition.user
+    parts = [
+        f"v{EXPORT_CACHE_VERSION}",
+        requisition.administrative_unit,
+        requisition.requisition_reason,
+        requisition.observations,
+        requisition.created_at.isoformat() if requisition.created_at else "",
+        getattr(user, "full_name", "") if user else "",
+    ]
+    for field in _pdf_generator().PDF_HEADER_RELATED:
+        parts.append(str(getattr(requisition, field, None)))
+
+    for it in requisition.items.all():
+        parts.extend([
+            it.id, it.product_id, it.unit_id, it.description_id, it.manual_description,
+            it.quantity, it.estimated_unit_cost, it.estimated_total,
+            getattr(it.product, "description", ""),
+            getattr(it.unit, "name", ""),
+            getattr(it.description, "text", "") if it.description_id else "",
+        ])
+
+    for q in quotes:
+        parts.extend([q.id, q.file.name if q.file else "", q.size_bytes])
+
+    raw = "\x1f".join("" if p is None else str(p) for p in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def read_cached_export(requisition_id, fingerprint) -> bytes | None:
+    path = _export_cache_dir(requisition_id) / f"{fingerprint}.pdf"
+    try:
+        return path.read_bytes()
+    except OSError:
+        return None
+
+
+def store_cached_export(requisition_id, fingerprint, pdf_bytes: bytes):
+    """Guarda el artefacto (escritura atómica) y descarta versiones anteriores."""
+    folder = _export_cache_dir(requisition_id)
+    try:
+        folder.mkdir(parents=True, exist_ok=True)
+        for old in folder.glob("*.pdf"):
+            if old.stem != fingerprint:
+                old.unlink(missing_ok=True)
+        tmp = folder / f".{fingerprint}.{os.getpid()}.{threading.get_ident()}.tmp"
+        tmp.write_bytes(pdf_bytes)
+        os.replace(tmp, folder / f"{fingerprint}.pdf")
+    except OSError:
+        logger.exception("No se pudo guardar el PDF pre-renderizado de la requisición %s", requisition_id)
+
+
+def invalidate_export_cache(requisition_id):
+    if requisition_id:
+        shutil.rmtree(_export_cache_dir(requisition_id), ignore_errors=True)
+
+
+def _prerender(requisition_id):
+    close_old_connections()
+    try:
+        requisition = _pdf_generator().load_requisition_for_pdf(requisition_id)
+        if export_blocker(requisition) is None:
+            render_export_pdf(requisition, store=True)
+    except Exception:
+        logger.exception("Falló el pre-render del PDF de la requisición %s", requisition_id)
+    finally:
+        connection.close()
+
+
+def schedule_export_prerender(requisition_id):
+    """
+    Renderiza en segundo plano (un hilo por proceso) cuando la transacción confirma,
+    para que la primera impresión se sirva del artefacto ya listo.
+    """
+    def submit():
+        global _prerender_executor
+        with _prerender_lock:
+            if _prerender_executor is None:
+                _prerender_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="req-prerender")
+        _prerender_executor.submit(_prerender, requisition_id)
+
+    transaction.on_commit(submit)
+
+
+# =============================================================================
+# ✅ Lote: render en paralelo (process pool)
+# =============================================================================
+
+def _init_export_worker(db_name=None):
+    # Proceso "spawn": arranca limpio, sin conexiones heredadas del padre.
+    import django
+    django.setup()
+    if db_name:
+        # misma base que el proceso padre (p. ej. la base de pruebas)
+        connections["default"].settings_dict["NAME"] = db_name
+
+
+def _render_one(requisition_id):
+    """
+    Corre dentro del worker. Nunca lanza: devuelve (id, pdf_bytes, error).
+    """
+    close_old_connections()
+    try:
+        return requisition_id, render_export_pdf(requisition_id), None
+    except Exception as e:
+        return requisition_id, None, str(e)
+
+
+def iter_rendered_exports(requisition_ids, max_workers=None):
+    """
+    Genera (id, pdf_bytes, error) conforme cada requisición termina de renderizar.
+    Con un solo worker (o una sola requisición) se renderiza en el proceso actual.
+    """
+    ids = list(requisition_ids)
+    workers = min(max_workers or BATCH_EXPORT_MAX_WORKERS, len(ids))
+
+    if workers <= 1:
+        for rid in ids:
+            yield _render_one(rid)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    db_name = connections["default"].settings_dict["NAME"]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_export_worker, initargs=(db_name,)) as pool:
+        futures = [pool.submit(_render_one, rid) for rid in ids]
+        for fut in as_completed(futures):
+            yield fut.result()
+
+
+class _ZipSink(io.RawIOBase):
+    """Destino no 'seekable' para ZipFile: acumula lo escrito hasta que se drena."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _skipped_note(skipped: dict) -> str:
+    return "\n".join(f"Requisición {rid}: {reason}" for rid, reason in sorted(skipped.items())) + "\n"
+
+
+def stream_export_zip(requisition_ids, skipped=None, max_workers=None):
+    """
+    Generador para StreamingHttpResponse: un PDF por requisición dentro de un ZIP,
+    emitido en cuanto cada entrada termina. Las omitidas/fallidas van en 'omitidas.txt'.
+    """
+    skipped = dict(skipped or {})
+    sink = _ZipSink()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for rid, pdf_bytes, error in iter_rendered_exports(requisition_ids, max_workers=max_workers):
+            if error:
+                skipped[rid] = error
+                continue
+            zf.writestr(f"requisicion_{rid}.pdf", pdf_bytes)
+            yield sink.drain()
+
+        if skipped:
+            zf.writestr("omitidas.txt", _skipped_note(skipped))
+
+    yield sink.drain()
+
+
+def render_export_concatenated(requisition_ids, skipped=None, max_workers=None):
+    """
+    Un solo PDF con todas las requisiciones (en el orden de requisition_ids).
+    Devuelve (pdf_bytes, skipped) donde skipped incluye las que fallaron al renderizar.
+    """
+    ids = list(requisition_ids)
+    skipped = dict(skipped or {})
+    rendered = {}
+
+    for rid, pdf_bytes, error in iter_rendered_exports(ids, max_workers=max_workers):
+        if error:
+            skipped[rid] = error
+        else:
+            rendered[rid] = pdf_bytes
+
+    ordered = [rendered[rid] for rid in ids if rid in rendered]
+    return (concat_pdf_bytes(ordered) if ordered else b""), skipped
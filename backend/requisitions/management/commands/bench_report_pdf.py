@@ -0,0 +1,104 @@
+# backend/requisitions/management/commands/bench_report_pdf.py
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+import django
+from django.core.management.base import BaseCommand
+
+# Un departamento concentra la mitad de las requisiciones (el caso que hacía lenta la tabla única)
+_DEPT_WEIGHTS = (50, 15, 10, 8, 7, 5, 3, 2)
+_STATUSES = ("registered", "pending", "approved", "sent", "received", "completed")
+
+
+def _synthetic_requisitions(n):
+    """Requisiciones en memoria (sin BD) repartidas en departamentos de tamaño desigual."""
+    from requisitions.models import Department, Project, Requisition
+    from users.models import User
+
+    depts = [Department(code=f"D{i}", name=f"Departamento {i}") for i in range(len(_DEPT_WEIGHTS))]
+    slots = [d for d, w in zip(depts, _DEPT_WEIGHTS) for _ in range(w)]
+    projects = [Project(code=f"P{i}", description=f"Proyecto {i}") for i in range(12)]
+    users = [User(first_name=f"Nombre{i}", last_name=f"Apellido Apellido{i}") for i in range(40)]
+    t0 = datetime(2024, 1, 1)
+
+    reqs = []
+    for i in range(n):
+        reqs.append(Requisition(
+            id=i + 1,
+            user=users[i % len(users)],
+            requesting_department=slots[i % len(slots)],
+            project=projects[i % len(projects)],
+            requisition_reason=("Compra de material para prácticas de laboratorio " * (1 + i % 3)).strip(),
+            status=_STATUSES[i % len(_STATUSES)],
+            created_at=t0 + timedelta(hours=i),
+        ))
+    return reqs
+
+
+def _measure(n, chunk_rows, parallel=False, workers=0):
+    """Corre en un proceso nuevo: el pico de RSS es solo de esta medición."""
+    from django.conf import settings
+    from reports.pdf_generator import generate_requisition_report_pdf
+
+    if parallel:
+        settings.REPORTS_PDF_WORKERS = workers  # solo en este proceso de medición
+
+    reqs = _synthetic_requisitions(n)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    buffer = generate_requisition_report_pdf(reqs, filters_desc="Benchmark", chunk_rows=chunk_rows,
+                                             parallel=parallel)
+    elapsed = time.perf_counter() - t0
+    rss_peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if parallel:
+        from reports.parallel import shutdown_pool
+        shutdown_pool()
+    return elapsed, rss_peak, rss_peak - rss_before, len(buffer.getvalue())
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide generate_requisition_report_pdf (reporte detallado) con N requisiciones sintéticas: "
+        "tiempo y pico de memoria (RSS) de tablas por bloques vs. una tabla por departamento. "
+        "Cada medición corre en un proceso nuevo (no usa la base de datos)."
+    )
+
+    def add_arguments(self, parser):
+        from reports.pdf_generator import DETAIL_TABLE_CHUNK_ROWS
+
+        parser.add_argument("--sizes", default="1000,10000,50000",
+                            help="Requisiciones por corrida, separadas por coma (default: 1000,10000,50000)")
+        parser.add_argument("--chunk-rows", type=int, default=DETAIL_TABLE_CHUNK_ROWS)
+        parser.add_argument("--single-max", type=int, default=10000,
+                            help="Mide la tabla única solo hasta este tamaño (es el modo lento; default: 10000)")
+        parser.add_argument("--parallel", action="store_true",
+                            help="Mide también el modo paralelo por departamento")
+        parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1),
+                            help="Procesos del modo paralelo (REPORTS_PDF_WORKERS; default: min(4, CPUs))")
+
+    def handle(self, *args, **opts):
+        sizes = [int(x) for x in str(opts["sizes"]).split(",") if x.strip()]
+        ctx = multiprocessing.get_context("spawn")
+
+        self.stdout.write(
+            f"{'requisiciones':>13}  {'modo':<8} {'segundos':>9} {'ms/req':>8} "
+            f"{'RSS pico MB':>12} {'Δ render MB':>12} {'KB':>8}"
+        )
+        for n in sizes:
+            modes = [("bloques", opts["chunk_rows"], False)]
+            if opts["parallel"]:
+                modes.append(("paralelo", opts["chunk_rows"], True))
+            if n <= opts["single_max"]:
+                modes.append(("única", 0, False))
+            for label, chunk_rows, parallel in modes:
+                # ProcessPoolExecutor y no Pool: sus workers no son daemon y pueden abrir el pool paralelo
+                with ProcessPoolExecutor(1, mp_context=ctx, initializer=django.setup) as pool:
+                    elapsed, peak_kb, delta_kb, size = pool.submit(_measure, n, chunk_rows, parallel, opts["workers"]).result()
+                self.stdout.write(
+                    f"{n:>13}  {label:<8} {elapsed:>9.2f} {elapsed / n * 1000:>8.3f} "
+                    f"{peak_kb / 1024:>12.1f} {delta_kb / 1024:>12.1f} {size / 1024:>8.0f}"
+                )
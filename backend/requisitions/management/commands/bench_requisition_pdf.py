@@ -0,0 +1,83 @@
+# backend/requisitions/management/commands/bench_requisition_pdf.py
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+from django.core.management.base import BaseCommand
+
+from requisitions.models import (
+    Department, Project, FundingSource, BudgetUnit, Agreement,
+    Tender, ExternalService, UnitOfMeasurement, Product, ItemDescription,
+    RequisitionItem,
+)
+from requisitions.pdf_generator import generate_requisition_pdf, ITEMS_CHUNK_ROWS
+
+
+def _synthetic_requisition(n_items):
+    """Requisición en memoria (sin BD) con n_items renglones de texto variado."""
+    unit = UnitOfMeasurement(name="Pieza")
+    items = []
+    for i in range(n_items):
+        product = Product(description=f"{2110 + i % 40} Materiales y útiles de oficina {i % 40}")
+        desc = ItemDescription(
+            product=product,
+            text=("Hojas blancas tamaño carta " * (1 + i % 4)).strip() + f" #{i}",
+        )
+        qty = 1 + i % 12
+        items.append(RequisitionItem(
+            product=product, unit=unit, description=desc, quantity=qty,
+            estimated_unit_cost=Decimal("125.50"), estimated_total=Decimal("125.50") * qty,
+        ))
+
+    return SimpleNamespace(
+        pk=0, id=0,
+        administrative_unit="4400 FACULTAD DE INGENIERIA",
+        user=SimpleNamespace(full_name="Usuario de Prueba"),
+        requesting_department=Department(code="D1", name="Departamento"),
+        project=Project(code="P1", description="Proyecto"),
+        funding_source=FundingSource(code="F1", description="Fuente"),
+        budget_unit=BudgetUnit(code="B1", description="Unidad"),
+        agreement=Agreement(code="A1", description="Convenio"),
+        tender=Tender(name="Licitación"),
+        external_service=ExternalService(name="Servicio"),
+        created_at=None,
+        requisition_reason="Benchmark",
+        observations="",
+        items=SimpleNamespace(all=lambda: items),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide generate_requisition_pdf con N renglones sintéticos: "
+        "tabla única vs. sub-tablas por bloques (no usa la base de datos)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", default="100,250,500,1000,2000",
+                            help="Tamaños separados por coma (default: 100,250,500,1000,2000)")
+        parser.add_argument("--repeat", type=int, default=1, help="Repeticiones por medición (se toma la mejor)")
+        parser.add_argument("--chunk-rows", type=int, default=ITEMS_CHUNK_ROWS)
+        parser.add_argument("--skip-single", action="store_true",
+                            help="No medir el modo de tabla única (es el lento en N grande)")
+
+    def handle(self, *args, **opts):
+        sizes = [int(x) for x in str(opts["rows"]).split(",") if x.strip()]
+        modes = [("bloques", opts["chunk_rows"])]
+        if not opts["skip_single"]:
+            modes.append(("única", 0))
+
+        self.stdout.write(f"{'renglones':>9}  {'modo':<8} {'segundos':>9} {'ms/renglón':>11} {'KB':>8}")
+        for n in sizes:
+            req = _synthetic_requisition(n)
+            for label, chunk_rows in modes:
+                best = None
+                size = 0
+                for _ in range(max(1, opts["repeat"])):
+                    t0 = time.perf_counter()
+                    size = len(generate_requisition_pdf(req, chunk_rows=chunk_rows).getvalue())
+                    elapsed = time.perf_counter() - t0
+                    best = elapsed if best is None else min(best, elapsed)
+                self.stdout.write(
+                    f"{n:>9}  {label:<8} {best:>9.3f} {best / n * 1000:>11.3f} {size / 1024:>8.0f}"
+                )
@@ -0,0 +1,62 @@
+# backend/requisitions/management/commands/build_report_archive.py
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.archive import ARCHIVE_KINDS, build_archive, closed_months, current_month
+from reports.charts import chart_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los PDF de resumen y detallado de los meses cerrados (ReportArchive) para que "
+        "summary-pdf / requisitions-report los sirvan sin generarlos en vivo. "
+        "Pensado para cron nocturno: solo regenera los meses cuyos datos cambiaron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", action="append", dest="months",
+                            help="Mes(es) YYYY-MM a generar (default: todos los meses cerrados con datos)")
+        parser.add_argument("--kind", choices=ARCHIVE_KINDS, action="append", dest="kinds",
+                            help="summary y/o detailed (default: ambos)")
+        parser.add_argument("--charts", help="vector o png (default: REPORTS_CHART_BACKEND)")
+        parser.add_argument("--force", action="store_true", help="Regenera aunque el archivo esté vigente")
+
+    def handle(self, *args, **opts):
+        charts = chart_backend(opts["charts"]) if opts["charts"] else None
+        if opts["charts"] and charts is None:
+            raise CommandError("--charts debe ser vector o png.")
+
+        if opts["months"]:
+            months = []
+            for raw in opts["months"]:
+                try:
+                    month = datetime.strptime(raw, "%Y-%m").date()
+                except ValueError:
+                    raise CommandError(f"Mes inválido: {raw}. Usa YYYY-MM.")
+                if month >= current_month():
+                    raise CommandError(f"{raw} no es un mes cerrado; el mes en curso se genera en vivo.")
+                months.append(month)
+        else:
+            months = closed_months()
+
+        kinds = opts["kinds"] or list(ARCHIVE_KINDS)
+        t0 = time.perf_counter()
+        built = reused = 0
+        for month in months:
+            for kind in kinds:
+                archive, was_built = build_archive(kind, month, charts=charts, force=opts["force"])
+                if was_built:
+                    built += 1
+                    self.stdout.write(
+                        f"  {month:%Y-%m} {kind:<9} {archive.requisition_count:>6} req. "
+                        f"{archive.size / 1024:>8.1f} KB  {archive.render_seconds:.2f}s"
+                    )
+                else:
+                    reused += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archivo de reportes: {built} generados, {reused} vigentes, "
+            f"{len(months)} meses en {time.perf_counter() - t0:.2f}s"
+        ))
@@ -0,0 +1,95 @@
+# backend/requisitions/management/commands/importtime.py
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Librerías que NO deberían cargarse al arrancar un worker (solo al generar PDFs/gráficas/Excel)
+HEAVY_LIBS = ("matplotlib", "reportlab", "pypdf", "PyPDF2", "PIL", "openpyxl", "numpy")
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+_PROBE = """
+import resource, sys, django
+django.setup()
+import importlib
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+print("RSS_KB=%d" % resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+print("HEAVY=" + ",".join(m for m in {heavy!r} if m in sys.modules))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo de arranque de un worker: ejecuta django.setup() + import del URLconf "
+        "en un proceso limpio con `python -X importtime` y agrupa el tiempo por app/paquete."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--module", action="append", dest="modules",
+                            help="Módulo(s) a importar después de django.setup() (default: ROOT_URLCONF)")
+        parser.add_argument("--top", type=int, default=15, help="Paquetes de terceros a listar (default: 15)")
+
+    def handle(self, *args, **opts):
+        modules = opts["modules"] or [settings.ROOT_URLCONF]
+        probe = _PROBE.format(heavy=HEAVY_LIBS)
+
+        env = dict(os.environ)
+        env["DJANGO_SETTINGS_MODULE"] = os.environ.get("DJANGO_SETTINGS_MODULE", "core.settings")
+        env["PYTHONPATH"] = os.pathsep.join(p for p in [str(settings.BASE_DIR), env.get("PYTHONPATH", "")] if p)
+
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe, *modules],
+            capture_output=True, text=True, env=env, cwd=str(settings.BASE_DIR),
+        )
+        if proc.returncode != 0:
+            self.stderr.write(proc.stderr[-2000:])
+            return
+
+        self_us = defaultdict(int)      # tiempo propio por paquete de primer nivel
+        cumulative_us = {}               # tiempo acumulado por módulo
+        for line in proc.stderr.splitlines():
+            m = _LINE.match(line)
+            if not m:
+                continue
+            own, cum, _, name = int(m.group(1)), int(m.group(2)), m.group(3), m.group(4)
+            self_us[name.split(".")[0]] += own
+            cumulative_us[name] = max(cumulative_us.get(name, 0), cum)
+
+        probe_out = dict(
+            line.split("=", 1) for line in proc.stdout.splitlines() if line.startswith(("RSS_KB=", "HEAVY="))
+        )
+        max_rss_kb = int(probe_out.get("RSS_KB") or 0)
+        heavy_loaded = [m for m in probe_out.get("HEAVY", "").split(",") if m]
+
+        apps = [a.split(".")[0] for a in settings.INSTALLED_APPS]
+        local_apps = [a for a in apps if os.path.isdir(os.path.join(settings.BASE_DIR, a))]
+        total_us = sum(self_us.values())
+
+        self.stdout.write(f"Importado: {', '.join(modules)}")
+        self.stdout.write(f"Tiempo total de import: {total_us / 1000:.1f} ms · RSS máx.: {max_rss_kb / 1024:.1f} MB\n")
+
+        self.stdout.write("Apps del proyecto (acumulado: incluye lo que cada módulo arrastra)")
+        for app in local_apps:
+            mods = {n: c for n, c in cumulative_us.items() if n == app or n.startswith(app + ".")}
+            if not mods:
+                continue
+            worst = sorted(mods.items(), key=lambda kv: -kv[1])[:3]
+            detail = ", ".join(f"{n} {c / 1000:.1f}" for n, c in worst)
+            self.stdout.write(f"  {app:<16} propio {self_us.get(app, 0) / 1000:>7.1f} ms   [{detail}]")
+
+        self.stdout.write(f"\nPaquetes (tiempo propio, top {opts['top']})")
+        for name, us in sorted(self_us.items(), key=lambda kv: -kv[1])[:opts["top"]]:
+            self.stdout.write(f"  {name:<24} {us / 1000:>8.1f} ms")
+
+        if heavy_loaded:
+            self.stdout.write(self.style.WARNING(
+                "\nLibrerías pesadas cargadas al arrancar: " + ", ".join(heavy_loaded)
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nNinguna librería pesada se carga al arrancar."))
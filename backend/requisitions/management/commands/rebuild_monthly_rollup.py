@@ -0,0 +1,20 @@
+# backend/requisitions/management/commands/rebuild_monthly_rollup.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from requisitions.rollup import rebuild_rollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye RequisitionMonthlyRollup (mes × departamento × estatus) desde las tablas base. "
+        "Útil tras cargas masivas (loaddata) o si se sospecha desajuste."
+    )
+
+    def handle(self, *args, **opts):
+        t0 = time.perf_counter()
+        n = rebuild_rollup()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rollup reconstruido: {n} buckets en {time.perf_counter() - t0:.2f}s"
+        ))
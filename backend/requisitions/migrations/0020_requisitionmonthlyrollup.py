@@ -0,0 +1,68 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:20
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollup(apps, schema_editor):
+    Requisition = apps.get_model('requisitions', 'Requisition')
+    RequisitionItem = apps.get_model('requisitions', 'RequisitionItem')
+    Rollup = apps.get_model('requisitions', 'RequisitionMonthlyRollup')
+
+    def _month(value):
+        return value.date() if hasattr(value, 'date') else value
+
+    estimated = {
+        (_month(r['month']), r['requisition__requesting_department_id'], r['requisition__status']): r['total']
+        for r in (
+            RequisitionItem.objects.order_by()
+            .annotate(month=TruncMonth('requisition__created_at'))
+            .values('month', 'requisition__requesting_department_id', 'requisition__status')
+            .annotate(total=Sum('estimated_total'))
+        )
+    }
+    rows = []
+    for r in (
+        Requisition.objects.order_by()
+        .annotate(month=TruncMonth('created_at'))
+        .values('month', 'requesting_department_id', 'status')
+        .annotate(count=Count('id'), real_sum=Sum('real_amount'))
+    ):
+        key = (_month(r['month']), r['requesting_department_id'], r['status'])
+        rows.append(Rollup(
+            month=key[0], department_id=key[1], status=key[2], count=r['count'],
+            estimated_sum=estimated.get(key) or Decimal('0.00'),
+            real_sum=r['real_sum'] or Decimal('0.00'),
+        ))
+    Rollup.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requisitions', '0019_requisitionitem_manual_description_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequisitionMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('registered', 'Registered'), ('completed', 'Completed'), ('sent', 'Sent to Central Unit'), ('received', 'Received by Admin Office'), ('cancelled', 'Cancelled')], max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('estimated_sum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('real_sum', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to='requisitions.department')),
+            ],
+            options={
+                'ordering': ['month', 'department_id', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('month', 'department', 'status'), name='uniq_rollup_month_department_status')],
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.5 on 2026-10-19 15:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requisitions', '0020_requisitionmonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportArchive',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('summary', 'Resumen'), ('detailed', 'Detallado')], max_length=20)),
+                ('month', models.DateField()),
+                ('charts', models.CharField(default='vector', max_length=10)),
+                ('file', models.FileField(upload_to='reports/archive/%Y/')),
+                ('size', models.PositiveIntegerField(default=0)),
+                ('requisition_count', models.PositiveIntegerField(default=0)),
+                ('source_stamp', models.CharField(max_length=64)),
+                ('render_seconds', models.FloatField(default=0)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-month', 'kind'],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'month'), name='uniq_report_archive_kind_month')],
+            },
+        ),
+    ]
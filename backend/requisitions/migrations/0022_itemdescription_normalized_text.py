@@ -0,0 +1,79 @@
+# Autocompletado de ItemDescription: texto normalizado + índices trigram / prefijo (PostgreSQL)
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _search_text(value):
+    # copia congelada de requisitions.models.search_text
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value).strip().lower())
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"[^a-z0-9\s]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def populate_normalized_text(apps, schema_editor):
+    ItemDescription = apps.get_model('requisitions', 'ItemDescription')
+    batch = []
+    for desc in ItemDescription.objects.only('id', 'text').iterator(chunk_size=2000):
+        desc.normalized_text = _search_text(desc.text)
+        batch.append(desc)
+        if len(batch) >= 2000:
+            ItemDescription.objects.bulk_update(batch, ['normalized_text'])
+            batch = []
+    if batch:
+        ItemDescription.objects.bulk_update(batch, ['normalized_text'])
+
+
+# - GIN gin_trgm_ops: LIKE '%q%' (q de 3+ caracteres) sin recorrer la tabla
+# - btree COLLATE "C" (texto ASCII: mismo orden): LIKE 'q%' + ORDER BY en el índice,
+#   la consulta corta en el LIMIT; con producto, (product_id, texto)
+_PG_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS itemdesc_normtext_trgm "
+    "ON requisitions_itemdescription USING gin (normalized_text gin_trgm_ops)",
+    'CREATE INDEX IF NOT EXISTS itemdesc_normtext_prefix '
+    'ON requisitions_itemdescription ((normalized_text COLLATE "C"))',
+    'CREATE INDEX IF NOT EXISTS itemdesc_product_normtext_prefix '
+    'ON requisitions_itemdescription (product_id, (normalized_text COLLATE "C"))',
+]
+_PG_BACKWARD = [
+    "DROP INDEX IF EXISTS itemdesc_product_normtext_prefix",
+    "DROP INDEX IF EXISTS itemdesc_normtext_prefix",
+    "DROP INDEX IF EXISTS itemdesc_normtext_trgm",
+]
+
+
+def create_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in _PG_FORWARD:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in _PG_BACKWARD:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('requisitions', '0021_reportarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemdescription',
+            name='normalized_text',
+            field=models.CharField(default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(populate_normalized_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -1,5 +1,7 @@
 from decimal import Decimal
 import os
+import re
+import unicodedata
 import uuid
 
 from django.conf import settings
@@ -80,10 +82,23 @@ class Product(models.Model):
         return self.description
 
 
+def search_text(value) -> str:
+    """Texto para búsqueda: minúsculas, sin acentos ni signos, espacios colapsados."""
+    if not value:
+        return ""
+    s = unicodedata.normalize("NFKD", str(value).strip().lower())
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = re.sub(r"[^a-z0-9\s]+", " ", s)
+    return re.sub(r"\s+", " ", s).strip()
+
+
 class ItemDescription(models.Model):
     product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='descriptions')
     text = models.CharField(max_length=255)
 
+    # ✅ search_text(text): autocompletado sin acentos (índices trigram/prefijo en la migración 0022)
+    normalized_text = models.CharField(max_length=255, default="", editable=False)
+
     # ✅ costo estimado unitario (catálogo de precios)
     estimated_unit_cost = models.DecimalField(
         max_digits=12,
@@ -111,6 +126,13 @@ class ItemDescription(models.Model):
             ),
         ]
 
+    def save(self, *args, **kwargs):
+        self.normalized_text = search_text(self.text)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "text" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "normalized_text"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.product.description} – {self.text}"
 
@@ -176,6 +198,65 @@ class Requisition(models.Model):
         return f"Req #{self.id} by {getattr(self.user, 'full_name', self.user)}"
 
 
+class RequisitionMonthlyRollup(models.Model):
+    """
+    Acumulado por (mes, departamento, estatus) para los reportes agregados.
+    Se mantiene en la misma transacción que la escritura de la requisición
+    (ver requisitions/rollup.py); `manage.py rebuild_monthly_rollup` lo reconstruye.
+    """
+    month = models.DateField()  # primer día del mes (zona horaria local)
+    department = models.ForeignKey(Department, on_delete=models.CASCADE, related_name="monthly_rollups")
+    status = models.CharField(max_length=50, choices=Requisition.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+    estimated_sum = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    real_sum = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["month", "department_id", "status"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["month", "department", "status"],
+                name="uniq_rollup_month_department_status",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.month:%Y-%m} · {self.department_id} · {self.status}: {self.count}"
+
+
+class ReportArchive(models.Model):
+    """
+    PDF de reportes pre-generado para un mes cerrado (ver reports/archive.py).
+    `manage.py build_report_archive` lo genera; source_stamp es la huella del rollup
+    y de las etiquetas (catálogos / usuarios) del mes al generarlo: si ya no
+    coincide, el reporte se vuelve a generar en vivo.
+    """
+    KIND_CHOICES = [
+        ("summary", "Resumen"),
+        ("detailed", "Detallado"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    month = models.DateField()  # primer día del mes (zona horaria local)
+    charts = models.CharField(max_length=10, default="vector")
+    file = models.FileField(upload_to="reports/archive/%Y/")
+    size = models.PositiveIntegerField(default=0)
+    requisition_count = models.PositiveIntegerField(default=0)
+    source_stamp = models.CharField(max_length=64)
+    render_seconds = models.FloatField(default=0)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-month", "kind"]
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "month"], name="uniq_report_archive_kind_month"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.month:%Y-%m}"
+
+
 class RequisitionRealAmountLog(models.Model):
     """
     Auditoría inmutable de cambios del monto real (quién/cuándo/antes/después/por qué).
@@ -1,17 +1,18 @@
 # sistema-adquisiciones/backend/requisitions/pdf_generator.py
-import os
 from io import BytesIO
 from datetime import datetime
 from decimal import Decimal, ROUND_HALF_UP
 
-from django.conf import settings
+from django.db.models import Prefetch
 from reportlab.lib.pagesizes import letter
 from reportlab.lib import colors
 from reportlab.platypus import (
     SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, KeepTogether
 )
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+
+from catalogs.cache import with_catalogs
+from .models import Requisition, RequisitionItem
+from .pdf_template import requisition_styles, draw_logo, fast_cell
 
 # ---------- helpers ----------
 _PLACEHOLDER_SUBSTRINGS = {
@@ -175,8 +176,196 @@ def _label_description(desc):
     text = _as_text(desc, ['text', 'descripcion', 'name', 'label']) or _as_text(desc)
     return text or '—'
 
+# ---------- loader (header + items in two queries, catalog labels from catalogs.cache) ----------
+PDF_HEADER_RELATED = (
+    'user',
+    'requesting_department',
+    'project',
+    'funding_source',
+    'budget_unit',
+    'agreement',
+    'tender',
+    'external_service',
+)
+
+def requisition_pdf_queryset():
+    # catalog FKs (department, project, ..., unit) are not joined: they come from catalogs.cache
+    items_qs = with_catalogs(
+        RequisitionItem.objects
+        .select_related('product', 'description')
+        .order_by('id')
+    )
+    return with_catalogs(
+        Requisition.objects
+        .select_related('user')
+        .prefetch_related(Prefetch('items', queryset=items_qs))
+    )
+
+def load_requisition_for_pdf(requisition_or_pk):
+    """Requisition with everything the PDF touches: 1 query for the header, 1 for the items."""
+    pk = getattr(requisition_or_pk, 'pk', requisition_or_pk)
+    return requisition_pdf_queryset().get(pk=pk)
+
+# ---------- items table ----------
+# Large requisitions: items split into fixed-size sub-tables (each with its header),
+# so ReportLab's layout/split cost stays ~linear in the number of rows.
+ITEMS_CHUNK_ROWS = 50
+CHUNKED_MODE_MIN_ROWS = 100
+
+# Row rendered when the items could not be read (kept from the original behavior)
+_FAILED_ROW = ('—', '—', '—', '—', '—', '—')
+
+def _item_rows(requisition):
+    """
+    Returns (rows, grand_total). Each row is a tuple of display strings:
+    (objeto del gasto, cantidad, unidad, descripción, costo unitario, total).
+    """
+    rows = []
+    grand_total = Decimal("0.00")
+
+    try:
+        for item in requisition.items.all():
+            prod_label = _label_expense_object(_get(item, 'product')) or '—'
+            unit_label = _label_unit(_get(item, 'unit')) or '—'
+
+            manual = _as_text(_get(item, "manual_description"))
+            desc_label = manual or (_label_description(_get(item, 'description')) or '—')
+
+            # quantity as Decimal (for calculations)
+            qty_raw = _get(item, 'quantity')
+            qty_dec = _d(qty_raw) or Decimal("0")
+
+            # pretty quantity string
+            try:
+                if qty_raw is None:
+                    qty_str = '—'
+                elif float(qty_raw).is_integer():
+                    qty_str = str(int(float(qty_raw)))
+                else:
+                    qty_str = str(qty_raw)
+            except Exception:
+                qty_str = _as_text(qty_raw) or '—'
+
+            est_unit = _d(_get(item, 'estimated_unit_cost'))
+            est_total = _d(_get(item, 'estimated_total'))
+
+            # Si no hay total pero sí hay unitario -> calcular total
+            if (est_total is None or est_total <= 0) and qty_dec > 0 and est_unit is not None and est_unit > 0:
+                est_total = (qty_dec * est_unit).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+            # Si no hay unitario, pero sí hay total -> calcular unitario
+            if (est_unit is None or est_unit <= 0) and qty_dec > 0 and est_total is not None and est_total > 0:
+                est_unit = (est_total / qty_dec).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+            # defaults for display/sum
+            est_total_sum = est_total if est_total is not None else Decimal("0.00")
+            grand_total += est_total_sum
+
+            rows.append((prod_label, qty_str, unit_label, desc_label, money_mxn(est_unit), money_mxn(est_total)))
+    except Exception:
+        rows.append(_FAILED_ROW)
+
+    return rows, grand_total
+
+def _items_col_widths(doc_width):
+    # Column widths (must add up to doc.width)
+    col0 = 140  # Objeto del gasto
+    col1 = 45   # Cantidad
+    col2 = 55   # Unidad
+    col4 = 60   # Unitario
+    col5 = 60   # Total
+    col3 = max(120, doc_width - (col0 + col1 + col2 + col4 + col5))  # Descripción (flex)
+    return [col0, col1, col2, col3, col4, col5]
+
+def _items_header_row(st):
+    return [
+        Paragraph("Objeto del Gasto", st.th_left),
+        Paragraph("Cantidad", st.th_center),
+        Paragraph("Unidad", st.th_center),
+        Paragraph("Descripción", st.th_left),
+        Paragraph("Costo unitario (MXN)", st.th_right),
+        Paragraph("Total (MXN)", st.th_right),
+    ]
+
+def _items_total_row(st, grand_total):
+    return [
+        Paragraph("", st.cell_left),
+        Paragraph("", st.cell_center),
+        Paragraph("", st.cell_center),
+        Paragraph("TOTAL", st.total_lbl),
+        Paragraph("", st.cell_right),
+        Paragraph(_escape(money_mxn(grand_total)), st.total_val),
+    ]
+
+def _items_table_style(has_total_row, plain_body=False):
+    body_end = -2 if has_total_row else -1
+    cmds = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
+
+        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+
+        ('ALIGN', (1, 1), (2, body_end), 'CENTER'),   # Cantidad + Unidad (body rows)
+        ('ALIGN', (4, 1), (5, -1), 'RIGHT'),    # montos
+        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+        ('ALIGN', (3, 1), (3, -1), 'LEFT'),
+
+        ('LEFTPADDING', (0, 0), (-1, -1), 4),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]
+    if plain_body:
+        # plain-string cells must look like the 'small' Paragraph style
+        cmds += [
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 1), (-1, -1), 9),
+            ('LEADING', (0, 1), (-1, -1), 11),
+        ]
+    if has_total_row:
+        cmds += [
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+            ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+        ]
+    return cmds
+
+def _chunked_items_tables(item_rows, grand_total, col_widths, st, chunk_rows):
+    left = (st.cell_left, st.cell_left_words)
+    center = (st.cell_center, st.cell_center_words)
+    right = (st.cell_right, st.cell_right_words)
+    styles_by_col = (left, center, center, left, right, right)
+    tables = []
+    n = len(item_rows)
+
+    for start in range(0, max(n, 1), chunk_rows):
+        data = [_items_header_row(st)]
+        for row in item_rows[start:start + chunk_rows]:
+            data.append([
+                fast_cell(text, styles_by_col[i], col_widths[i]) for i, text in enumerate(row)
+            ])
+
+        is_last = start + chunk_rows >= n
+        if is_last:
+            data.append(_items_total_row(st, grand_total))
+
+        table = Table(data, colWidths=col_widths, repeatRows=1)
+        table.setStyle(TableStyle(_items_table_style(has_total_row=is_last, plain_body=True)))
+        tables.append(table)
+
+    return tables
+
 # ---------- generator (now using Platypus so the items table can split across pages) ----------
-def generate_requisition_pdf(requisition):
+def generate_requisition_pdf(requisition, chunk_rows=None):
+    """
+    Accepts a Requisition (ideally from load_requisition_for_pdf) or its pk.
+    chunk_rows: None = auto (chunked tables from CHUNKED_MODE_MIN_ROWS items on),
+                0 = always one single items table, N = sub-tables of N rows.
+    """
+    if not hasattr(requisition, 'pk'):
+        requisition = load_requisition_for_pdf(requisition)
+
     buffer = BytesIO()
 
     # Page geometry
@@ -188,22 +377,17 @@ def generate_requisition_pdf(requisition):
     bottom_margin = 100
     line_height = 16
 
-    # Styles
-    styles = getSampleStyleSheet()
-    base = styles['Normal']
-    h1 = ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=14, spaceAfter=6)
-    small = ParagraphStyle('small', parent=base, fontName='Helvetica', fontSize=9, leading=11)
-    normal = ParagraphStyle('normal', parent=base, fontName='Helvetica', fontSize=10, leading=12)
-    bold = ParagraphStyle('bold', parent=normal, fontName='Helvetica-Bold')
-    cell_left = ParagraphStyle('CellLeft', parent=small, wordWrap='CJK', alignment=TA_LEFT)
-    cell_center = ParagraphStyle('CellCenter', parent=small, wordWrap='CJK', alignment=TA_CENTER)
-    cell_right = ParagraphStyle('CellRight', parent=small, wordWrap='CJK', alignment=TA_RIGHT)
-    sig_title = ParagraphStyle('SigTitle', parent=base, fontName='Helvetica-Bold', fontSize=10, alignment=TA_CENTER)
-    sig_name = ParagraphStyle('SigName', parent=base, fontName='Helvetica', fontSize=9, alignment=TA_CENTER)
+    # Styles (built once per process, see pdf_template)
+    st = requisition_styles()
+    normal = st.normal
+    bold = st.bold
+    cell_left = st.cell_left
+    cell_center = st.cell_center
+    cell_right = st.cell_right
+    sig_title = st.sig_title
+    sig_name = st.sig_name
 
     # Header/footer drawing (repeats on all pages)
-    logo_path = os.path.join(settings.BASE_DIR, 'staticfiles', 'uach_logo.png')
-
     admin_unit = _as_text(_get(requisition, 'administrative_unit'),
                           ['code', 'clave', 'codigo', 'name', 'nombre', 'description', 'descripcion', 'label'])
     user = _get(requisition, 'user')
@@ -219,13 +403,8 @@ def generate_requisition_pdf(requisition):
         c.drawString(left_margin, page_h - 50, "Sistema Integral de Adquisiciones FING")
         c.setFont("Helvetica", 12)
         c.drawString(left_margin, page_h - 70, "Universidad Autónoma de Chihuahua - Requisición")
-        # Logo
-        try:
-            if os.path.exists(logo_path):
-                c.drawImage(logo_path, x=page_w - right_margin - 100, y=page_h - 80,
-                            width=100, height=50, preserveAspectRatio=True, mask='auto')
-        except Exception:
-            pass
+        # Logo (shared form XObject: embedded once per document)
+        draw_logo(c, x=page_w - right_margin - 100, y=page_h - 80, width=100, height=50)
         # Separator line
         c.line(left_margin, page_h - 90, page_w - right_margin, page_h - 90)
 
@@ -308,112 +487,34 @@ def generate_requisition_pdf(requisition):
     story.append(Spacer(1, 12))
 
     # ---- Items table (SPLITS ACROSS PAGES) ----
-    items_data = [[
-        Paragraph("Objeto del Gasto", ParagraphStyle('th', parent=bold, alignment=TA_LEFT)),
-        Paragraph("Cantidad", ParagraphStyle('th2', parent=bold, alignment=TA_CENTER)),
-        Paragraph("Unidad", ParagraphStyle('th3', parent=bold, alignment=TA_CENTER)),
-        Paragraph("Descripción", ParagraphStyle('th4', parent=bold, alignment=TA_LEFT)),
-        Paragraph("Costo unitario (MXN)", ParagraphStyle('th5', parent=bold, alignment=TA_RIGHT)),
-        Paragraph("Total (MXN)", ParagraphStyle('th6', parent=bold, alignment=TA_RIGHT)),
-    ]]
-
-    grand_total = Decimal("0.00")
-
-    try:
-        for item in requisition.items.all():
-            prod_label = _label_expense_object(_get(item, 'product')) or '—'
-            unit_label = _label_unit(_get(item, 'unit')) or '—'
-
-            manual = _as_text(_get(item, "manual_description"))
-            desc_label = manual or (_label_description(_get(item, 'description')) or '—')
-
-            # quantity as Decimal (for calculations)
-            qty_raw = _get(item, 'quantity')
-            qty_dec = _d(qty_raw) or Decimal("0")
-
-            # pretty quantity string
-            try:
-                if qty_raw is None:
-                    qty_str = '—'
-                elif float(qty_raw).is_integer():
-                    qty_str = str(int(float(qty_raw)))
-                else:
-                    qty_str = str(qty_raw)
-            except Exception:
-                qty_str = _as_text(qty_raw) or '—'
-
-            est_unit = _d(_get(item, 'estimated_unit_cost'))
-            est_total = _d(_get(item, 'estimated_total'))
-
-            # Si no hay total pero sí hay unitario -> calcular total
-            if (est_total is None or est_total <= 0) and qty_dec > 0 and est_unit is not None and est_unit > 0:
-                est_total = (qty_dec * est_unit).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-            # Si no hay unitario, pero sí hay total -> calcular unitario
-            if (est_unit is None or est_unit <= 0) and qty_dec > 0 and est_total is not None and est_total > 0:
-                est_unit = (est_total / qty_dec).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-
-            # defaults for display/sum
-            est_total_sum = est_total if est_total is not None else Decimal("0.00")
-            grand_total += est_total_sum
-
+    item_rows, grand_total = _item_rows(requisition)
+
+    if chunk_rows is None:
+        chunk_rows = ITEMS_CHUNK_ROWS if len(item_rows) >= CHUNKED_MODE_MIN_ROWS else 0
+
+    col_widths = _items_col_widths(doc.width)
+    if chunk_rows:
+        story.extend(_chunked_items_tables(item_rows, grand_total, col_widths, st, chunk_rows))
+    else:
+        items_data = [_items_header_row(st)]
+        for row in item_rows:
+            if row is _FAILED_ROW:
+                items_data.append(list(row))
+                continue
+            prod_label, qty_str, unit_label, desc_label, unit_cost, total = row
             items_data.append([
                 Paragraph(_escape(prod_label), cell_left),
                 Paragraph(_escape(qty_str), cell_center),
                 Paragraph(_escape(unit_label), cell_center),
                 Paragraph(_escape(desc_label), cell_left),
-                Paragraph(_escape(money_mxn(est_unit)), cell_right),
-                Paragraph(_escape(money_mxn(est_total)), cell_right),
+                Paragraph(_escape(unit_cost), cell_right),
+                Paragraph(_escape(total), cell_right),
             ])
-    except Exception:
-        items_data.append(['—', '—', '—', '—', '—', '—'])
-
-    # Fila TOTAL
-    items_data.append([
-        Paragraph("", cell_left),
-        Paragraph("", cell_center),
-        Paragraph("", cell_center),
-        Paragraph("TOTAL", ParagraphStyle('total_lbl', parent=bold, alignment=TA_RIGHT)),
-        Paragraph("", cell_right),
-        Paragraph(_escape(money_mxn(grand_total)), ParagraphStyle('total_val', parent=bold, alignment=TA_RIGHT)),
-    ])
-
-    # Column widths (must add up to doc.width)
-    col0 = 140  # Objeto del gasto
-    col1 = 45   # Cantidad
-    col2 = 55   # Unidad
-    col4 = 60   # Unitario
-    col5 = 60   # Total
-    col3 = max(120, doc.width - (col0 + col1 + col2 + col4 + col5))  # Descripción (flex)
-
-    items_table = Table(
-        items_data,
-        colWidths=[col0, col1, col2, col3, col4, col5],
-        repeatRows=1
-    )
-    items_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 6),
-
-        ('VALIGN', (0, 1), (-1, -1), 'TOP'),
-
-        ('ALIGN', (1, 1), (2, -2), 'CENTER'),   # Cantidad + Unidad (body rows)
-        ('ALIGN', (4, 1), (5, -1), 'RIGHT'),    # montos
-        ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-        ('ALIGN', (3, 1), (3, -1), 'LEFT'),
-
-        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
-    ]))
+        items_data.append(_items_total_row(st, grand_total))
 
-    story.append(items_table)
+        items_table = Table(items_data, colWidths=col_widths, repeatRows=1)
+        items_table.setStyle(TableStyle(_items_table_style(has_total_row=True)))
+        story.append(items_table)
     story.append(Spacer(1, 8))
 
     story.append(Paragraph(f"<b>Total requisición:</b> {money_mxn(grand_total)}", normal))
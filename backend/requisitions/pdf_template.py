@@ -0,0 +1,147 @@
+# backend/requisitions/pdf_template.py
+"""
+Recursos compartidos de las plantillas PDF (requisición y reportes).
+
+Todo se construye UNA vez por proceso y se reutiliza entre requests:
+  - hojas de estilo (ParagraphStyle)
+  - logo institucional decodificado (ImageReader)
+Las fuentes usadas son las estándar de PDF (Helvetica), no requieren registro.
+"""
+import os
+from functools import lru_cache
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+
+def logo_path():
+    """Logo desde las fuentes de estáticos (STATICFILES_DIRS); si no, desde la salida de collectstatic."""
+    from django.contrib.staticfiles import finders
+    return finders.find('uach_logo.png') or os.path.join(settings.STATIC_ROOT, 'uach_logo.png')
+
+
+# ---------- estilos ----------
+@lru_cache(maxsize=None)
+def sample_styles():
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def requisition_styles():
+    """Estilos del PDF de requisición (portrait)."""
+    styles = sample_styles()
+    base = styles['Normal']
+    small = ParagraphStyle('small', parent=base, fontName='Helvetica', fontSize=9, leading=11)
+    normal = ParagraphStyle('normal', parent=base, fontName='Helvetica', fontSize=10, leading=12)
+    bold = ParagraphStyle('bold', parent=normal, fontName='Helvetica-Bold')
+    return SimpleNamespace(
+        h1=ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=14, spaceAfter=6),
+        small=small,
+        normal=normal,
+        bold=bold,
+        cell_left=ParagraphStyle('CellLeft', parent=small, wordWrap='CJK', alignment=TA_LEFT),
+        cell_center=ParagraphStyle('CellCenter', parent=small, wordWrap='CJK', alignment=TA_CENTER),
+        cell_right=ParagraphStyle('CellRight', parent=small, wordWrap='CJK', alignment=TA_RIGHT),
+        # word-wrap variants (no per-character CJK split): used when every word fits the column
+        cell_left_words=ParagraphStyle('CellLeftWords', parent=small, alignment=TA_LEFT),
+        cell_center_words=ParagraphStyle('CellCenterWords', parent=small, alignment=TA_CENTER),
+        cell_right_words=ParagraphStyle('CellRightWords', parent=small, alignment=TA_RIGHT),
+        th_left=ParagraphStyle('th', parent=bold, alignment=TA_LEFT),
+        th_center=ParagraphStyle('th2', parent=bold, alignment=TA_CENTER),
+        th_right=ParagraphStyle('th5', parent=bold, alignment=TA_RIGHT),
+        total_lbl=ParagraphStyle('total_lbl', parent=bold, alignment=TA_RIGHT),
+        total_val=ParagraphStyle('total_val', parent=bold, alignment=TA_RIGHT),
+        sig_title=ParagraphStyle('SigTitle', parent=base, fontName='Helvetica-Bold', fontSize=10, alignment=TA_CENTER),
+        sig_name=ParagraphStyle('SigName', parent=base, fontName='Helvetica', fontSize=9, alignment=TA_CENTER),
+    )
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Estilos de los reportes (detallado + portada dashboard + resumen)."""
+    styles = sample_styles()
+    base = styles['Normal']
+    small = ParagraphStyle('small', parent=base, fontName='Helvetica', fontSize=9, leading=11)
+    normal = ParagraphStyle('normal', parent=base, fontName='Helvetica', fontSize=10, leading=12)
+    return SimpleNamespace(
+        h1=ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=14, spaceAfter=6),
+        small=small,
+        normal=normal,
+        bold=ParagraphStyle('bold', parent=normal, fontName='Helvetica-Bold'),
+        cell_left=ParagraphStyle('CellLeft', parent=small, wordWrap='CJK', alignment=TA_LEFT),
+        cell_center=ParagraphStyle('CellCenter', parent=small, wordWrap='CJK', alignment=TA_CENTER),
+        cell_left_words=ParagraphStyle('CellLeftWords', parent=small, alignment=TA_LEFT),
+        cell_center_words=ParagraphStyle('CellCenterWords', parent=small, alignment=TA_CENTER),
+        title=ParagraphStyle('title', parent=styles['Heading2'], alignment=TA_LEFT, fontSize=13, spaceAfter=10),
+        dash_h1=ParagraphStyle('H1', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=16, spaceAfter=6),
+        dash_h2=ParagraphStyle('H2', parent=styles['Heading2'], fontName='Helvetica-Bold', fontSize=13, spaceAfter=4),
+        summary_h1=styles['Heading1'],
+        summary_h2=styles['Heading2'],
+        summary_small=ParagraphStyle('small', parent=base, fontSize=9),
+    )
+
+
+# ---------- celdas de tabla ----------
+def fast_cell(text, styles, width):
+    """
+    Cheapest flowable that renders the cell correctly:
+      - plain string when it fits on one line,
+      - word-wrapped Paragraph when every word fits the column,
+      - CJK Paragraph (breaks anywhere) only for over-long tokens.
+    styles: (cjk_style, words_style), both Helvetica 9.
+    """
+    avail = width - 8  # left + right padding
+    if '\n' not in text and stringWidth(text, 'Helvetica', 9) <= avail:
+        return text
+    cjk_style, words_style = styles
+    if all(stringWidth(w, 'Helvetica', 9) <= avail for w in text.split()):
+        return Paragraph(escape(text), words_style)
+    return Paragraph(escape(text), cjk_style)
+
+
+# ---------- logo ----------
+@lru_cache(maxsize=1)
+def logo_image():
+    """
+    Logo decodificado una sola vez por proceso. None si no existe o no se puede leer.
+    """
+    path = logo_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        img = ImageReader(path)
+        img.getSize()  # fuerza la decodificación aquí y no en la primera página
+        return img
+    except Exception:
+        return None
+
+
+def draw_logo(c, x, y, width, height):
+    """
+    Dibuja el logo como form XObject: la imagen se embebe una vez por documento
+    y cada página solo la referencia (doForm).
+    """
+    img = logo_image()
+    if img is None:
+        return
+
+    name = f"uach_logo_{int(width)}x{int(height)}"
+    try:
+        if not c.hasForm(name):
+            c.beginForm(name, lowerx=0, lowery=0, upperx=width, uppery=height)
+            c.drawImage(img, x=0, y=0, width=width, height=height,
+                        preserveAspectRatio=True, mask='auto')
+            c.endForm()
+
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+    except Exception:
+        pass
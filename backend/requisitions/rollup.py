@@ -0,0 +1,184 @@
+# backend/requisitions/rollup.py
+"""
+Mantenimiento de RequisitionMonthlyRollup (mes × departamento × estatus).
+
+Cada escritura que cambia el conteo o los montos de una requisición recalcula
+SOLO los buckets afectados, dentro de la misma transacción:
+  - alta de requisición / cambio de estatus o departamento / cancelación
+  - alta, edición o baja de partidas (monto estimado)
+  - captura del monto real
+
+El bucket se bloquea (select_for_update) antes de recalcularse, así dos
+transacciones concurrentes sobre el mismo bucket se serializan y la segunda
+ve lo que confirmó la primera.
+
+Durante escrituras masivas (serializer con N partidas) se usa
+`rollup_deferred()`: los buckets sucios se juntan y se recalculan una sola vez
+al salir del bloque (todavía dentro de la transacción).
+"""
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from .models import Requisition, RequisitionItem, RequisitionMonthlyRollup
+
+ZERO = Decimal("0.00")
+
+_local = threading.local()
+
+
+# ---------- meses ----------
+def month_of(dt):
+    """Primer día del mes de `dt` en la zona horaria local (igual que TruncMonth)."""
+    return timezone.localtime(dt).date().replace(day=1)
+
+
+def next_month(month):
+    return (month + timedelta(days=32)).replace(day=1)
+
+
+def _month_bounds(month):
+    start = timezone.make_aware(datetime.combine(month, time.min))
+    end = timezone.make_aware(datetime.combine(next_month(month), time.min))
+    return start, end
+
+
+def bucket_for(created_at, department_id, status):
+    if created_at is None or department_id is None or not status:
+        return None
+    return (month_of(created_at), department_id, status)
+
+
+# ---------- recálculo ----------
+def refresh_bucket(bucket):
+    """Recalcula un bucket contra las tablas base. Debe ir dentro de una transacción."""
+    month, department_id, status = bucket
+    start, end = _month_bounds(month)
+
+    row, _ = RequisitionMonthlyRollup.objects.get_or_create(
+        month=month, department_id=department_id, status=status,
+    )
+    # bloquea el bucket: escrituras concurrentes del mismo bucket esperan aquí
+    RequisitionMonthlyRollup.objects.select_for_update().filter(pk=row.pk).first()
+
+    reqs = Requisition.objects.filter(
+        created_at__gte=start, created_at__lt=end,
+        requesting_department_id=department_id, status=status,
+    )
+    agg = reqs.order_by().aggregate(count=Count("id"), real_sum=Sum("real_amount"))
+    if not agg["count"]:
+        RequisitionMonthlyRollup.objects.filter(pk=row.pk).delete()
+        return
+
+    estimated = (
+        RequisitionItem.objects
+        .filter(
+            requisition__created_at__gte=start, requisition__created_at__lt=end,
+            requisition__requesting_department_id=department_id, requisition__status=status,
+        )
+        .order_by()
+        .aggregate(total=Sum("estimated_total"))["total"]
+    )
+    RequisitionMonthlyRollup.objects.filter(pk=row.pk).update(
+        count=agg["count"],
+        estimated_sum=estimated or ZERO,
+        real_sum=agg["real_sum"] or ZERO,
+        updated_at=timezone.now(),
+    )
+
+
+def mark_dirty(*buckets):
+    """Recalcula ahora o, dentro de rollup_deferred(), al cerrar el bloque."""
+    buckets = [b for b in buckets if b is not None]
+    if not buckets:
+        return
+    pending = getattr(_local, "pending", None)
+    if pending is not None:
+        pending.update(buckets)
+        return
+    with transaction.atomic():
+        for b in sorted(set(buckets)):
+            refresh_bucket(b)
+
+
+@contextmanager
+def rollup_deferred():
+    """Junta los buckets sucios del bloque y los recalcula una vez al salir."""
+    if getattr(_local, "pending", None) is not None:
+        # anidado: el bloque exterior hace el recálculo
+        yield
+        return
+
+    _local.pending = set()
+    try:
+        yield
+        pending = _local.pending
+    finally:
+        _local.pending = None
+
+    if pending:
+        with transaction.atomic():
+            # orden fijo → mismo orden de bloqueo entre transacciones
+            for b in sorted(pending):
+                refresh_bucket(b)
+
+
+def requisition_bucket(requisition_id):
+    row = (
+        Requisition.objects
+        .filter(pk=requisition_id)
+        .values_list("created_at", "requesting_department_id", "status")
+        .first()
+    )
+    return bucket_for(*row) if row else None
+
+
+# ---------- reconstrucción completa ----------
+def rebuild_rollup():
+    """
+    Reconstruye la tabla completa con dos GROUP BY (requisiciones y partidas).
+    Devuelve el número de buckets escritos.
+    """
+    reqs = (
+        Requisition.objects
+        .order_by()
+        .annotate(month=TruncMonth("created_at"))
+        .values("month", "requesting_department_id", "status")
+        .annotate(count=Count("id"), real_sum=Sum("real_amount"))
+    )
+    items = (
+        RequisitionItem.objects
+        .order_by()
+        .annotate(month=TruncMonth("requisition__created_at"))
+        .values("month", "requisition__requesting_department_id", "requisition__status")
+        .annotate(total=Sum("estimated_total"))
+    )
+
+    def _month(value):
+        return value.date() if isinstance(value, datetime) else value
+
+    estimated = {
+        (_month(r["month"]), r["requisition__requesting_department_id"], r["requisition__status"]): r["total"]
+        for r in items
+    }
+
+    rows = []
+    for r in reqs:
+        key = (_month(r["month"]), r["requesting_department_id"], r["status"])
+        rows.append(RequisitionMonthlyRollup(
+            month=key[0], department_id=key[1], status=key[2],
+            count=r["count"],
+            estimated_sum=estimated.get(key) or ZERO,
+            real_sum=r["real_sum"] or ZERO,
+        ))
+
+    with transaction.atomic():
+        RequisitionMonthlyRollup.objects.all().delete()
+        RequisitionMonthlyRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
@@ -8,10 +8,12 @@ from django.core.exceptions import ObjectDoesNotExist, ValidationError as Django
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from catalogs.serializers import CatalogRelatedFieldsMixin
 from .models import (
     Requisition, RequisitionItem, RequisitionRealAmountLog,
     RequisitionQuote, RequisitionQuoteItem,
 )
+from .rollup import rollup_deferred
 
 
 def _money2(value: Decimal) -> Decimal:
@@ -25,7 +27,7 @@ def _money2(value: Decimal) -> Decimal:
     return value.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
 
-class RequisitionItemSerializer(serializers.ModelSerializer):
+class RequisitionItemSerializer(CatalogRelatedFieldsMixin, serializers.ModelSerializer):
     # ✅ Permitimos id en payload para UPDATE de nested items
     id = serializers.IntegerField(required=False)
 
@@ -196,7 +198,7 @@ class RequisitionRealAmountLogSerializer(serializers.ModelSerializer):
         return getattr(user, "email", None) if user else None
 
 
-class RequisitionSerializer(serializers.ModelSerializer):
+class RequisitionSerializer(CatalogRelatedFieldsMixin, serializers.ModelSerializer):
     items = RequisitionItemSerializer(many=True, required=False)
 
     # ✅ Solo lectura aquí: para mantener auditoría obligatoria
@@ -302,7 +304,7 @@ class RequisitionSerializer(serializers.ModelSerializer):
         self._assert_ready_to_send(instance=None, incoming=validated_data, items_data=items_data)
 
         try:
-            with transaction.atomic():
+            with transaction.atomic(), rollup_deferred():
                 requisition = Requisition.objects.create(user=user, **validated_data)
                 for item_data in items_data:
                     RequisitionItem.objects.create(requisition=requisition, **item_data)
@@ -317,7 +319,7 @@ class RequisitionSerializer(serializers.ModelSerializer):
         self._assert_ready_to_send(instance=instance, incoming=validated_data, items_data=items_data)
 
         try:
-            with transaction.atomic():
+            with transaction.atomic(), rollup_deferred():
                 for attr, value in validated_data.items():
                     setattr(instance, attr, value)
                 instance.save()
@@ -0,0 +1,56 @@
+# backend/requisitions/signals.py
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Requisition, RequisitionItem, RequisitionQuote
+from .exporting import invalidate_export_cache
+from .rollup import bucket_for, mark_dirty, requisition_bucket
+
+
+# =============================================================================
+# ✅ PDF pre-renderizado: cualquier cambio de partidas o cotizaciones lo invalida
+# =============================================================================
+
+@receiver([post_save, post_delete], sender=RequisitionItem)
+@receiver([post_save, post_delete], sender=RequisitionQuote)
+def _invalidate_export_on_change(sender, instance, **kwargs):
+    invalidate_export_cache(getattr(instance, "requisition_id", None))
+
+
+# =============================================================================
+# ✅ Rollup mensual: recalcula los buckets (mes, depto, estatus) tocados
+# =============================================================================
+
+@receiver(pre_save, sender=Requisition)
+def _rollup_remember_old_bucket(sender, instance, raw=False, **kwargs):
+    instance._rollup_old_bucket = None
+    if raw or instance.pk is None:
+        return
+    instance._rollup_old_bucket = requisition_bucket(instance.pk)
+
+
+@receiver(post_save, sender=Requisition)
+def _rollup_on_requisition_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, "_rollup_old_bucket", None)
+    new = bucket_for(instance.created_at, instance.requesting_department_id, instance.status)
+    mark_dirty(old, new)
+
+
+@receiver(post_delete, sender=Requisition)
+def _rollup_on_requisition_delete(sender, instance, **kwargs):
+    mark_dirty(bucket_for(instance.created_at, instance.requesting_department_id, instance.status))
+
+
+@receiver([post_save, post_delete], sender=RequisitionItem)
+def _rollup_on_item_change(sender, instance, raw=False, origin=None, **kwargs):
+    if raw or isinstance(origin, Requisition):
+        # borrado en cascada: el post_delete de la requisición ya recalcula su bucket
+        return
+    if RequisitionItem.requisition.is_cached(instance):
+        req = instance.requisition
+        bucket = bucket_for(req.created_at, req.requesting_department_id, req.status)
+    else:
+        bucket = requisition_bucket(instance.requisition_id)
+    mark_dirty(bucket)
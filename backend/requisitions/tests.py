@@ -1,3 +1,226 @@
-from django.test import TestCase
+import io
+import tempfile
+import zipfile
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import (
+    Department, Project, FundingSource, BudgetUnit, Agreement,
+    Tender, ExternalService, UnitOfMeasurement, Product, ItemDescription,
+    Requisition, RequisitionItem, RequisitionMonthlyRollup,
+)
+from .exporting import render_export_pdf
+from .pdf_generator import generate_requisition_pdf, load_requisition_for_pdf
+from .rollup import rebuild_rollup
+
+
+def make_requisition(*, n_items=3, status="registered", user=None, department=None):
+    # catálogos con get_or_create: se pueden crear varias requisiciones en la misma prueba
+    user = user or get_user_model().objects.create_user(
+        employee_number="1000", first_name="Ana", last_name="López",
+        extension_number="1234", email="ana@uach.mx", password="x",
+    )
+    req = Requisition.objects.create(
+        user=user,
+        requesting_department=department or Department.objects.get_or_create(code="D1", defaults={"name": "Sistemas"})[0],
+        project=Project.objects.get_or_create(code="P1", defaults={"description": "Proyecto"})[0],
+        funding_source=FundingSource.objects.get_or_create(code="F1", defaults={"description": "Fuente"})[0],
+        budget_unit=BudgetUnit.objects.get_or_create(code="B1", defaults={"description": "Unidad"})[0],
+        agreement=Agreement.objects.get_or_create(code="A1", defaults={"description": "Convenio"})[0],
+        tender=Tender.objects.get_or_create(name="Licitación")[0],
+        external_service=ExternalService.objects.get_or_create(name="Servicio")[0],
+        requisition_reason="Motivo",
+        status=status,
+        ack_cost_realistic=True,
+    )
+    unit = UnitOfMeasurement.objects.get_or_create(name="Pieza")[0]
+    for i in range(n_items):
+        product = Product.objects.get_or_create(description=f"Producto {i}")[0]
+        desc = ItemDescription.objects.get_or_create(
+            product=product, text=f"Artículo {i}", defaults={"estimated_unit_cost": Decimal("10.00")},
+        )[0]
+        RequisitionItem.objects.create(
+            requisition=req, product=product, unit=unit, description=desc,
+            quantity=2, estimated_unit_cost=Decimal("10.00"), estimated_total=Decimal("20.00"),
+        )
+    return req
+
+
+class RequisitionPdfQueriesTests(TestCase):
+    def test_query_count_does_not_grow_with_items(self):
+        req = make_requisition(n_items=25)
+        load_requisition_for_pdf(req.pk)  # llena el caché de catálogos (departamento, proyecto, unidad, ...)
+
+        # 1 query: header + user / 1 query: items + product/description; catálogos desde catalogs.cache
+        with self.assertNumQueries(2):
+            loaded = load_requisition_for_pdf(req.pk)
+            buf = generate_requisition_pdf(loaded)
+
+        self.assertTrue(buf.getvalue().startswith(b"%PDF"))
+
+
+class RequisitionPdfLogoTests(TestCase):
+    def test_logo_comes_from_source_assets(self):
+        from .pdf_template import logo_image, logo_path
+
+        self.assertEqual(Path(logo_path()), settings.FRONTEND_IMAGES_DIR / "uach_logo.png")
+        self.assertIsNotNone(logo_image())
+        pdf = generate_requisition_pdf(make_requisition(n_items=1)).getvalue()
+        self.assertIn(b"/Subtype /Image", pdf)
+
+
+class RequisitionPdfChunkedItemsTests(TestCase):
+    def test_chunked_tables_keep_every_row_and_one_grand_total(self):
+        from pypdf import PdfReader
+
+        from .pdf_generator import CHUNKED_MODE_MIN_ROWS, ITEMS_CHUNK_ROWS, _chunked_items_tables, _item_rows
+        from .pdf_template import requisition_styles
+
+        n = CHUNKED_MODE_MIN_ROWS + 20
+        req = load_requisition_for_pdf(make_requisition(n_items=n).pk)
+
+        rows, grand_total = _item_rows(req)
+        self.assertEqual(grand_total, Decimal("20.00") * n)
+        tables = _chunked_items_tables(rows, grand_total, [100] * 6, requisition_styles(), ITEMS_CHUNK_ROWS)
+        # encabezado en cada bloque; la fila TOTAL solo al final del último
+        self.assertEqual([len(t._cellvalues) for t in tables], [ITEMS_CHUNK_ROWS + 1, ITEMS_CHUNK_ROWS + 1, 22])
+
+        text = "".join(p.extract_text() for p in PdfReader(generate_requisition_pdf(req)).pages)
+        self.assertEqual(text.count("TOTAL"), 1)
+        self.assertIn(f"Total requisición: ${grand_total:,.2f}", text)
+        positions = [text.index(f"Artículo {i}\n") for i in range(n)]
+        self.assertEqual(positions, sorted(positions))
+
+
+class RequisitionExportArtifactTests(TestCase):
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        media_root = override_settings(MEDIA_ROOT=media.name)
+        media_root.enable()
+        self.addCleanup(media_root.disable)
+        self.req = make_requisition(n_items=2)
+        self.folder = Path(media.name) / "requisitions" / str(self.req.pk) / "export"
+
+    def _artifacts(self):
+        return sorted(p.name for p in self.folder.glob("*.pdf"))
+
+    def test_only_sent_requisitions_keep_one_current_artifact(self):
+        render_export_pdf(self.req.pk)
+        self.assertEqual(self._artifacts(), [])  # borrador: no deja archivos
+
+        Requisition.objects.filter(pk=self.req.pk).update(status="sent")
+        first = render_export_pdf(self.req.pk)
+        stored = self._artifacts()
+        self.assertEqual(len(stored), 1)
+
+        with mock.patch("requisitions.pdf_generator.generate_requisition_pdf") as generate:
+            self.assertEqual(render_export_pdf(self.req.pk), first)
+        generate.assert_not_called()
+
+        # el encabezado cambia la huella: el artefacto anterior se reemplaza
+        Requisition.objects.filter(pk=self.req.pk).update(requisition_reason="Otro motivo")
+        render_export_pdf(self.req.pk)
+        self.assertEqual(len(self._artifacts()), 1)
+        self.assertNotEqual(self._artifacts(), stored)
+
+        # cambiar una partida invalida el artefacto al momento
+        item = self.req.items.first()
+        item.quantity = 3
+        item.save()
+        self.assertEqual(self._artifacts(), [])
+
+
+class RequisitionMonthlyRollupTests(TestCase):
+    def _snapshot(self):
+        return sorted(
+            RequisitionMonthlyRollup.objects.values_list(
+                "month", "department_id", "status", "count", "estimated_sum", "real_sum",
+            )
+        )
+
+    def test_incremental_matches_rebuild(self):
+        req = make_requisition(n_items=3)
+        row = RequisitionMonthlyRollup.objects.get(status="registered")
+        self.assertEqual((row.count, row.estimated_sum), (1, Decimal("60.00")))
+
+        # cambio de estatus: el bucket viejo desaparece, el nuevo aparece
+        req.status = "cancelled"
+        req.real_amount = Decimal("55.00")
+        req.save()
+        req.items.first().delete()
+
+        self.assertFalse(RequisitionMonthlyRollup.objects.filter(status="registered").exists())
+        row = RequisitionMonthlyRollup.objects.get(status="cancelled")
+        self.assertEqual((row.count, row.estimated_sum, row.real_sum), (1, Decimal("40.00"), Decimal("55.00")))
+
+        incremental = self._snapshot()
+        rebuild_rollup()
+        self.assertEqual(incremental, self._snapshot())
+
+        req.delete()
+        self.assertFalse(RequisitionMonthlyRollup.objects.exists())
+
+
+class ImportTimeCommandTests(TestCase):
+    def _importtime(self, *modules):
+        out = io.StringIO()
+        call_command("importtime", modules=list(modules) or None, top=3, stdout=out)
+        return out.getvalue()
+
+    def test_urlconf_and_views_load_no_heavy_libraries(self):
+        output = self._importtime("core.urls", "reports.views", "requisitions.exporting", "requisitions.signals")
+        self.assertIn("Importado: core.urls, reports.views, requisitions.exporting", output)
+        self.assertIn("Ninguna librería pesada se carga al arrancar.", output)
+        self.assertIn("requisitions", output)
+
+    def test_reports_heavy_library_when_loaded(self):
+        output = self._importtime("reports.pdf_generator")
+        self.assertIn("Librerías pesadas cargadas al arrancar:", output)
+        self.assertIn("reportlab", output)
+
+
+class RequisitionBatchExportTests(TransactionTestCase):
+    # TransactionTestCase: los workers del pool (otros procesos) deben ver las filas confirmadas
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser(
+            "9000", "Admin", "Lotes", "0000", "admin@uach.mx", password="x",
+        )
+        self.ids = [make_requisition(n_items=n, user=self.admin).id for n in (1, 2, 3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _post(self, **data):
+        return self.client.post("/api/requisitions/batch_export/", data, format="json")
+
+    @mock.patch("requisitions.exporting.BATCH_EXPORT_MAX_WORKERS", 2)
+    def test_zip_and_pdf_render_in_process_pool(self):
+        from pypdf import PdfReader
+
+        res = self._post(ids=self.ids, format="zip")
+        self.assertEqual(res.status_code, 200)
+        with zipfile.ZipFile(io.BytesIO(b"".join(res.streaming_content))) as zf:
+            self.assertEqual(sorted(zf.namelist()), sorted(f"requisicion_{rid}.pdf" for rid in self.ids))
+            self.assertTrue(all(zf.read(name).startswith(b"%PDF") for name in zf.namelist()))
+
+        res = self._post(ids=self.ids, format="pdf")
+        self.assertEqual(res.status_code, 200)
+        pages = [page.extract_text() for page in PdfReader(io.BytesIO(res.content)).pages]
+        self.assertGreaterEqual(len(pages), len(self.ids))
+        self.assertIn("Artículo 2", "".join(pages))
+
+    def test_unparseable_date_filter_is_rejected(self):
+        res = self._post(date="garbage", format="pdf")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("date", res.json())
+
+        res = self._post(start_date="2024-02-30", format="zip")
+        self.assertEqual(res.status_code, 400)
+        self.assertIn("start_date", res.json())
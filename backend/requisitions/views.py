@@ -1,7 +1,6 @@
 # backend/requisitions/views.py
 
 from decimal import Decimal, InvalidOperation
-from io import BytesIO
 import json
 import re
 from datetime import timedelta
@@ -13,11 +12,12 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 
 from django.db.models import Count, Prefetch  # ✅ contar items + prefetch
 from django.shortcuts import get_object_or_404  # ✅ NUEVO
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 
 from .models import (
     Requisition, RequisitionItem, RequisitionRealAmountLog,
@@ -27,7 +27,12 @@ from .serializers import (
     RequisitionSerializer, RequisitionItemSerializer,
     RequisitionQuoteSerializer,
 )
-from .pdf_generator import generate_requisition_pdf
+from .exporting import (
+    BATCH_EXPORT_MAX_REQUISITIONS,
+    export_blocker, render_export_pdf,
+    render_export_concatenated, stream_export_zip,
+    schedule_export_prerender,
+)
 
 import traceback
 
@@ -316,45 +321,6 @@ def _should_run_duplicate_guard(*, instance: Requisition, validated_data: dict)
     return False
 
 
-def _merge_pdf_bytes(main_pdf_bytes: bytes, extra_pdf_paths: list[str]) -> bytes:
-    """
-    Une el PDF principal + PDFs extra (cotizaciones) en un solo PDF final.
-    Requiere pypdf (recomendado) o PyPDF2.
-    """
-    try:
-        from pypdf import PdfReader, PdfWriter
-    except Exception:  # pragma: no cover
-        try:
-            from PyPDF2 import PdfReader, PdfWriter
-        except Exception as e:
-            raise RuntimeError(
-                "Falta dependencia para unir PDFs. Instala: pip install pypdf"
-            ) from e
-
-    writer = PdfWriter()
-
-    main_reader = PdfReader(BytesIO(main_pdf_bytes))
-    for page in main_reader.pages:
-        writer.add_page(page)
-
-    failures = []
-    for path in extra_pdf_paths:
-        try:
-            with open(path, "rb") as f:
-                r = PdfReader(f)
-                for page in r.pages:
-                    writer.add_page(page)
-        except Exception as e:
-            failures.append(f"{path}: {e}")
-
-    if failures:
-        raise ValueError("No se pudieron leer algunas cotizaciones:\n" + "\n".join(failures))
-
-    out = BytesIO()
-    writer.write(out)
-    return out.getvalue()
-
-
 # =============================================================================
 # ✅ NUEVO: Parsing tolerante de item_ids
 # =============================================================================
@@ -415,6 +381,19 @@ def _parse_item_ids_tolerant(raw_ids) -> list[int]:
     return out
 
 
+def _parse_filter_date(value):
+    """
+    'YYYY-MM-DD' → date; None si viene vacío. ValueError si no es fecha: parse_date()
+    devuelve None con texto basura y created_at__date=None filtraría por IS NULL.
+    """
+    if not value:
+        return None
+    parsed = parse_date(str(value).strip())
+    if parsed is None:
+        raise ValueError(f"fecha inválida: {value}")
+    return parsed
+
+
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
@@ -559,7 +538,13 @@ class RequisitionViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_409_CONFLICT,
                 )
 
+        old_status = instance.status
         self.perform_update(ser)
+
+        # ✅ Al pasar a "sent" se pre-renderiza el PDF (cuerpo + cotizaciones) en segundo plano
+        if old_status != "sent" and ser.instance.status == "sent":
+            schedule_export_prerender(ser.instance.pk)
+
         return Response(ser.data)
 
     @action(detail=True, methods=["get"], url_path="check_duplicates")
@@ -668,59 +653,124 @@ class RequisitionViewSet(viewsets.ModelViewSet):
     def export_pdf(self, request, pk=None):
         requisition = self.get_object()
 
-        if requisition.status == "cancelled":
-            return Response(
-                {"detail": "No se puede imprimir una requisición cancelada."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        blocker = export_blocker(requisition)
+        if blocker:
+            return Response({"detail": blocker}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not requisition.ack_cost_realistic:
-            return Response(
-                {"detail": "Debes confirmar 'costo aproximado pero realista' antes de imprimir/exportar."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        try:
+            pdf_bytes = render_export_pdf(requisition)
+
+            resp = HttpResponse(pdf_bytes, content_type='application/pdf')
+            resp['Content-Disposition'] = f'inline; filename="requisicion_{requisition.id}.pdf"'
+            return resp
+
+        except Exception as e:
+            traceback.print_exc()
+            return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminLike], url_path="batch_export")
+    def batch_export(self, request):
+        """
+        Exporta varias requisiciones en una sola descarga.
+        Body:
+          - ids: lista de IDs, o bien filtros: status, date (YYYY-MM-DD), start_date, end_date
+          - format: "zip" (un PDF por requisición, en streaming) | "pdf" (un solo PDF concatenado)
+        Las requisiciones que no pasan la validación de impresión se omiten y se reportan.
+        """
+        fmt = str(request.data.get("format") or "zip").strip().lower()
+        if fmt not in ("zip", "pdf"):
+            return Response({"format": "Formato inválido. Usa 'zip' o 'pdf'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        qs = self.get_queryset()
+
+        raw_ids = request.data.get("ids")
+        if hasattr(request.data, "getlist") and request.data.getlist("ids"):
+            raw_ids = request.data.getlist("ids")
+
+        if raw_ids:
+            try:
+                ids = _parse_item_ids_tolerant(raw_ids)
+            except Exception:
+                return Response({"ids": "IDs inválidos."}, status=status.HTTP_400_BAD_REQUEST)
+            qs = qs.filter(id__in=ids)
+        else:
+            status_in = (request.data.get("status") or "").strip().lower()
+            day = request.data.get("date")
+            start_date = request.data.get("start_date")
+            end_date = request.data.get("end_date")
+
+            if not (status_in or day or start_date or end_date):
+                return Response(
+                    {"detail": "Debes indicar 'ids' o al menos un filtro (status, date, start_date, end_date)."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        items = requisition.items.all()
-        if not items.exists():
+            dates, bad = {}, {}
+            for key in ("date", "start_date", "end_date"):
+                try:
+                    dates[key] = _parse_filter_date(request.data.get(key))
+                except ValueError:
+                    bad[key] = "Fecha inválida. Usa YYYY-MM-DD."
+            if bad:
+                return Response(bad, status=status.HTTP_400_BAD_REQUEST)
+            day, start_date, end_date = dates["date"], dates["start_date"], dates["end_date"]
+
+            if status_in:
+                qs = qs.filter(status=status_in)
+            if day:
+                qs = qs.filter(created_at__date=day)
+            if start_date:
+                qs = qs.filter(created_at__date__gte=start_date)
+            if end_date:
+                qs = qs.filter(created_at__date__lte=end_date)
+
+        requisitions = list(qs.order_by("id")[:BATCH_EXPORT_MAX_REQUISITIONS + 1])
+        if len(requisitions) > BATCH_EXPORT_MAX_REQUISITIONS:
             return Response(
-                {"detail": "No se puede imprimir/exportar una requisición sin renglones (items)."},
+                {"detail": f"El lote excede el máximo de {BATCH_EXPORT_MAX_REQUISITIONS} requisiciones. Acota los filtros."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        bad = []
-        for it in items:
-            if it.estimated_total is None or it.estimated_total <= 0:
-                bad.append(it.id)
+        ready_ids = []
+        skipped = {}
+        for req in requisitions:
+            blocker = export_blocker(req)
+            if blocker:
+                skipped[req.id] = blocker
+            else:
+                ready_ids.append(req.id)
 
-        if bad:
+        if not ready_ids:
             return Response(
-                {"detail": f"No se puede imprimir/exportar: hay renglones sin monto válido (estimated_total). Item IDs: {bad}"},
+                {"detail": "No hay requisiciones exportables con esos criterios.", "skipped": skipped},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        try:
-            buf = generate_requisition_pdf(requisition)
-
-            quote_paths = []
-            for q in requisition.quotes.order_by("uploaded_at"):
-                try:
-                    if q.file and hasattr(q.file, "path"):
-                        quote_paths.append(q.file.path)
-                except Exception:
-                    pass
-
-            pdf_bytes = buf.getvalue()
-            if quote_paths:
-                pdf_bytes = _merge_pdf_bytes(pdf_bytes, quote_paths)
+        stamp = timezone.localtime().strftime("%Y%m%d_%H%M")
 
-            resp = HttpResponse(pdf_bytes, content_type='application/pdf')
-            resp['Content-Disposition'] = f'inline; filename="requisicion_{requisition.id}.pdf"'
+        if fmt == "zip":
+            resp = StreamingHttpResponse(stream_export_zip(ready_ids, skipped=skipped), content_type="application/zip")
+            resp['Content-Disposition'] = f'attachment; filename="requisiciones_{stamp}.zip"'
             return resp
 
+        try:
+            pdf_bytes, skipped = render_export_concatenated(ready_ids, skipped=skipped)
         except Exception as e:
             traceback.print_exc()
             return Response({'detail': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        if not pdf_bytes:
+            return Response(
+                {"detail": "No se pudo generar ninguna requisición del lote.", "skipped": skipped},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        resp = HttpResponse(pdf_bytes, content_type='application/pdf')
+        resp['Content-Disposition'] = f'inline; filename="requisiciones_{stamp}.pdf"'
+        if skipped:
+            resp['X-Skipped-Requisitions'] = ",".join(str(rid) for rid in sorted(skipped))
+        return resp
+
     @action(detail=True, methods=['post'], permission_classes=[IsAdminLike])
     def set_real_amount(self, request, pk=None):
         requisition = self.get_object()
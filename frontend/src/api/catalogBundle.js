@@ -0,0 +1,21 @@
+import apiClient from './apiClient';
+
+/*
+  GET /catalogs/bundle/ → todos los catálogos del formulario en una respuesta.
+  El backend manda cada catálogo como { fields, rows } (compacto) y una ETag
+  por versión: el navegador revalida solo y, si nada cambió, recibe un 304.
+  Aquí se expande a arreglos de objetos, igual que los endpoints individuales.
+*/
+const expand = ({ fields = [], rows = [] } = {}) =>
+  rows.map((row) => Object.fromEntries(fields.map((f, i) => [f, row[i]])));
+
+export async function fetchCatalogBundle() {
+  const { data } = await apiClient.get('/catalogs/bundle/');
+  const out = {};
+  Object.entries(data || {}).forEach(([key, value]) => {
+    if (value && Array.isArray(value.rows)) out[key] = expand(value);
+  });
+  return out;
+}
+
+export default fetchCatalogBundle;
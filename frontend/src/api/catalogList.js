@@ -0,0 +1,40 @@
+import apiClient from './apiClient';
+
+/*
+  Listados de catálogos grandes (/catalogs/products/, /catalogs/item-descriptions/).
+  El backend los pagina por cursor ({ next, previous, results }) y con
+  ?compact=1 manda { fields, rows } (filas como arreglos, sin auditoría).
+  Aquí se piden todas las páginas en modo compacto y se expande a arreglos de
+  objetos, igual que antes. Si el endpoint responde un arreglo plano (sin
+  paginación) se usa tal cual.
+*/
+const PAGE_SIZE = 1000;
+
+const expand = ({ fields = [], rows = [] } = {}) =>
+  rows.map((row) => Object.fromEntries(fields.map((f, i) => [f, row[i]])));
+
+const cursorOf = (nextUrl) => {
+  if (!nextUrl) return null;
+  try {
+    return new URL(nextUrl, window.location.origin).searchParams.get('cursor');
+  } catch {
+    return null;
+  }
+};
+
+export async function fetchCatalogList(url, params = {}) {
+  const out = [];
+  let cursor = null;
+  do {
+    const { data } = await apiClient.get(url, {
+      params: { ...params, compact: 1, page_size: PAGE_SIZE, ...(cursor ? { cursor } : {}) },
+    });
+    if (Array.isArray(data)) return data;
+    if (Array.isArray(data?.rows)) out.push(...expand(data));
+    else if (Array.isArray(data?.results)) out.push(...data.results);
+    cursor = cursorOf(data?.next);
+  } while (cursor);
+  return out;
+}
+
+export default fetchCatalogList;
@@ -2,6 +2,8 @@
 import React, { useEffect, useMemo, useRef, useState } from "react";
 import { useNavigate } from "react-router-dom";
 import apiClient from "../../api/apiClient";
+import { fetchCatalogBundle } from "../../api/catalogBundle";
+import { fetchCatalogList } from "../../api/catalogList";
 import LoadingSpinner from "../UI/LoadingSpinner";
 import RequisitionQuotesPanel from "./RequisitionQuotesPanel";
 
@@ -30,6 +32,17 @@ const CATALOG_CANDIDATES = {
   external_service: ["/catalogs/external-services/", "/catalogs/external_services/", "/catalogs/services/"],
 };
 
+/* Llave de cada catálogo en /catalogs/bundle/ (una sola petición con ETag) */
+const BUNDLE_KEYS = {
+  requesting_department: "departments",
+  project: "projects",
+  funding_source: "funding_sources",
+  budget_unit: "budget_units",
+  agreement: "agreements",
+  tender: "tenders",
+  external_service: "external_services",
+};
+
 const CATALOG_META = {
   requesting_department: { uiLabel: "Departamento Solicitante" },
   project: { uiLabel: "Proyecto" },
@@ -620,6 +633,21 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
       setLoadingStep1(true);
       try {
         const keys = Object.keys(CATALOG_META);
+
+        // ✅ Primero el bundle (1 petición, 304 si no cambió); si falla, endpoint por catálogo
+        try {
+          const bundle = await fetchCatalogBundle();
+          if (cancelled) return;
+          const next = {};
+          keys.forEach((k) => {
+            next[k] = bundle[BUNDLE_KEYS[k]] || [];
+          });
+          setCatalogs(next);
+          return;
+        } catch (e) {
+          console.warn(`[catalog] bundle → ${e?.response?.status || e.message}`);
+        }
+
         const results = await Promise.allSettled(keys.map((k) => fetchFirstOk(CATALOG_CANDIDATES[k])));
         if (cancelled) return;
 
@@ -654,13 +682,22 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
     async function load() {
       setLoadingCatalogs(true);
       try {
-        const [prods, ums] = await Promise.all([
-          apiClient.get(STEP2_SPECS.productsUrl),
-          apiClient.get(STEP2_SPECS.unitsUrl),
-        ]);
+        let prods, ums;
+        try {
+          const bundle = await fetchCatalogBundle();
+          prods = bundle.products || [];
+          ums = bundle.units || [];
+        } catch {
+          const [prodList, umRes] = await Promise.all([
+            fetchCatalogList(STEP2_SPECS.productsUrl),
+            apiClient.get(STEP2_SPECS.unitsUrl),
+          ]);
+          prods = prodList || [];
+          ums = umRes.data || [];
+        }
         if (!cancelled) {
-          setProducts(prods.data || []);
-          setUnits(ums.data || []);
+          setProducts(prods);
+          setUnits(ums);
         }
       } finally {
         if (!cancelled) setLoadingCatalogs(false);
@@ -688,8 +725,7 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
     let cancelled = false;
     async function run() {
       try {
-        const resp = await apiClient.get(STEP2_SPECS.itemDescriptionsUrl(pid));
-        const list = resp.data || [];
+        const list = (await fetchCatalogList(STEP2_SPECS.itemDescriptionsUrl(pid))) || [];
         if (!cancelled) {
           setDescOptions(list);
           setDescCache((prev) => ({ ...prev, [String(pid)]: list }));
@@ -717,14 +753,14 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
     async function prefetch() {
       try {
         const results = await Promise.allSettled(
-          missing.map((pid) => apiClient.get(STEP2_SPECS.itemDescriptionsUrl(pid)))
+          missing.map((pid) => fetchCatalogList(STEP2_SPECS.itemDescriptionsUrl(pid)))
         );
         if (cancelled) return;
 
         const patch = {};
         results.forEach((res, i) => {
           const pid = missing[i];
-          if (res.status === "fulfilled") patch[String(pid)] = res.value?.data || [];
+          if (res.status === "fulfilled") patch[String(pid)] = res.value || [];
         });
 
         if (Object.keys(patch).length) {
@@ -1094,8 +1130,7 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
     let cancelled = false;
     async function fetchDescs() {
       try {
-        const resp = await apiClient.get(STEP2_SPECS.itemDescriptionsUrl(catalogModalProduct));
-        const list = resp.data || [];
+        const list = (await fetchCatalogList(STEP2_SPECS.itemDescriptionsUrl(catalogModalProduct))) || [];
         if (!cancelled) {
           setCatalogModalDescs(list);
           setDescCache((prev) => ({ ...prev, [String(catalogModalProduct)]: list }));
@@ -1144,16 +1179,14 @@ export default function RequisitionEditWizard({ requisition, onSaved }) {
 
       if (String(form.product) === String(registerForm.product)) {
         try {
-          const refresh = await apiClient.get(STEP2_SPECS.itemDescriptionsUrl(form.product));
-          const list = refresh.data || [];
+          const list = (await fetchCatalogList(STEP2_SPECS.itemDescriptionsUrl(form.product))) || [];
           setDescOptions(list);
           setDescCache((prev) => ({ ...prev, [String(form.product)]: list }));
         } catch {}
       }
       if (String(catalogModalProduct) === String(registerForm.product)) {
         try {
-          const refresh = await apiClient.get(STEP2_SPECS.itemDescriptionsUrl(catalogModalProduct));
-          const list = refresh.data || [];
+          const list = (await fetchCatalogList(STEP2_SPECS.itemDescriptionsUrl(catalogModalProduct))) || [];
           setCatalogModalDescs(list);
           setDescCache((prev) => ({ ...prev, [String(catalogModalProduct)]: list }));
         } catch {}
@@ -2,6 +2,7 @@
 import React, { useEffect, useState, useContext, useRef } from 'react';
 import { useNavigate } from 'react-router-dom';
 import apiClient from '../../api/apiClient';
+import { fetchCatalogBundle } from '../../api/catalogBundle';
 import LoadingSpinner from '../UI/LoadingSpinner';
 import { useToast } from '../../contexts/ToastContext';
 import { AuthContext } from '../../contexts/AuthContext';
@@ -98,6 +99,22 @@ export default function RequisitionForm({
 
     (async () => {
       try {
+        // ✅ Una sola petición (ETag/304); si no está disponible, un endpoint por catálogo
+        try {
+          const bundle = await fetchCatalogBundle();
+          setCatalogs({
+            projects: bundle.projects || [],
+            funding_sources: bundle.funding_sources || [],
+            budget_units: bundle.budget_units || [],
+            agreements: bundle.agreements || [],
+            tenders: bundle.tenders || [],
+            external_services: bundle.external_services || [],
+          });
+          return;
+        } catch (e) {
+          console.warn('[catalog] bundle:', e?.response?.status || e.message);
+        }
+
         const [
           projRes,
           fundRes,
@@ -1,6 +1,7 @@
 // frontend/src/components/Requisitions/RequisitionItems.jsx
 import React, { useEffect, useMemo, useRef, useState } from 'react';
 import apiClient from '../../api/apiClient';
+import { fetchCatalogList } from '../../api/catalogList';
 import { useToast } from '../../contexts/ToastContext';
 
 /* [LICIT] Alta de nuevos productos deshabilitada en UI (solo vía Django admin) */
@@ -84,8 +85,7 @@ export default function RequisitionItems({
     const tryGet = async (urls) => {
       for (const url of urls) {
         try {
-          const res = await apiClient.get(url);
-          const arr = Array.isArray(res.data) ? res.data : (res.data?.results || []);
+          const arr = await fetchCatalogList(url);
           if (arr.length) return arr;
         } catch {
           /* try next */
@@ -149,8 +149,7 @@ export default function RequisitionItems({
 
       for (const url of candidates) {
         try {
-          const res = await apiClient.get(url);
-          const data = Array.isArray(res.data) ? res.data : (res.data?.results || []);
+          const data = await fetchCatalogList(url);
           if (Array.isArray(data)) {
             arr = data;
             break;
@@ -589,8 +588,7 @@ export default function RequisitionItems({
       let data = null;
       for (const url of urls) {
         try {
-          const res = await apiClient.get(url);
-          const arr = Array.isArray(res.data) ? res.data : (res.data?.results || []);
+          const arr = await fetchCatalogList(url);
           if (arr.length) { data = arr; break; }
         } catch { /* try next */ }
       }
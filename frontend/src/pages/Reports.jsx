@@ -84,58 +84,38 @@ export default function Reports() {
     "#a855f7", // purple-500
   ];
 
-  // Fetch simple endpoints (no filters)
-  const fetchStatic = async () => {
-    const [u] = await Promise.all([
-      apiClient.get("/reports/by-unit/"),
-    ]);
-    setByUnit(u.data || []);
-  };
-
-  // Fetch month+unit (with optional filters)
-  const fetchByMonthUnit = async () => {
+  // Query string de fechas (dashboard y PDF resumen usan los mismos filtros)
+  const dateQuery = useMemo(() => {
     const params = new URLSearchParams();
     if (startDate) params.set("start_date", startDate);
     if (endDate) params.set("end_date", endDate);
-    const qs = params.toString();
-    const url = qs ? `/reports/by-month-unit/?${qs}` : "/reports/by-month-unit/";
-    const r = await apiClient.get(url);
-    setByMonthUnit(r.data || []);
-  };
+    return params.toString();
+  }, [startDate, endDate]);
 
-  const loadAll = async () => {
-    try {
-      setLoading(true);
-      setError(null);
-      await Promise.all([fetchStatic(), fetchByMonthUnit()]);
-    } catch (e) {
-      console.error(e);
-      setError("No se pudieron cargar los datos de reportes.");
-    } finally {
-      setLoading(false);
-    }
+  // Una sola llamada: totales por departamento y por mes+departamento (GROUPING SETS en el backend)
+  const fetchDashboard = async () => {
+    const url = dateQuery ? `/reports/dashboard/?${dateQuery}` : "/reports/dashboard/";
+    const r = await apiClient.get(url);
+    setByUnit(r.data?.by_department || []);
+    setByMonthUnit(r.data?.by_month_department || []);
   };
 
-  useEffect(() => {
-    loadAll();
-    // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, []);
-
-  // re-fetch when filters change (only the month+unit chart depends on dates)
+  // carga inicial y re-fetch cuando cambian las fechas
   useEffect(() => {
     (async () => {
       try {
         setLoading(true);
-        await fetchByMonthUnit();
+        setError(null);
+        await fetchDashboard();
       } catch (e) {
         console.error(e);
-        setError("No se pudieron cargar los datos por mes.");
+        setError("No se pudieron cargar los datos de reportes.");
       } finally {
         setLoading(false);
       }
     })();
     // eslint-disable-next-line react-hooks/exhaustive-deps
-  }, [startDate, endDate]);
+  }, [dateQuery]);
 
   // ---- DERIVED DATA FOR CHARTS ----
 
@@ -178,10 +158,13 @@ export default function Reports() {
 
         {/* Filters */}
         <Section
-          title="Filtros de periodo (para series por mes)"
+          title="Filtros de periodo"
           right={
             <div className="flex items-center gap-2">
-              <DownloadButton title="PDF Resumen" endpoint="/reports/summary-pdf/" />
+              <DownloadButton
+                title="PDF Resumen"
+                endpoint={dateQuery ? `/reports/summary-pdf/?${dateQuery}` : "/reports/summary-pdf/"}
+              />
               <DownloadButton title="PDF Detallado" endpoint="/reports/requisitions-report/" />
             </div>
           }